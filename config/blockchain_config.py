@@ -1,24 +1,142 @@
 import os
+import shlex
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def detect_workers(argv=None, environ=None) -> int:
+    """Worker processes serving the API
+
+    The highest of API_WORKERS, WEB_CONCURRENCY (read by uvicorn and
+    gunicorn) and a --workers/-w option of a uvicorn or gunicorn command
+    line or GUNICORN_CMD_ARGS. Spawned uvicorn workers see the parent's
+    argv; other scripts' own --workers options are not counted.
+    """
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    counts = [int(environ.get("API_WORKERS", "1")), int(environ.get("WEB_CONCURRENCY", "1"))]
+    program = os.path.basename(argv[0]) if argv else ""
+    if program == "__main__.py":
+        # python -m uvicorn
+        program = os.path.basename(os.path.dirname(argv[0]))
+    args = list(argv[1:]) if program in ("uvicorn", "gunicorn") else []
+    args += shlex.split(environ.get("GUNICORN_CMD_ARGS", ""))
+    for index, arg in enumerate(args):
+        if arg in ("--workers", "-w") and index + 1 < len(args):
+            value = args[index + 1]
+        elif arg.startswith("--workers="):
+            value = arg.partition("=")[2]
+        elif arg.startswith("-w") and arg[2:].isdigit():
+            value = arg[2:]
+        else:
+            continue
+        if value.isdigit():
+            counts.append(int(value))
+    return max(counts)
+
 class BlockchainConfig:
     PRIVATE_KEY = os.getenv("PRIVATE_KEY")
     RPC_URL = os.getenv("RPC_URL")
     NETWORK = os.getenv("NETWORK", "sepolia")
     CHAIN_ID = int(os.getenv("CHAIN_ID", "11155111"))
 
+    # Extra RPC endpoints for read routing; the first one is the primary for writes
+    RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", RPC_URL or "").split(",") if url.strip()]
+    RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+    RPC_HEDGE_MIN_DELAY_MS = float(os.getenv("RPC_HEDGE_MIN_DELAY_MS", "50"))
+    RPC_FAILURE_COOLDOWN = float(os.getenv("RPC_FAILURE_COOLDOWN", "5"))
+
     # Contract addresses (updated after deployment)
     SUBMISSION_REGISTRY_ADDRESS = os.getenv("SUBMISSION_REGISTRY_ADDRESS")
     VERIFICATION_MANAGER_ADDRESS = os.getenv("VERIFICATION_MANAGER_ADDRESS")
     BOUNTY_POOL_ADDRESS = os.getenv("BOUNTY_POOL_ADDRESS")
     STABLECOIN_ADDRESS = os.getenv("STABLECOIN_ADDRESS")
 
+    # Submission registry variant: "standard" (string fields) or "compact" (bytes32 digest)
+    SUBMISSION_REGISTRY_MODE = os.getenv("SUBMISSION_REGISTRY_MODE", "standard").lower()
+
+    # Merkle anchoring: buffer submissions off-chain and commit batch roots
+    ANCHOR_MODE = os.getenv("ANCHOR_MODE", "false").lower() == "true"
+    ANCHOR_BATCH_SIZE = int(os.getenv("ANCHOR_BATCH_SIZE", "50000"))
+    ANCHOR_WINDOW_SECONDS = float(os.getenv("ANCHOR_WINDOW_SECONDS", "60"))
+    ANCHOR_DATA_DIR = os.getenv("ANCHOR_DATA_DIR", "data/anchors")
+
+    # Idempotency-Key store for POST endpoints
+    IDEMPOTENCY_DB_PATH = os.getenv("IDEMPOTENCY_DB_PATH", "data/idempotency.sqlite3")
+    IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+    IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "600"))
+
+    # Transaction admission control
+    TX_MAX_CONCURRENCY = int(os.getenv("TX_MAX_CONCURRENCY", "4"))
+    TX_QUEUE_DEPTH = int(os.getenv("TX_QUEUE_DEPTH", "100"))
+    TX_LANE_LIMITS = os.getenv("TX_LANE_LIMITS", "claim:4,verification:4,claimable:2,bounty:1,submission:2,workflow:2")
+
+    # Pending transaction supervision (fee bumping of stuck transactions)
+    USE_EIP1559 = os.getenv("USE_EIP1559", "false").lower() == "true"
+    TX_STUCK_BLOCKS = int(os.getenv("TX_STUCK_BLOCKS", "3"))
+    TX_FEE_BUMP_PERCENT = float(os.getenv("TX_FEE_BUMP_PERCENT", "12.5"))
+    TX_MAX_FEE_BUMPS = int(os.getenv("TX_MAX_FEE_BUMPS", "5"))
+    TX_MAX_FEE_GWEI = float(os.getenv("TX_MAX_FEE_GWEI", "0"))
+    TX_RECEIPT_TIMEOUT = float(os.getenv("TX_RECEIPT_TIMEOUT", "120"))
+
+    # Write confirmation policy: none, mempool, receipt, confirmations=N or finalized
+    TX_DEFAULT_WAIT = os.getenv("TX_DEFAULT_WAIT", "receipt")
+    TX_CONFIRMATION_TIMEOUT = float(os.getenv("TX_CONFIRMATION_TIMEOUT", "1800"))
+    CHAIN_HEAD_POLL_INTERVAL = float(os.getenv("CHAIN_HEAD_POLL_INTERVAL", "1"))
+    FINALITY_DEPTH = int(os.getenv("FINALITY_DEPTH", "64"))
+    # Results of block-pinned reads kept in memory, keyed by (call, block)
+    READ_CACHE_ENTRIES = int(os.getenv("READ_CACHE_ENTRIES", "4096"))
+
+    # Bounty/payout analytics materialized from BountyPool events
+    ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+    ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", "data/analytics.sqlite3")
+    ANALYTICS_START_BLOCK = int(os.getenv("ANALYTICS_START_BLOCK", "0"))
+    ANALYTICS_CONFIRMATIONS = int(os.getenv("ANALYTICS_CONFIRMATIONS", "2"))
+    ANALYTICS_CHUNK_SIZE = int(os.getenv("ANALYTICS_CHUNK_SIZE", "2000"))
+    ANALYTICS_REORG_DEPTH = int(os.getenv("ANALYTICS_REORG_DEPTH", "128"))
+
+    # Write pre-flight: state mirror check (needs analytics), plus eth_call simulation at "pending"
+    PREFLIGHT_ENABLED = os.getenv("PREFLIGHT_ENABLED", "true").lower() == "true"
+    PREFLIGHT_SIMULATE = os.getenv("PREFLIGHT_SIMULATE", "false").lower() == "true"
+
+    # Pipelined submission-payout workflow records
+    WORKFLOW_DB_PATH = os.getenv("WORKFLOW_DB_PATH", "data/workflows.sqlite3")
+
+    # Gas accounting of mined transactions (GET /metrics/gas)
+    GAS_LEDGER_DB_PATH = os.getenv("GAS_LEDGER_DB_PATH", "data/gas_ledger.sqlite3")
+
+    # Write-ahead transaction outbox, reconciled with the chain on startup
+    OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", "data/outbox.sqlite3")
+    OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "168"))
+
+    # Bulk NDJSON export: submissions per JSON-RPC batch and batches requested ahead of the client
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "200"))
+    EXPORT_CHUNKS_IN_FLIGHT = int(os.getenv("EXPORT_CHUNKS_IN_FLIGHT", "4"))
+
+    # Streaming uploads (POST /submissions/upload): content-addressed file store and its index
+    CONTENT_STORE_PATH = os.getenv("CONTENT_STORE_PATH", "data/content")
+    CONTENT_INDEX_DB_PATH = os.getenv("CONTENT_INDEX_DB_PATH", "data/content_index.sqlite3")
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024**3)))
+
+    # Relayed EIP-712 signed submissions: gas per batch transaction, signature
+    # verification processes (0 = one per CPU) and entries per request
+    RELAY_MAX_BATCH_GAS = int(os.getenv("RELAY_MAX_BATCH_GAS", "15000000"))
+    RELAY_VERIFY_WORKERS = int(os.getenv("RELAY_VERIFY_WORKERS", "0"))
+    RELAY_MAX_SUBMISSIONS = int(os.getenv("RELAY_MAX_SUBMISSIONS", "5000"))
+
     # FastAPI config
     API_HOST = os.getenv("API_HOST", "localhost")
     API_PORT = int(os.getenv("API_PORT", "8000"))
     DEBUG = os.getenv("DEBUG", "true").lower() == "true"
+    API_WORKERS = detect_workers()
+
+    # Nonce and pending transaction coordination: local (one process) or shared (several workers)
+    TX_COORDINATION = os.getenv("TX_COORDINATION", "shared" if API_WORKERS > 1 else "local")
+    TX_COORDINATION_DB_PATH = os.getenv("TX_COORDINATION_DB_PATH", "data/tx_coordination.sqlite3")
+    LEADER_LOCK_PATH = os.getenv("LEADER_LOCK_PATH", "data/leader.lock")
+    NONCE_GAP_TIMEOUT = float(os.getenv("NONCE_GAP_TIMEOUT", "30"))
 
     @classmethod
     def validate(cls):
@@ -0,0 +1,87 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+
+/// Gas-optimized variant of SubmissionRegistry: the content hash is stored as a
+/// bytes32 digest, submitter/timestamp/MIME code/format tag share one slot and
+/// the URI is only emitted in the event. The format tag records how the content
+/// hash was written (hex digest, CIDv0 or raw CIDv1) so it reads back unchanged.
+contract CompactSubmissionRegistry is Ownable {
+    struct Submission {
+        bytes32 contentDigest;
+        address submitter;
+        uint64 timestamp;
+        uint16 mimeCode;
+        uint8 contentFormat;
+    }
+
+    mapping(uint256 => Submission) public submissions;
+    uint256 public submissionCount;
+
+    // MIME registry table (code 0 is reserved for "unknown")
+    mapping(uint16 => string) public mimeTypes;
+    mapping(bytes32 => uint16) public mimeCodes;
+    uint16 public mimeTypeCount;
+
+    event MimeTypeRegistered(uint16 indexed code, string mime);
+
+    event SubmissionRegistered(
+        uint256 indexed id,
+        address indexed submitter,
+        bytes32 contentDigest,
+        uint8 contentFormat,
+        string uri,
+        uint16 mimeCode,
+        uint64 timestamp
+    );
+
+    constructor() Ownable(msg.sender) {}
+
+    function registerMimeType(string calldata mime) external onlyOwner returns (uint16) {
+        bytes32 key = keccak256(bytes(mime));
+        require(mimeCodes[key] == 0, "MIME type already registered");
+
+        uint16 code = ++mimeTypeCount;
+        mimeTypes[code] = mime;
+        mimeCodes[key] = code;
+
+        emit MimeTypeRegistered(code, mime);
+        return code;
+    }
+
+    function registerSubmission(
+        bytes32 contentDigest,
+        uint8 contentFormat,
+        string calldata uri,
+        uint16 mimeCode
+    ) external returns (uint256) {
+        require(mimeCode != 0 && mimeCode <= mimeTypeCount, "Unknown MIME type");
+        uint256 submissionId = submissionCount++;
+
+        submissions[submissionId] = Submission({
+            contentDigest: contentDigest,
+            submitter: msg.sender,
+            timestamp: uint64(block.timestamp),
+            mimeCode: mimeCode,
+            contentFormat: contentFormat
+        });
+
+        emit SubmissionRegistered(
+            submissionId,
+            msg.sender,
+            contentDigest,
+            contentFormat,
+            uri,
+            mimeCode,
+            uint64(block.timestamp)
+        );
+
+        return submissionId;
+    }
+
+    function getSubmission(uint256 id) external view returns (Submission memory) {
+        require(id < submissionCount, "Submission does not exist");
+        return submissions[id];
+    }
+}
@@ -1,7 +1,12 @@
 // SPDX-License-Identifier: MIT
 pragma solidity ^0.8.20;
 
-contract SubmissionRegistry {
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+import "@openzeppelin/contracts/utils/cryptography/EIP712.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+
+contract SubmissionRegistry is EIP712, Ownable {
     struct Submission {
         address submitter;
         string contentHash;
@@ -10,9 +15,45 @@ contract SubmissionRegistry {
         uint256 timestamp;
     }
 
+    // A submission signed off-chain by its submitter and sent by a relayer
+    struct SignedSubmission {
+        address submitter;
+        string contentHash;
+        string uri;
+        string mime;
+        uint256 nonce;
+        uint256 deadline;
+        bytes signature;
+    }
+
+    struct Batch {
+        bytes32 root;
+        uint256 count;
+        address anchoredBy;
+        uint256 timestamp;
+    }
+
     mapping(uint256 => Submission) public submissions;
     uint256 public submissionCount;
 
+    // Merkle roots of off-chain submission batches
+    mapping(uint256 => Batch) public batches;
+    uint256 public batchCount;
+    // Leaves covered by all batches; each batch starts where the previous one ended
+    uint256 public anchoredCount;
+
+    bytes32 public constant SUBMISSION_TYPEHASH = keccak256(
+        "Submission(address submitter,string contentHash,string uri,string mime,uint256 nonce,uint256 deadline)"
+    );
+
+    // Unordered nonces: one bit per nonce, so signed submissions can be relayed in any order
+    mapping(address => mapping(uint256 => uint256)) public nonceBitmap;
+
+    // Reasons a relayed submission is skipped
+    uint8 public constant SKIP_EXPIRED = 1;
+    uint8 public constant SKIP_NONCE_USED = 2;
+    uint8 public constant SKIP_BAD_SIGNATURE = 3;
+
     event SubmissionRegistered(
         uint256 indexed id,
         address indexed submitter,
@@ -22,15 +63,67 @@ contract SubmissionRegistry {
         uint256 timestamp
     );
 
+    event RelayedSubmissionSkipped(
+        uint256 indexed index,
+        address indexed submitter,
+        uint256 nonce,
+        uint8 reason
+    );
+
+    event BatchAnchored(
+        uint256 indexed batchId,
+        bytes32 root,
+        uint256 indexed firstIndex,
+        uint256 count,
+        address indexed anchoredBy,
+        uint256 timestamp
+    );
+
+    constructor() EIP712("SubmissionRegistry", "1") Ownable(msg.sender) {}
+
     function registerSubmission(
         string memory contentHash,
         string memory uri,
         string memory mime
     ) external returns (uint256) {
+        return _register(msg.sender, contentHash, uri, mime);
+    }
+
+    /// @notice Register submissions signed by their submitters (EIP-712)
+    /// @dev Expired, replayed or badly signed entries are skipped with a
+    /// RelayedSubmissionSkipped event, so one bad entry does not revert the batch
+    function registerSubmissionsFor(SignedSubmission[] calldata items) external returns (uint256 registered) {
+        for (uint256 i = 0; i < items.length; i++) {
+            SignedSubmission calldata item = items[i];
+            uint8 reason = _checkSigned(item);
+            if (reason != 0) {
+                emit RelayedSubmissionSkipped(i, item.submitter, item.nonce, reason);
+                continue;
+            }
+            nonceBitmap[item.submitter][item.nonce >> 8] |= 1 << (item.nonce & 0xff);
+            _register(item.submitter, item.contentHash, item.uri, item.mime);
+            registered++;
+        }
+    }
+
+    function isNonceUsed(address submitter, uint256 nonce) public view returns (bool) {
+        return nonceBitmap[submitter][nonce >> 8] & (1 << (nonce & 0xff)) != 0;
+    }
+
+    function domainSeparator() external view returns (bytes32) {
+        return _domainSeparatorV4();
+    }
+
+    function _register(
+        address submitter,
+        string memory contentHash,
+        string memory uri,
+        string memory mime
+    ) internal returns (uint256) {
         uint256 submissionId = submissionCount++;
 
         submissions[submissionId] = Submission({
-            submitter: msg.sender,
+            submitter: submitter,
             contentHash: contentHash,
             uri: uri,
             mime: mime,
@@ -39,7 +132,7 @@ contract SubmissionRegistry {
 
         emit SubmissionRegistered(
             submissionId,
-            msg.sender,
+            submitter,
             contentHash,
             uri,
             mime,
@@ -49,8 +142,73 @@ contract SubmissionRegistry {
         return submissionId;
     }
 
+    function _checkSigned(SignedSubmission calldata item) internal view returns (uint8) {
+        if (block.timestamp > item.deadline) {
+            return SKIP_EXPIRED;
+        }
+        if (isNonceUsed(item.submitter, item.nonce)) {
+            return SKIP_NONCE_USED;
+        }
+
+        bytes32 digest = _hashTypedDataV4(keccak256(abi.encode(
+            SUBMISSION_TYPEHASH,
+            item.submitter,
+            keccak256(bytes(item.contentHash)),
+            keccak256(bytes(item.uri)),
+            keccak256(bytes(item.mime)),
+            item.nonce,
+            item.deadline
+        )));
+        (address signer, ECDSA.RecoverError error, ) = ECDSA.tryRecover(digest, item.signature);
+        if (error != ECDSA.RecoverError.NoError || signer != item.submitter) {
+            return SKIP_BAD_SIGNATURE;
+        }
+        return 0;
+    }
+
     function getSubmission(uint256 id) external view returns (Submission memory) {
         require(id < submissionCount, "Submission does not exist");
         return submissions[id];
     }
+
+    // Only the API's account anchors, so a root cannot be made to cover forged leaves.
+    // firstIndex must equal anchoredCount, so resending a batch after a crash reverts
+    // instead of anchoring the same leaves twice.
+    function anchorBatch(bytes32 root, uint256 firstIndex, uint256 count) external onlyOwner returns (uint256) {
+        require(root != bytes32(0), "Empty root");
+        require(count > 0, "Empty batch");
+        require(firstIndex == anchoredCount, "Batch does not start at anchoredCount");
+        anchoredCount = firstIndex + count;
+        uint256 batchId = batchCount++;
+
+        batches[batchId] = Batch({
+            root: root,
+            count: count,
+            anchoredBy: msg.sender,
+            timestamp: block.timestamp
+        });
+
+        emit BatchAnchored(batchId, root, firstIndex, count, msg.sender, block.timestamp);
+
+        return batchId;
+    }
+
+    function submissionLeaf(
+        address submitter,
+        string calldata contentHash,
+        string calldata uri,
+        string calldata mime,
+        uint256 timestamp
+    ) public pure returns (bytes32) {
+        return keccak256(bytes.concat(keccak256(abi.encode(submitter, contentHash, uri, mime, timestamp))));
+    }
+
+    function verifyInclusion(
+        uint256 batchId,
+        bytes32 leaf,
+        bytes32[] calldata proof
+    ) external view returns (bool) {
+        require(batchId < batchCount, "Batch does not exist");
+        return MerkleProof.verifyCalldata(proof, batches[batchId].root, leaf);
+    }
 }
\ No newline at end of file
@@ -4,25 +4,58 @@ FastAPI server for blockchain submission POC
 Integrates with deployed smart contracts via blockchain_client.py
 """
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional, List
-import uvicorn
+from typing import Optional, List, Union
+import asyncio
 import os
 import sys
+import time
 
 # Add scripts directory to path to import blockchain_client
 sys.path.append('scripts')
 
 try:
+    from web3 import Web3
+    from web3.exceptions import TransactionNotFound
     from blockchain_client import BlockchainClient
+    from bounty_analytics import BountyAnalytics, BountyEventIngestor
+    from chain_head import HeadUnavailable, WaitPolicy
+    from content_codec import encode_content_hash
+    from content_store import ContentStore, MultipartFileReader, UploadTooLarge
+    from merkle_anchor import AnchorStore, SubmissionAnchorer, format_anchor_id, parse_anchor_id
+    from idempotency import IdempotencyMiddleware
+    from idempotency_store import IdempotencyStore, current_request
+    from payout_workflow import PayoutWorkflows, WorkflowStore
+    from preflight import Preflight, PreflightRejected
+    from submission_export import SubmissionExporter, INCLUDE_OPTIONS
+    from submission_relay import SubmissionRelayer, SKIP_REASONS
+    from tx_coordination import LeaderLock
+    from tx_scheduler import TransactionScheduler, SchedulerSaturated, parse_lane_limits
     from config.blockchain_config import BlockchainConfig
 except ImportError as e:
     print(f"Error importing blockchain modules: {e}")
     print("Make sure contracts are deployed and deployments/addresses.json exists")
     sys.exit(1)
 
+if __name__ == "__main__":
+    # `python main.py` hands over to the uvicorn CLI before anything is initialized: run
+    # here, this module would be set up again as "main" (and as "__mp_main__" in spawned
+    # workers), building second clients and outboxes and holding the leader lock in the
+    # master. Auto-reload only works with a single worker.
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", BlockchainConfig.API_HOST,
+        "--port", str(BlockchainConfig.API_PORT),
+        "--workers", str(BlockchainConfig.API_WORKERS)
+    ]
+    if BlockchainConfig.DEBUG and BlockchainConfig.API_WORKERS == 1:
+        command.append("--reload")
+    os.execv(sys.executable, command)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Blockchain Submission POC API",
@@ -30,6 +63,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Add Idempotency-Key support for POST endpoints
+idempotency_store = IdempotencyStore(
+    BlockchainConfig.IDEMPOTENCY_DB_PATH,
+    ttl_seconds=BlockchainConfig.IDEMPOTENCY_TTL_HOURS * 3600,
+    lease_seconds=BlockchainConfig.IDEMPOTENCY_LEASE_SECONDS
+)
+# Upload bodies stream through unbuffered; the handler binds the key to the file's digest
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store, streaming_paths=("/submissions/upload",))
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -47,6 +89,158 @@ except Exception as e:
     print(f"❌ Failed to initialize blockchain client: {e}")
     blockchain_client = None
 
+# Initialize admission control for outgoing transactions
+tx_scheduler = TransactionScheduler(
+    max_concurrency=BlockchainConfig.TX_MAX_CONCURRENCY,
+    queue_depth=BlockchainConfig.TX_QUEUE_DEPTH,
+    lane_limits=parse_lane_limits(BlockchainConfig.TX_LANE_LIMITS)
+)
+
+def too_many_requests(e: SchedulerSaturated):
+    """429 response for a saturated transaction queue"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def parse_wait(value: Optional[str]) -> WaitPolicy:
+    """Parse the ?wait= confirmation policy of a write endpoint"""
+    try:
+        return WaitPolicy.parse(value or BlockchainConfig.TX_DEFAULT_WAIT)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+async def read_block(block: Optional[int], at: Optional[str]) -> int:
+    """Block number a read endpoint is pinned to (?block=N or ?at=latest|safe|finalized)"""
+    if block is not None and at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Use either block or at, not both"
+        )
+    try:
+        # Polls the node while the tracker has no reading yet
+        return await run_in_threadpool(blockchain_client.head.resolve, block, at)
+    except HeadUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+def lane_policy(policy: WaitPolicy) -> WaitPolicy:
+    """Policy used while holding a transaction lane
+
+    Confirmations and finality are awaited after the lane is released, so
+    long waits do not block other writes.
+    """
+    return WaitPolicy("receipt") if policy.waits_for_receipt else policy
+
+# Background jobs run in a single elected worker when several are serving
+leader_lock = LeaderLock(BlockchainConfig.LEADER_LOCK_PATH)
+
+# Initialize Merkle anchoring of buffered submissions
+submission_anchorer = None
+if blockchain_client and BlockchainConfig.ANCHOR_MODE:
+    if BlockchainConfig.TX_COORDINATION == "shared":
+        # The anchor log assigns leaf indexes inside one process
+        raise RuntimeError("ANCHOR_MODE requires a single API worker (TX_COORDINATION=local)")
+    submission_anchorer = SubmissionAnchorer(
+        blockchain_client,
+        AnchorStore(BlockchainConfig.ANCHOR_DATA_DIR),
+        BlockchainConfig.ANCHOR_BATCH_SIZE,
+        BlockchainConfig.ANCHOR_WINDOW_SECONDS
+    )
+    submission_anchorer.start()
+    print(f"✅ Anchoring mode enabled ({submission_anchorer.pending_count} pending submissions)")
+
+# Initialize bounty/payout analytics ingestion
+bounty_analytics = None
+if blockchain_client and BlockchainConfig.ANALYTICS_ENABLED:
+    bounty_analytics = BountyAnalytics(
+        BlockchainConfig.ANALYTICS_DB_PATH,
+        reorg_depth=BlockchainConfig.ANALYTICS_REORG_DEPTH
+    )
+    bounty_ingestor = BountyEventIngestor(
+        blockchain_client,
+        bounty_analytics,
+        start_block=BlockchainConfig.ANALYTICS_START_BLOCK,
+        confirmations=BlockchainConfig.ANALYTICS_CONFIRMATIONS,
+        chunk_size=BlockchainConfig.ANALYTICS_CHUNK_SIZE
+    )
+    # Every worker reads the store; only the leader writes to it
+    leader_lock.run_when_leader(bounty_ingestor.start)
+
+# Initialize pre-flight checks of writes
+preflight = None
+if blockchain_client and BlockchainConfig.PREFLIGHT_ENABLED:
+    preflight = Preflight(blockchain_client, bounty_analytics, simulate=BlockchainConfig.PREFLIGHT_SIMULATE)
+    if not bounty_analytics:
+        print("⚠️ Pre-flight mirror checks are off: ANALYTICS_ENABLED=false leaves no state mirror"
+              + ("" if BlockchainConfig.PREFLIGHT_SIMULATE else "; only input checks run"))
+
+async def run_preflight(check: str, *args):
+    """Reject a write that would revert before it takes a transaction lane"""
+    if not preflight:
+        return
+    try:
+        await run_in_threadpool(getattr(preflight, check), *args)
+    except PreflightRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT if e.conflict else status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Transaction would revert: {e.reason}"
+        )
+
+# Initialize the pipelined submission-payout workflow
+payout_workflows = None
+if blockchain_client:
+    payout_workflows = PayoutWorkflows(blockchain_client, WorkflowStore(BlockchainConfig.WORKFLOW_DB_PATH))
+
+# Initialize the bulk NDJSON export
+submission_exporter = None
+if blockchain_client:
+    submission_exporter = SubmissionExporter(
+        blockchain_client,
+        chunk_size=BlockchainConfig.EXPORT_CHUNK_SIZE,
+        in_flight=BlockchainConfig.EXPORT_CHUNKS_IN_FLIGHT
+    )
+
+# Initialize the content-addressed store of uploaded files
+content_store = None
+if blockchain_client:
+    content_store = ContentStore(
+        BlockchainConfig.CONTENT_STORE_PATH,
+        BlockchainConfig.CONTENT_INDEX_DB_PATH,
+        max_bytes=BlockchainConfig.UPLOAD_MAX_BYTES
+    )
+
+# Initialize relaying of EIP-712 signed submissions (standard registry only)
+submission_relayer = None
+if blockchain_client and not blockchain_client.compact_registry:
+    submission_relayer = SubmissionRelayer(
+        blockchain_client,
+        max_batch_gas=BlockchainConfig.RELAY_MAX_BATCH_GAS,
+        verify_workers=BlockchainConfig.RELAY_VERIFY_WORKERS
+    )
+
+if blockchain_client and BlockchainConfig.TX_COORDINATION == "shared":
+    leader_lock.run_when_leader(
+        lambda: blockchain_client.start_nonce_recovery(BlockchainConfig.NONCE_GAP_TIMEOUT / 2)
+    )
+elif blockchain_client:
+    # Transactions a previous run signed but never saw mined
+    try:
+        blockchain_client.recover_outbox()
+    except Exception as e:
+        print(f"⚠️ Outbox recovery failed: {e}")
+
 # Pydantic models for request/response
 class SubmissionCreate(BaseModel):
     content_hash: str
@@ -62,6 +256,59 @@ class SubmissionResponse(BaseModel):
     mime_type: str
     timestamp: int
 
+class AnchoredSubmissionResponse(BaseModel):
+    anchor_id: str  # "anchor-<leaf index>" in the local anchor log; not an on-chain submission ID
+    submitter: str
+    content_hash: str
+    uri: str
+    mime_type: str
+    timestamp: int
+    leaf: str
+    status: str
+
+class PendingTransactionResponse(BaseModel):
+    transaction_hash: str
+    nonce: Optional[int]
+    wait: str
+    status: str  # "signed" (broadcast queued) or "pending" (accepted by the node)
+
+def pending_response(pending, policy: WaitPolicy) -> PendingTransactionResponse:
+    return PendingTransactionResponse(
+        transaction_hash=pending.tx_hash.hex(),
+        nonce=pending.nonce,
+        wait=str(policy),
+        status="signed" if policy.mode == "none" else "pending"
+    )
+
+class UploadResponse(BaseModel):
+    sha256: str
+    content_hash: str  # CIDv1 (raw codec) of the whole file
+    uri: str
+    mime_type: str
+    size: int
+    deduplicated: bool  # The bytes were already in the content store
+    duplicate: bool  # Already registered; no transaction was sent for this upload
+    submission_id: Optional[int]
+    transaction_hash: Optional[str]
+    anchor_id: Optional[str] = None  # Set instead of submission_id in anchoring mode
+    status: str  # "registered", "signed", "pending" or "anchored"
+
+def upload_response(record, submission_id, transaction_hash, status: str, duplicate: bool,
+                    anchor_id: str = None) -> UploadResponse:
+    return UploadResponse(
+        sha256=record["sha256"],
+        content_hash=record["cid"],
+        uri=f"ipfs://{record['cid']}",
+        mime_type=record["mime_type"],
+        size=record["size"],
+        deduplicated=record.get("deduplicated", True),
+        duplicate=duplicate,
+        submission_id=submission_id,
+        transaction_hash=transaction_hash,
+        anchor_id=anchor_id,
+        status=status
+    )
+
 class VerificationCreate(BaseModel):
     submission_id: int
     accepted: bool
@@ -88,6 +335,26 @@ class ClaimPayout(BaseModel):
     submission_id: int
     recipient: str
 
+class SignedSubmissionCreate(BaseModel):
+    submitter: str
+    content_hash: str
+    uri: str
+    mime_type: str
+    nonce: int
+    deadline: int  # Unix time after which the signature is no longer accepted
+    signature: str  # EIP-712 signature by the submitter (see GET /relay/domain)
+
+class RelaySubmissionsCreate(BaseModel):
+    submissions: List[SignedSubmissionCreate]
+
+class SubmissionPayoutCreate(BaseModel):
+    content_hash: str
+    uri: str
+    mime_type: str
+    recipient: str
+    amount: int  # Payout in token units
+    reason_code: int = 0
+
 @app.get("/")
 async def root():
     return {
@@ -105,13 +372,36 @@ async def health_check():
         )
 
     try:
-        # Test blockchain connection
-        is_connected = blockchain_client.w3.is_connected()
+        # Probe every RPC endpoint; writes need the primary, reads need any
+        probes = await run_in_threadpool(blockchain_client.rpc.probe)
+        primary_connected = probes[0]["error"] is None
+        reads_available = any(probe["error"] is None for probe in probes)
+
+        routing = blockchain_client.rpc.snapshot()
+        for endpoint, probe in zip(routing["endpoints"], probes):
+            endpoint["block_number"] = probe["block_number"]
+            endpoint["error"] = probe["error"]
+
+        if primary_connected:
+            health_status = "healthy"
+        elif reads_available:
+            health_status = "degraded"
+        else:
+            health_status = "unhealthy"
+
         return {
-            "status": "healthy" if is_connected else "unhealthy",
-            "blockchain_connected": is_connected,
+            "status": health_status,
+            "blockchain_connected": primary_connected,
             "network": BlockchainConfig.NETWORK,
-            "account": blockchain_client.account.address
+            "account": blockchain_client.account.address,
+            "chain_head": blockchain_client.head.snapshot(),
+            "read_cache": blockchain_client.reads.snapshot(),
+            "rpc": routing,
+            "worker": {
+                "pid": os.getpid(),
+                "leader": leader_lock.is_leader,
+                "tx_coordination": BlockchainConfig.TX_COORDINATION
+            }
         }
     except Exception as e:
         raise HTTPException(
@@ -119,8 +409,82 @@ async def health_check():
             detail=f"Blockchain connection error: {str(e)}"
         )
 
-@app.post("/submissions", response_model=SubmissionResponse)
-async def create_submission(submission: SubmissionCreate):
+@app.get("/metrics/scheduler")
+async def scheduler_metrics():
+    """Transaction queue depth and wait-time metrics"""
+    return tx_scheduler.snapshot()
+
+@app.get("/metrics/gas")
+async def gas_metrics(function: Optional[str] = None, since: Optional[float] = None):
+    """Gas used and fees paid per contract function and calldata size
+
+    since is a unix timestamp; only transactions mined after it are counted.
+    """
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    return await run_in_threadpool(blockchain_client.gas_ledger.summary, function, since)
+
+@app.get("/transactions/pending")
+async def get_pending_transactions():
+    """Transactions sent by this server that are not mined yet"""
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    return {"pending": blockchain_client.supervisor.pending_snapshot()}
+
+@app.get("/transactions/outbox")
+async def get_outbox(state: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """Recent write intents with their state transitions (queued, signed, sent, mined, failed, replaced)"""
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    outbox = blockchain_client.outbox
+    return {
+        "counts": await run_in_threadpool(outbox.counts),
+        "entries": await run_in_threadpool(outbox.entries, state, limit)
+    }
+
+@app.post("/transactions/{nonce}/cancel")
+async def cancel_transaction(nonce: int):
+    """Cancel a pending transaction by replacing it with a self-transfer"""
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    try:
+        cancel_hash = await run_in_threadpool(blockchain_client.supervisor.cancel, nonce)
+
+        return {
+            "nonce": nonce,
+            "transaction_hash": cancel_hash.hex(),
+            "status": "cancelling"
+        }
+
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No pending transaction with nonce {nonce}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to cancel transaction: {str(e)}"
+        )
+
+@app.post("/submissions", response_model=Union[SubmissionResponse, AnchoredSubmissionResponse, PendingTransactionResponse])
+async def create_submission(submission: SubmissionCreate, wait: Optional[str] = None):
     """Register a new submission on the blockchain"""
     if not blockchain_client:
         raise HTTPException(
@@ -128,16 +492,50 @@ async def create_submission(submission: SubmissionCreate):
             detail="Blockchain client not available"
         )
 
+    policy = parse_wait(wait)
+
+    if submission_anchorer:
+        # Buffer off-chain; only the batch Merkle root is committed, so there is nothing to wait for
+        submitter = blockchain_client.account.address
+        timestamp = int(time.time())
+        index, leaf = await run_in_threadpool(
+            submission_anchorer.add,
+            submitter,
+            submission.content_hash,
+            submission.uri,
+            submission.mime_type,
+            timestamp
+        )
+
+        return AnchoredSubmissionResponse(
+            anchor_id=format_anchor_id(index),
+            submitter=submitter,
+            content_hash=submission.content_hash,
+            uri=submission.uri,
+            mime_type=submission.mime_type,
+            timestamp=timestamp,
+            leaf="0x" + leaf.hex(),
+            status="pending"
+        )
+
     try:
         # Register submission on blockchain
-        submission_id, receipt = blockchain_client.register_submission(
+        submission_id, receipt = await tx_scheduler.run(
+            "submission",
+            blockchain_client.register_submission,
             submission.content_hash,
             submission.uri,
-            submission.mime_type
+            submission.mime_type,
+            wait=lane_policy(policy)
         )
+        if not policy.waits_for_receipt:
+            return pending_response(receipt, policy)
+        receipt = await run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy)
 
-        # Get submission details for response
-        submission_data = blockchain_client.get_submission(submission_id)
+        # Read at the receipt's block: "latest" on a replica that is behind would not have it yet
+        submission_data = await run_in_threadpool(
+            blockchain_client.get_submission, submission_id, receipt.blockNumber
+        )
 
         return SubmissionResponse(
             submission_id=submission_id,
@@ -149,41 +547,556 @@ async def create_submission(submission: SubmissionCreate):
             timestamp=submission_data[4]
         )
 
+    except SchedulerSaturated as e:
+        raise too_many_requests(e)
+    except ValueError as e:
+        # Content hash cannot be encoded for the compact registry
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid submission: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create submission: {str(e)}"
         )
 
-@app.get("/submissions/{submission_id}")
-async def get_submission(submission_id: int):
-    """Get submission details by ID"""
-    if not blockchain_client:
+def resolve_upload(digest: bytes, record):
+    """Resolve the submission of an upload whose transaction was sent without waiting
+
+    Returns None when no transaction will register it any more (reverted,
+    rejected before broadcast, its nonce taken by another transaction, or
+    unknown to the outbox and the node); the registration is released so
+    the caller sends it again.
+    """
+    if record["submission_id"] is not None or not record["transaction_hash"]:
+        return record
+    try:
+        receipt = blockchain_client.w3.eth.get_transaction_receipt(record["transaction_hash"])
+    except TransactionNotFound:
+        entry = blockchain_client.outbox.lookup(bytes.fromhex(record["transaction_hash"][2:]))
+        if entry is None:
+            try:
+                blockchain_client.w3.eth.get_transaction(record["transaction_hash"])
+                return record
+            except TransactionNotFound:
+                content_store.release(digest)
+                return None
+        if entry["state"] in ("failed", "replaced"):
+            content_store.release(digest)
+            return None
+        if entry["state"] != "mined":
+            # Queued, signed or sent: still supervised
+            return record
+        # Mined under a fee-bumped hash
+        receipt = blockchain_client.w3.eth.get_transaction_receipt(entry["transaction_hash"])
+    if receipt.status != 1:
+        content_store.release(digest)
+        return None
+    content_store.registered(
+        digest, int(receipt.logs[0]['topics'][1].hex(), 16), "0x" + bytes(receipt.transactionHash).hex()
+    )
+    return content_store.get(digest)
+
+@app.post("/submissions/upload", response_model=UploadResponse)
+async def upload_submission(request: Request, mime_type: Optional[str] = None, wait: Optional[str] = None):
+    """Store an uploaded file and register it as a submission
+
+    The body is either multipart/form-data with a "file" part or the raw
+    file. It is hashed and spooled to disk as it arrives, so its size is
+    not limited by memory. The content hash is the CIDv1 of the file's
+    SHA-256; bytes that were already registered return the existing
+    submission without sending a transaction.
+    """
+    if not content_store:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Blockchain client not available"
         )
 
+    policy = parse_wait(wait)
+
+    content_type = request.headers.get("content-type", "")
+    writer = content_store.writer()
+    reader = None
     try:
-        submission_data = blockchain_client.get_submission(submission_id)
+        if content_type.startswith("multipart/form-data"):
+            reader = MultipartFileReader(content_type, writer)
+        feed = reader.feed if reader else writer.write
 
-        return {
-            "submission_id": submission_id,
-            "submitter": submission_data[0],
-            "content_hash": submission_data[1],
-            "uri": submission_data[2],
-            "mime_type": submission_data[3],
-            "timestamp": submission_data[4]
+        # Hash and write in fixed-size blocks, off the event loop
+        block = bytearray()
+        async for chunk in request.stream():
+            block += chunk
+            if len(block) >= BlockchainConfig.UPLOAD_CHUNK_SIZE:
+                await run_in_threadpool(feed, bytes(block))
+                block.clear()
+        if block:
+            await run_in_threadpool(feed, bytes(block))
+
+        if reader:
+            reader.finish()
+            mime = mime_type or reader.fields.get("mime_type") or reader.file_content_type
+        else:
+            # Media type only; parameters such as "; charset=utf-8" are not part of it
+            mime = mime_type or content_type.split(";")[0].strip()
+        record = await run_in_threadpool(writer.commit, mime or "application/octet-stream")
+    except UploadTooLarge as e:
+        writer.abort()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        writer.abort()
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid upload: {str(e)}"
+        )
+    except Exception as e:
+        writer.abort()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to store upload: {str(e)}"
+        )
+
+    request_key = current_request.get()
+    if request_key:
+        # Replays a completed Idempotency-Key, or rejects one used for other content
+        await run_in_threadpool(request_key.check_content, record["sha256"])
+
+    digest = bytes.fromhex(record["sha256"])
+    uri = f"ipfs://{record['cid']}"
+    while True:
+        state, indexed = await run_in_threadpool(
+            content_store.claim_registration, digest, record["size"], record["mime_type"]
+        )
+        # Content uploaded before keeps the MIME type it was first indexed with
+        record["mime_type"] = indexed["mime_type"]
+        if state == "in_progress":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This content is being registered by another request"
+            )
+        if state == "claimed":
+            break
+        indexed = await run_in_threadpool(resolve_upload, digest, indexed)
+        if indexed is None:
+            # The earlier registration reverted; send it again
+            continue
+        if indexed["anchor_id"]:
+            status_text = "anchored"
+        else:
+            status_text = "pending" if indexed["submission_id"] is None else "registered"
+        return upload_response(record, indexed["submission_id"], indexed["transaction_hash"], status_text,
+                               duplicate=True, anchor_id=indexed["anchor_id"])
+
+    try:
+        if submission_anchorer:
+            index, _ = await run_in_threadpool(
+                submission_anchorer.add,
+                blockchain_client.account.address,
+                record["cid"],
+                uri,
+                record["mime_type"],
+                int(time.time())
+            )
+            anchor_id = format_anchor_id(index)
+            await run_in_threadpool(content_store.registered, digest, anchor_id=anchor_id)
+            return upload_response(record, None, None, "anchored", duplicate=False, anchor_id=anchor_id)
+
+        submission_id, receipt = await tx_scheduler.run(
+            "submission",
+            blockchain_client.register_submission,
+            record["cid"],
+            uri,
+            record["mime_type"],
+            wait=lane_policy(policy)
+        )
+        if not policy.waits_for_receipt:
+            transaction_hash = "0x" + bytes(receipt.tx_hash).hex()
+            await run_in_threadpool(content_store.registered, digest, None, transaction_hash)
+            return upload_response(record, None, transaction_hash,
+                                   "signed" if policy.mode == "none" else "pending", duplicate=False)
+
+        transaction_hash = "0x" + bytes(receipt.transactionHash).hex()
+        await run_in_threadpool(content_store.registered, digest, submission_id, transaction_hash)
+
+    except SchedulerSaturated as e:
+        await run_in_threadpool(content_store.release, digest)
+        raise too_many_requests(e)
+    except Exception as e:
+        await run_in_threadpool(content_store.release, digest)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to register upload: {str(e)}"
+        )
+
+    try:
+        # The submission is indexed already; a retry after a failed wait returns it as a duplicate
+        await run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to register upload: {str(e)}"
+        )
+    return upload_response(record, submission_id, transaction_hash, "registered", duplicate=False)
+
+@app.get("/content/{content_hash}")
+async def get_content(content_hash: str):
+    """Download a stored file by its CID or SHA-256"""
+    if not content_store:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    try:
+        digest = encode_content_hash(content_hash)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    record = await run_in_threadpool(content_store.get, digest)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Content not found"
+        )
+    return FileResponse(content_store.path(digest), media_type=record["mime_type"])
+
+@app.get("/relay/domain")
+async def get_relay_domain():
+    """EIP-712 domain and types to sign relayed submissions with"""
+    if not submission_relayer:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Relayer not available (requires SUBMISSION_REGISTRY_MODE=standard)"
+        )
+    return submission_relayer.typed_data()
+
+@app.post("/relay/submissions")
+async def relay_submissions(relay: RelaySubmissionsCreate, wait: Optional[str] = None):
+    """Register submissions signed by their submitters, paying the gas for them
+
+    Signatures, deadlines and nonces are checked before sending; rejected
+    entries cost nothing. The others are sent in batches bounded by
+    RELAY_MAX_BATCH_GAS, each one registerSubmissionsFor transaction.
+    """
+    if not submission_relayer:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Relayer not available (requires SUBMISSION_REGISTRY_MODE=standard)"
+        )
+
+    policy = parse_wait(wait)
+    if len(relay.submissions) > BlockchainConfig.RELAY_MAX_SUBMISSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BlockchainConfig.RELAY_MAX_SUBMISSIONS} submissions per request"
+        )
+    for submission in relay.submissions:
+        if not Web3.is_address(submission.submitter):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid submitter address: {submission.submitter}"
+            )
+        if submission.nonce < 0 or submission.deadline < 0:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="nonce and deadline must be non-negative"
+            )
+    items = [
+        dict(submission.model_dump(), submitter=Web3.to_checksum_address(submission.submitter))
+        for submission in relay.submissions
+    ]
+
+    try:
+        reasons = await run_in_threadpool(submission_relayer.verify, items)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to verify submissions: {str(e)}"
+        )
+
+    results = [
+        {
+            "index": index,
+            "submitter": item["submitter"],
+            "nonce": item["nonce"],
+            "status": "rejected" if reason else "queued",
+            "reason": reason,
+            "submission_id": None,
+            "transaction_hash": None
         }
+        for index, (item, reason) in enumerate(zip(items, reasons))
+    ]
+    accepted = [index for index, reason in enumerate(reasons) if reason is None]
+    batches = submission_relayer.batches([items[index] for index in accepted])
+
+    # Batches run concurrently; fixed steps keep each one's transactions apart on a retry
+    request = current_request.get()
+    first_step = request.reserve_steps(len(batches)) if request else None
+    try:
+        sent = await asyncio.gather(*(
+            tx_scheduler.run(
+                "submission",
+                blockchain_client.register_submissions_for,
+                batch,
+                gas,
+                wait=lane_policy(policy),
+                step=first_step + position if request else None
+            )
+            for position, (batch, gas) in enumerate(batches)
+        ), return_exceptions=True)
+    except BaseException:
+        submission_relayer.release([items[index] for index in accepted])
+        raise
+
+    # Entries stay reserved until their batch is mined; then the contract's nonce bitmap guards them
+    for (batch, _), outcome in zip(batches, sent):
+        if not isinstance(outcome, Exception) and outcome[0] is None:
+            outcome[1].receipt_future.add_done_callback(lambda _, batch=batch: submission_relayer.release(batch))
+        else:
+            submission_relayer.release(batch)
+
+    if sent and all(isinstance(outcome, SchedulerSaturated) for outcome in sent):
+        raise too_many_requests(sent[0])
+
+    positions = iter(accepted)
+    receipts = []
+    for (batch, _), outcome in zip(batches, sent):
+        indexes = [next(positions) for _ in batch]
+        if isinstance(outcome, Exception):
+            for index in indexes:
+                results[index].update(status="failed", reason=str(outcome))
+            continue
+
+        outcomes, receipt = outcome
+        if outcomes is None:
+            for index in indexes:
+                results[index].update(
+                    status="signed" if policy.mode == "none" else "pending",
+                    transaction_hash="0x" + bytes(receipt.tx_hash).hex()
+                )
+            continue
+
+        receipts.append(receipt)
+        for index, (submission_id, skip_reason) in zip(indexes, outcomes):
+            results[index].update(
+                status="registered" if skip_reason is None else "skipped",
+                reason=SKIP_REASONS.get(skip_reason) if skip_reason else None,
+                submission_id=submission_id,
+                transaction_hash="0x" + bytes(receipt.transactionHash).hex()
+            )
+
+    try:
+        await asyncio.gather(*(
+            run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy) for receipt in receipts
+        ))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to confirm relayed submissions: {str(e)}"
+        )
+
+    return {
+        "submitted": len(items),
+        "registered": sum(result["status"] == "registered" for result in results),
+        "rejected": sum(result["status"] in ("rejected", "skipped") for result in results),
+        "transactions": len(batches),
+        "results": results
+    }
+
+@app.get("/export/submissions")
+async def export_submissions(
+    from_id: int = Query(0, alias="from", ge=0),
+    to_id: Optional[int] = Query(None, alias="to", ge=0),
+    include: Optional[str] = None,
+    at: str = "safe"
+):
+    """Stream submissions from..to (inclusive) as NDJSON
+
+    include is a comma-separated list of verification and claimable. The
+    export is a snapshot at the tracked safe block when the request arrived
+    (or at=latest/finalized), which is returned in the X-Export-Block header.
+    """
+    if not submission_exporter:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    fields = {field.strip() for field in include.split(",") if field.strip()} if include else set()
+    if to_id is not None and to_id < from_id:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="from must not be greater than to"
+        )
+    unknown = fields - INCLUDE_OPTIONS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown include field(s): {', '.join(sorted(unknown))}"
+        )
+
+    try:
+        block, count = await run_in_threadpool(submission_exporter.snapshot, at)
+    except HeadUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start export: {str(e)}"
+        )
+
+    # IDs past the last registered submission are clipped; an empty range streams nothing
+    last = count - 1 if to_id is None else min(to_id, count - 1)
+
+    # No Content-Length, so the body is sent with chunked transfer encoding
+    return StreamingResponse(
+        submission_exporter.ndjson(from_id, last, fields, block),
+        media_type="application/x-ndjson",
+        headers={"X-Export-Block": str(block), "X-Submission-Count": str(count)}
+    )
+
+@app.get("/submissions/{submission_id}")
+async def get_submission(
+    submission_id: int,
+    block: Optional[int] = Query(None, ge=0),
+    at: Optional[str] = None,
+    include: str = ""
+):
+    """Get submission details by ID
+
+    include=verification,claimable adds those records (null when absent),
+    read at the same block as the submission.
+    """
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    fields = {field.strip() for field in include.split(",") if field.strip()}
+    if fields - INCLUDE_OPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown include fields: {', '.join(sorted(fields - INCLUDE_OPTIONS))}"
+        )
+    block_number = await read_block(block, at)
 
+    try:
+        submission_data = await run_in_threadpool(blockchain_client.get_submission, submission_id, block_number)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Submission not found: {str(e)}"
         )
 
-@app.post("/verifications", response_model=VerificationResponse)
-async def create_verification(verification: VerificationCreate):
+    response = {
+        "submission_id": submission_id,
+        "submitter": submission_data[0],
+        "content_hash": submission_data[1],
+        "uri": submission_data[2],
+        "mime_type": submission_data[3],
+        "timestamp": submission_data[4],
+        "block_number": block_number
+    }
+
+    async def read_optional(read):
+        # The getters revert for records that do not exist
+        try:
+            return await run_in_threadpool(read, submission_id, block_number)
+        except Exception:
+            return None
+
+    if "verification" in fields:
+        verification_data = await read_optional(blockchain_client.get_verification)
+        response["verification"] = {
+            "verifier": verification_data[0],
+            "accepted": verification_data[1],
+            "reason_code": verification_data[2],
+            "timestamp": verification_data[3]
+        } if verification_data else None
+    if "claimable" in fields:
+        claimable_data = await read_optional(blockchain_client.get_claimable)
+        response["claimable"] = {
+            "recipient": claimable_data[0],
+            "amount": claimable_data[1],
+            "amount_usdt": claimable_data[1] / 10**6,
+            "claimed": claimable_data[2]
+        } if claimable_data else None
+    return response
+
+@app.get("/submissions/{anchor_id}/proof")
+async def get_submission_proof(anchor_id: str, verify: bool = False):
+    """Get the Merkle inclusion proof for an anchored submission (anchor-<n>)"""
+    if not submission_anchorer:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Anchoring mode is not enabled"
+        )
+
+    try:
+        index = parse_anchor_id(anchor_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    try:
+        submission = await run_in_threadpool(submission_anchorer.get_submission, index)
+        proof = await run_in_threadpool(submission_anchorer.get_proof, index)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Anchored submission {anchor_id} not found"
+        )
+
+    if proof is None:
+        return {
+            "anchor_id": anchor_id,
+            "status": "pending",
+            "submission": submission
+        }
+
+    response = {
+        "anchor_id": anchor_id,
+        "status": "anchored",
+        "submission": submission,
+        "batch_id": proof["batch_id"],
+        "leaf": "0x" + proof["leaf"].hex(),
+        "leaf_index": proof["leaf_index"],
+        "root": "0x" + proof["root"].hex(),
+        "proof": ["0x" + node.hex() for node in proof["proof"]],
+        "transaction_hash": "0x" + proof["transaction_hash"].hex()
+    }
+
+    if verify:
+        try:
+            response["verified"] = await run_in_threadpool(
+                blockchain_client.verify_inclusion, proof["batch_id"], proof["leaf"], proof["proof"]
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to verify inclusion: {str(e)}"
+            )
+
+    return response
+
+@app.post("/verifications", response_model=Union[VerificationResponse, PendingTransactionResponse])
+async def create_verification(verification: VerificationCreate, wait: Optional[str] = None):
     """Verify a submission (accept/reject)"""
     if not blockchain_client:
         raise HTTPException(
@@ -191,16 +1104,27 @@ async def create_verification(verification: VerificationCreate):
             detail="Blockchain client not available"
         )
 
+    policy = parse_wait(wait)
+    await run_preflight("verification", verification.submission_id, verification.accepted, verification.reason_code)
+
     try:
         # Verify submission on blockchain
-        receipt = blockchain_client.verify_submission(
+        receipt = await tx_scheduler.run(
+            "verification",
+            blockchain_client.verify_submission,
             verification.submission_id,
             verification.accepted,
-            verification.reason_code
+            verification.reason_code,
+            wait=lane_policy(policy)
         )
+        if not policy.waits_for_receipt:
+            return pending_response(receipt, policy)
+        receipt = await run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy)
 
-        # Get verification details for response
-        verification_data = blockchain_client.get_verification(verification.submission_id)
+        # Get verification details for response, as of the receipt's block
+        verification_data = await run_in_threadpool(
+            blockchain_client.get_verification, verification.submission_id, receipt.blockNumber
+        )
 
         return VerificationResponse(
             submission_id=verification.submission_id,
@@ -211,6 +1135,8 @@ async def create_verification(verification: VerificationCreate):
             timestamp=verification_data[3]
         )
 
+    except SchedulerSaturated as e:
+        raise too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -218,7 +1144,7 @@ async def create_verification(verification: VerificationCreate):
         )
 
 @app.get("/verifications/{submission_id}")
-async def get_verification(submission_id: int):
+async def get_verification(submission_id: int, block: Optional[int] = Query(None, ge=0), at: Optional[str] = None):
     """Get verification details for a submission"""
     if not blockchain_client:
         raise HTTPException(
@@ -226,15 +1152,18 @@ async def get_verification(submission_id: int):
             detail="Blockchain client not available"
         )
 
+    block_number = await read_block(block, at)
+
     try:
-        verification_data = blockchain_client.get_verification(submission_id)
+        verification_data = await run_in_threadpool(blockchain_client.get_verification, submission_id, block_number)
 
         return {
             "submission_id": submission_id,
             "verifier": verification_data[0],
             "accepted": verification_data[1],
             "reason_code": verification_data[2],
-            "timestamp": verification_data[3]
+            "timestamp": verification_data[3],
+            "block_number": block_number
         }
 
     except Exception as e:
@@ -244,7 +1173,7 @@ async def get_verification(submission_id: int):
         )
 
 @app.post("/bounties/fund")
-async def fund_bounty(bounty_fund: BountyFund):
+async def fund_bounty(bounty_fund: BountyFund, wait: Optional[str] = None):
     """Fund a bounty pool"""
     if not blockchain_client:
         raise HTTPException(
@@ -252,11 +1181,20 @@ async def fund_bounty(bounty_fund: BountyFund):
             detail="Blockchain client not available"
         )
 
+    policy = parse_wait(wait)
+    await run_preflight("fund_bounty", bounty_fund.bounty_id, bounty_fund.amount)
+
     try:
-        receipt = blockchain_client.fund_bounty(
+        receipt = await tx_scheduler.run(
+            "bounty",
+            blockchain_client.fund_bounty,
             bounty_fund.bounty_id,
-            bounty_fund.amount
+            bounty_fund.amount,
+            wait=lane_policy(policy)
         )
+        if not policy.waits_for_receipt:
+            return pending_response(receipt, policy)
+        receipt = await run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy)
 
         return {
             "bounty_id": bounty_fund.bounty_id,
@@ -266,14 +1204,72 @@ async def fund_bounty(bounty_fund: BountyFund):
             "status": "funded"
         }
 
+    except SchedulerSaturated as e:
+        raise too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fund bounty: {str(e)}"
         )
 
+@app.get("/bounties/summary")
+async def get_bounty_summary():
+    """Total funded, outstanding claimable and paid amounts across all bounties"""
+    if not bounty_analytics:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Bounty analytics not available"
+        )
+
+    summary = await run_in_threadpool(bounty_analytics.summary)
+    for field in ("total_funded", "outstanding_claimable", "total_paid"):
+        summary[f"{field}_usdt"] = summary[field] / 10**6
+    return summary
+
+@app.get("/bounties/{bounty_id}")
+async def get_bounty(bounty_id: int):
+    """Get bounty funding details
+
+    Funded totals come from the analytics aggregates when they are enabled;
+    the remaining funds and funder are only on-chain.
+    """
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    try:
+        bounty_data = await run_in_threadpool(blockchain_client.get_bounty, bounty_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to read bounty: {str(e)}"
+        )
+
+    if bounty_data[0] == 0:
+        # fundBounty requires a non-zero amount, so an unfunded bounty does not exist
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bounty {bounty_id} not found"
+        )
+
+    totals = await run_in_threadpool(bounty_analytics.get_bounty, bounty_id) if bounty_analytics else None
+    # Not indexed yet (or analytics disabled): fall back to the on-chain total
+    total_funds = totals["total_funded"] if totals else bounty_data[0]
+    return {
+        "bounty_id": bounty_id,
+        "funder": bounty_data[2],
+        "total_funds": total_funds,
+        "total_funds_usdt": total_funds / 10**6,
+        "remaining_funds": bounty_data[1],
+        "remaining_funds_usdt": bounty_data[1] / 10**6,
+        "funding_count": totals["funding_count"] if totals else None,
+        "synced_block": bounty_analytics.cursor if totals else None
+    }
+
 @app.post("/payouts/mark-claimable")
-async def mark_claimable(claimable: ClaimableCreate):
+async def mark_claimable(claimable: ClaimableCreate, wait: Optional[str] = None):
     """Mark a submission as claimable for payout"""
     if not blockchain_client:
         raise HTTPException(
@@ -281,12 +1277,21 @@ async def mark_claimable(claimable: ClaimableCreate):
             detail="Blockchain client not available"
         )
 
+    policy = parse_wait(wait)
+    await run_preflight("mark_claimable", claimable.submission_id, claimable.recipient, claimable.amount)
+
     try:
-        receipt = blockchain_client.mark_claimable(
+        receipt = await tx_scheduler.run(
+            "claimable",
+            blockchain_client.mark_claimable,
             claimable.submission_id,
             claimable.recipient,
-            claimable.amount
+            claimable.amount,
+            wait=lane_policy(policy)
         )
+        if not policy.waits_for_receipt:
+            return pending_response(receipt, policy)
+        receipt = await run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy)
 
         return {
             "submission_id": claimable.submission_id,
@@ -297,6 +1302,8 @@ async def mark_claimable(claimable: ClaimableCreate):
             "status": "claimable"
         }
 
+    except SchedulerSaturated as e:
+        raise too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -304,7 +1311,7 @@ async def mark_claimable(claimable: ClaimableCreate):
         )
 
 @app.post("/payouts/claim")
-async def claim_payout(claim: ClaimPayout):
+async def claim_payout(claim: ClaimPayout, wait: Optional[str] = None):
     """Claim payout for a submission"""
     if not blockchain_client:
         raise HTTPException(
@@ -312,14 +1319,25 @@ async def claim_payout(claim: ClaimPayout):
             detail="Blockchain client not available"
         )
 
+    policy = parse_wait(wait)
+    await run_preflight("claim", claim.submission_id, claim.recipient)
+
     try:
-        receipt = blockchain_client.claim_payout(
+        receipt = await tx_scheduler.run(
+            "claim",
+            blockchain_client.claim_payout,
             claim.submission_id,
-            claim.recipient
+            claim.recipient,
+            wait=lane_policy(policy)
         )
+        if not policy.waits_for_receipt:
+            return pending_response(receipt, policy)
+        receipt = await run_in_threadpool(blockchain_client.wait_for_confirmations, receipt, policy)
 
-        # Get claimable details
-        claimable_data = blockchain_client.get_claimable(claim.submission_id)
+        # Get claimable details as of the receipt's block
+        claimable_data = await run_in_threadpool(
+            blockchain_client.get_claimable, claim.submission_id, receipt.blockNumber
+        )
 
         return {
             "submission_id": claim.submission_id,
@@ -330,14 +1348,99 @@ async def claim_payout(claim: ClaimPayout):
             "status": "claimed"
         }
 
+    except SchedulerSaturated as e:
+        raise too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to claim payout: {str(e)}"
         )
 
+@app.post("/workflows/submission-payout")
+async def submission_payout_workflow(workflow: SubmissionPayoutCreate, wait: Optional[str] = None):
+    """Register, verify, mark claimable and claim in one pipelined batch
+
+    The registration is mined first so its submission ID is known; the
+    other three are then sent with consecutive nonces before any is mined.
+    With wait=none or mempool the workflow is returned as soon as they are
+    sent; follow it with GET /workflows/{workflow_id}.
+    """
+    if not blockchain_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    policy = parse_wait(wait)
+    if not Web3.is_address(workflow.recipient):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid recipient address: {workflow.recipient}"
+        )
+
+    try:
+        request = current_request.get()
+        record = await tx_scheduler.run(
+            "workflow",
+            payout_workflows.start,
+            workflow.content_hash,
+            workflow.uri,
+            workflow.mime_type,
+            Web3.to_checksum_address(workflow.recipient),
+            workflow.amount,
+            reason_code=workflow.reason_code,
+            idempotency_key=request.key if request else None,
+            waiting=policy.waits_for_receipt
+        )
+        if not policy.waits_for_receipt:
+            return record
+
+        record, last_receipt = await run_in_threadpool(payout_workflows.wait, record["workflow_id"])
+        if last_receipt is not None:
+            # The last mined step has the highest block, so it covers the others
+            await run_in_threadpool(blockchain_client.wait_for_confirmations, last_receipt, policy)
+        return record
+
+    except SchedulerSaturated as e:
+        raise too_many_requests(e)
+    except ValueError as e:
+        # Content hash cannot be encoded for the compact registry
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid submission: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run submission payout workflow: {str(e)}"
+        )
+
+@app.get("/workflows/{workflow_id}")
+async def get_workflow(workflow_id: str):
+    """Per-step status and compensation report of a submission-payout workflow"""
+    if not payout_workflows:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Blockchain client not available"
+        )
+
+    try:
+        record = await run_in_threadpool(payout_workflows.get, workflow_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get workflow: {str(e)}"
+        )
+
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Workflow {workflow_id} not found"
+        )
+    return record
+
 @app.get("/payouts/{submission_id}")
-async def get_claimable(submission_id: int):
+async def get_claimable(submission_id: int, block: Optional[int] = Query(None, ge=0), at: Optional[str] = None):
     """Get claimable payout details for a submission"""
     if not blockchain_client:
         raise HTTPException(
@@ -345,15 +1448,18 @@ async def get_claimable(submission_id: int):
             detail="Blockchain client not available"
         )
 
+    block_number = await read_block(block, at)
+
     try:
-        claimable_data = blockchain_client.get_claimable(submission_id)
+        claimable_data = await run_in_threadpool(blockchain_client.get_claimable, submission_id, block_number)
 
         return {
             "submission_id": submission_id,
             "recipient": claimable_data[0],
             "amount": claimable_data[1],
             "amount_usdt": claimable_data[1] / 10**6,
-            "claimed": claimable_data[2]
+            "claimed": claimable_data[2],
+            "block_number": block_number
         }
 
     except Exception as e:
@@ -362,11 +1468,63 @@ async def get_claimable(submission_id: int):
             detail=f"Claimable payout not found: {str(e)}"
         )
 
-if __name__ == "__main__":
-    # Run server
-    uvicorn.run(
-        "main:app",
-        host=BlockchainConfig.API_HOST,
-        port=BlockchainConfig.API_PORT,
-        reload=BlockchainConfig.DEBUG
-    )
\ No newline at end of file
+@app.get("/recipients/{address}/payouts")
+async def get_recipient_payouts(address: str):
+    """Outstanding claimable and paid totals for a recipient"""
+    if not bounty_analytics:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Bounty analytics not available"
+        )
+
+    if not Web3.is_address(address):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid address: {address}"
+        )
+
+    recipient = Web3.to_checksum_address(address)
+    totals = await run_in_threadpool(bounty_analytics.get_recipient, recipient)
+    if totals is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No payouts for {recipient}"
+        )
+
+    return {
+        "recipient": recipient,
+        **totals,
+        "outstanding_amount_usdt": totals["outstanding_amount"] / 10**6,
+        "paid_amount_usdt": totals["paid_amount"] / 10**6,
+        "synced_block": bounty_analytics.cursor
+    }
+
+@app.get("/funders/{address}/bounties")
+async def get_funder_bounties(address: str):
+    """Total amount and number of fundings made by a funder"""
+    if not bounty_analytics:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Bounty analytics not available"
+        )
+
+    if not Web3.is_address(address):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid address: {address}"
+        )
+
+    funder = Web3.to_checksum_address(address)
+    totals = await run_in_threadpool(bounty_analytics.get_funder, funder)
+    if totals is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No bounty funding by {funder}"
+        )
+
+    return {
+        "funder": funder,
+        **totals,
+        "total_funded_usdt": totals["total_funded"] / 10**6,
+        "synced_block": bounty_analytics.cursor
+    }
@@ -4,172 +4,646 @@ This will be used by FastAPI backend for blockchain operations
 """
 
 import json
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 from web3 import Web3
+from web3.exceptions import TimeExhausted
+from web3.logs import DISCARD
 from eth_account import Account
 from config.blockchain_config import BlockchainConfig
+from chain_head import BlockHeadTracker, BlockReadCache, WaitPolicy
+from content_codec import decode_content_hash, pack_content_hash
+from gas_ledger import GasLedger
+from idempotency_store import current_request
+from nonce_manager import NonceManager, nonce_taken
+from rpc_router import RoutingProvider
+from tx_coordination import SharedNonceManager, SharedPendingRegistry
+from tx_outbox import TransactionOutbox
+from tx_supervisor import TransactionSupervisor, PendingTransaction
+
+def load_contracts(w3, compact_registry: bool = False):
+    """Contract instances of the deployment, keyed like BlockchainClient.contracts
+
+    Returns (contracts, deployment addresses). Needs no account, so
+    read-only tools can use it without a full client.
+    """
+    # Load deployment addresses
+    with open("deployments/addresses.json", "r") as f:
+        deployment = json.load(f)
+
+    # Load contract ABIs
+    contract_names = ["SubmissionRegistry", "VerificationManager", "BountyPool", "MockUSDT"]
+    if compact_registry:
+        contract_names.append("CompactSubmissionRegistry")
+
+    contract_abis = {}
+    for contract_name in contract_names:
+        artifact_path = f"artifacts/contracts/{contract_name}.sol/{contract_name}.json"
+        with open(artifact_path, "r") as f:
+            artifact = json.load(f)
+            contract_abis[contract_name] = artifact["abi"]
+
+    # Initialize contract instances
+    contracts = {
+        "submission_registry": w3.eth.contract(
+            address=deployment["submissionRegistry"],
+            abi=contract_abis["SubmissionRegistry"]
+        ),
+        "verification_manager": w3.eth.contract(
+            address=deployment["verificationManager"],
+            abi=contract_abis["VerificationManager"]
+        ),
+        "bounty_pool": w3.eth.contract(
+            address=deployment["bountyPool"],
+            abi=contract_abis["BountyPool"]
+        ),
+        "mock_usdt": w3.eth.contract(
+            address=deployment["mockUSDT"],
+            abi=contract_abis["MockUSDT"]
+        )
+    }
+
+    if compact_registry:
+        contracts["compact_submission_registry"] = w3.eth.contract(
+            address=deployment["compactSubmissionRegistry"],
+            abi=contract_abis["CompactSubmissionRegistry"]
+        )
+    return contracts, deployment
 
 class BlockchainClient:
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(BlockchainConfig.RPC_URL))
+        self.rpc = RoutingProvider(
+            BlockchainConfig.RPC_URLS,
+            timeout=BlockchainConfig.RPC_TIMEOUT,
+            hedge_min_delay=BlockchainConfig.RPC_HEDGE_MIN_DELAY_MS / 1000,
+            failure_cooldown=BlockchainConfig.RPC_FAILURE_COOLDOWN
+        )
+        self.w3 = Web3(self.rpc)
         self.account = Account.from_key(BlockchainConfig.PRIVATE_KEY)
+        registry = None
+        if BlockchainConfig.TX_COORDINATION == "shared":
+            # Several API workers sign with the same account
+            self.nonces = SharedNonceManager(self.w3, self.account.address, BlockchainConfig.TX_COORDINATION_DB_PATH)
+            registry = SharedPendingRegistry(BlockchainConfig.TX_COORDINATION_DB_PATH)
+        else:
+            if BlockchainConfig.API_WORKERS > 1:
+                # Each worker would count nonces on its own and sign over the others' transactions
+                raise ValueError(
+                    f"TX_COORDINATION=local supports a single API worker, found {BlockchainConfig.API_WORKERS}; "
+                    "use TX_COORDINATION=shared"
+                )
+            self.nonces = NonceManager(self.w3, self.account.address)
+        self.head = BlockHeadTracker(
+            self.w3,
+            poll_interval=BlockchainConfig.CHAIN_HEAD_POLL_INTERVAL,
+            finality_depth=BlockchainConfig.FINALITY_DEPTH,
+            on_new_head=self.rpc.refresh_heads
+        )
+        self.head.start()
+        self.reads = BlockReadCache(BlockchainConfig.READ_CACHE_ENTRIES)
+        self.gas_ledger = GasLedger(BlockchainConfig.GAS_LEDGER_DB_PATH)
+        self.outbox = TransactionOutbox(BlockchainConfig.OUTBOX_DB_PATH)
+        self.supervisor = TransactionSupervisor(
+            self.w3,
+            self.account,
+            stuck_blocks=BlockchainConfig.TX_STUCK_BLOCKS,
+            bump_fraction=BlockchainConfig.TX_FEE_BUMP_PERCENT / 100,
+            max_bumps=BlockchainConfig.TX_MAX_FEE_BUMPS,
+            max_fee_wei=Web3.to_wei(BlockchainConfig.TX_MAX_FEE_GWEI, "gwei") if BlockchainConfig.TX_MAX_FEE_GWEI else None,
+            use_eip1559=BlockchainConfig.USE_EIP1559,
+            timeout=BlockchainConfig.TX_RECEIPT_TIMEOUT,
+            head=self.head,
+            confirmation_timeout=BlockchainConfig.TX_CONFIRMATION_TIMEOUT,
+            registry=registry,
+            ledger=self.gas_ledger,
+            outbox=self.outbox
+        )
         self.contracts = {}
+        self.compact_registry = BlockchainConfig.SUBMISSION_REGISTRY_MODE == "compact"
+        self._mime_codes = {}
+        self._mime_types = {}
+        self._mime_locks = {}
         self._load_contracts()
 
     def _load_contracts(self):
         """Load contract ABIs and addresses"""
-        # Load deployment addresses
-        with open("deployments/addresses.json", "r") as f:
-            deployment = json.load(f)
-
-        # Load contract ABIs
-        contract_abis = {}
-        for contract_name in ["SubmissionRegistry", "VerificationManager", "BountyPool", "MockUSDT"]:
-            artifact_path = f"artifacts/contracts/{contract_name}.sol/{contract_name}.json"
-            with open(artifact_path, "r") as f:
-                artifact = json.load(f)
-                contract_abis[contract_name] = artifact["abi"]
-
-        # Initialize contract instances
-        self.contracts = {
-            "submission_registry": self.w3.eth.contract(
-                address=deployment["submissionRegistry"],
-                abi=contract_abis["SubmissionRegistry"]
-            ),
-            "verification_manager": self.w3.eth.contract(
-                address=deployment["verificationManager"],
-                abi=contract_abis["VerificationManager"]
-            ),
-            "bounty_pool": self.w3.eth.contract(
-                address=deployment["bountyPool"],
-                abi=contract_abis["BountyPool"]
-            ),
-            "mock_usdt": self.w3.eth.contract(
-                address=deployment["mockUSDT"],
-                abi=contract_abis["MockUSDT"]
+        self.contracts, deployment = load_contracts(self.w3, self.compact_registry)
+        self.registry_block = deployment.get("submissionRegistryBlock", 0)
+        if self.compact_registry:
+            self.compact_registry_block = deployment.get("compactSubmissionRegistryBlock", 0)
+
+    def _send_transaction(self, function_call, gas: int, wait="receipt", idempotent: bool = True, step: int = None):
+        """Sign and send a contract transaction and wait as the policy asks
+
+        Returns the receipt, or the PendingTransaction for the "none" and
+        "mempool" policies. Inside a request carrying an Idempotency-Key, the
+        transactions already recorded for the same step are re-attached
+        instead of sending a new one. Stuck transactions are re-priced by the
+        supervisor while waiting, or in the background when not waiting.
+        With idempotent=False the transaction takes no step of the request
+        (for side effects a retry may not repeat, such as MIME registration).
+        Concurrent sends of one request pass a step from reserve_steps().
+        A broadcast rejected because the nonce is already used (another
+        sender with the same key) re-reads the counter and is retried once.
+        """
+        policy = wait if isinstance(wait, WaitPolicy) else WaitPolicy.parse(wait)
+        request = current_request.get() if idempotent else None
+        if request and step is None:
+            step = request.next_step()
+        recorded = request.get_transactions(step) if request else None
+
+        if recorded:
+            pending = self.supervisor.adopt(recorded)
+            _label(pending, function_call)
+            pending.outbox_id = self.outbox.find(pending.tx_hash)
+            if request:
+                pending.on_replaced = lambda tx_hash, raw_tx: request.record_transaction(step, tx_hash, raw_tx)
+            if not policy.waits_for_receipt:
+                self.supervisor.watch(pending)
+        else:
+            try:
+                pending = self._sign_and_broadcast(function_call, gas, policy, request, step)
+            except Exception as e:
+                if not nonce_taken(e):
+                    raise
+                # Another sender with the same key (a script, a deploy) moved the nonce on; the counter was re-read
+                pending = self._sign_and_broadcast(function_call, gas, policy, request, step)
+
+            if policy.mode == "mempool":
+                self.supervisor.watch(pending)
+
+        if not policy.waits_for_receipt:
+            return pending
+
+        receipt = self.supervisor.wait(pending)
+        return self.supervisor.confirm(receipt, policy)
+
+    def _sign_and_broadcast(self, function_call, gas: int, policy: WaitPolicy, request, step: int):
+        """Reserve a nonce, sign, record and broadcast one transaction; returns it pending"""
+        # Write-ahead: the intent is durable before a nonce is signed for it
+        entry_id = self.outbox.enqueue(
+            function_call.fn_name, function_call.address, function_call._encode_transaction_data(), gas
+        )
+        nonce = None
+        pending = None
+
+        def abandon(error):
+            if nonce is not None:
+                if nonce_taken(error):
+                    # The counter is behind the chain; releasing would hand the same nonce out again
+                    self.nonces.resync()
+                    if request and pending is not None:
+                        # Never reached a node's pool, so a retry must not re-attach to it
+                        request.forget_transaction(step, pending.tx_hash)
+                else:
+                    self.nonces.release(nonce)
+            self.outbox.failed(entry_id, str(error))
+
+        try:
+            nonce = self.nonces.reserve()
+            transaction = function_call.build_transaction({
+                'from': self.account.address,
+                'nonce': nonce,
+                'gas': gas,
+                **self.supervisor.fee_params()
+            })
+
+            pending = self.supervisor.sign(transaction)
+            _label(pending, function_call)
+            pending.outbox_id = entry_id
+            self.outbox.signed(entry_id, nonce, pending.tx_hash, pending.raw_tx)
+            self.nonces.signed(nonce, pending.raw_tx)
+            if request:
+                # Recorded before broadcast so a retry never signs a second transaction
+                request.record_transaction(step, pending.tx_hash, pending.raw_tx)
+                pending.on_replaced = lambda tx_hash, raw_tx: request.record_transaction(step, tx_hash, raw_tx)
+
+            if policy.mode == "none":
+                self.supervisor.broadcast_later(pending, on_error=abandon)
+            else:
+                self.supervisor.broadcast(pending)
+        except Exception as e:
+            abandon(e)
+            raise
+        return pending
+
+    def recover_nonces(self):
+        """Finish what stopped workers left behind for the signing account
+
+        Signed transactions of a dead worker are rebroadcast, nonces it
+        reserved but never signed (or that stayed released too long) are
+        filled with a self-transfer so later nonces are not stuck, and its
+        pending transactions are supervised again.
+        """
+        confirmed = self.w3.eth.get_transaction_count(self.account.address, "latest")
+        self.nonces.prune(confirmed)
+        self.supervisor.registry.prune(confirmed)
+
+        for nonce, raw_tx in self.nonces.claim_stale(BlockchainConfig.NONCE_GAP_TIMEOUT):
+            try:
+                if raw_tx:
+                    self.w3.eth.send_raw_transaction(raw_tx)
+                    print(f"🔁 Rebroadcast transaction with nonce {nonce} left by a stopped worker")
+                else:
+                    pending = self.supervisor.fill_gap(nonce)
+                    self.nonces.signed(nonce, pending.raw_tx)
+                    self.supervisor.watch(pending)
+                    print(f"🩹 Filled unused nonce {nonce} with a self-transfer")
+            except ValueError as e:
+                # Already known or nonce too low: the slot is taken and gets pruned once mined
+                print(f"⚠️ Nonce {nonce} recovery skipped: {e}")
+
+        for pending in self.supervisor.registry.claim_orphans():
+            self.supervisor.watch(pending)
+
+        # Bookkeeping for the outbox entries of stopped workers; the gaps were handled above
+        self.recover_outbox(fill_gaps=False)
+
+    def recover_outbox(self, fill_gaps: bool = True):
+        """Reconcile outbox entries left open by stopped processes with the chain
+
+        Entries never signed are marked failed. Signed ones are resolved from
+        their receipt, marked replaced if their nonce was used by another
+        transaction, or otherwise rebroadcast and watched. With fill_gaps,
+        unused nonces below the highest rebroadcast one are filled with a
+        self-transfer so it can be mined; the shared nonce manager does this
+        itself when several workers coordinate.
+        """
+        self.outbox.prune(BlockchainConfig.OUTBOX_RETENTION_HOURS * 3600)
+        confirmed = self.w3.eth.get_transaction_count(self.account.address, "latest")
+        rebroadcast = set()
+
+        for entry, versions in self.outbox.claim_orphans():
+            entry_id, nonce = entry["entry_id"], entry["nonce"]
+            if not versions:
+                self.outbox.failed(entry_id, "Stopped before the transaction was signed")
+                continue
+
+            receipt = next(filter(None, (self.supervisor._get_receipt(tx_hash) for tx_hash, _ in versions)), None)
+            if receipt is not None:
+                self.outbox.mined(receipt)
+                continue
+            if nonce < confirmed:
+                self.outbox.replaced(entry_id, f"Nonce {nonce} was used by another transaction")
+                continue
+
+            try:
+                pending = self.supervisor.adopt(versions)
+            except ValueError as e:
+                # Mined meanwhile or rejected by the node; resolved on the next pass
+                print(f"⚠️ Outbox entry {entry_id} (nonce {nonce}) not rebroadcast: {e}")
+                continue
+            pending.function = entry["function"]
+            pending.outbox_id = entry_id
+            if entry["state"] == "signed":
+                self.outbox.sent(entry_id, pending.tx_hash)
+            self.supervisor.watch(pending)
+            rebroadcast.add(nonce)
+            print(f"🔁 Recovered {entry['function']} transaction with nonce {nonce} from the outbox")
+
+        if fill_gaps and rebroadcast:
+            # Everything from the pending count up is a nonce no transaction holds anymore
+            first_free = self.w3.eth.get_transaction_count(self.account.address, "pending")
+            for nonce in range(first_free, max(rebroadcast)):
+                if nonce not in rebroadcast:
+                    self.supervisor.watch(self.supervisor.fill_gap(nonce))
+                    print(f"🩹 Filled unused nonce {nonce} with a self-transfer")
+            self.nonces.resync()
+
+    def start_nonce_recovery(self, interval: float):
+        """Run recover_nonces periodically in a background thread"""
+        def run():
+            while True:
+                try:
+                    self.recover_nonces()
+                except Exception as e:
+                    print(f"⚠️ Nonce recovery failed: {e}")
+                time.sleep(interval)
+
+        threading.Thread(target=run, name="nonce-recovery", daemon=True).start()
+
+    def wait_for_confirmations(self, receipt, wait):
+        """Wait until a receipt reaches the confirmations or finality of a wait policy"""
+        policy = wait if isinstance(wait, WaitPolicy) else WaitPolicy.parse(wait)
+        return self.supervisor.confirm(receipt, policy)
+
+    def _mime_code(self, mime: str) -> int:
+        """Resolve a MIME type to its compact registry code, registering it if needed"""
+        if mime in self._mime_codes:
+            return self._mime_codes[mime]
+
+        # Concurrent first uses of a MIME type register it once; the others wait and read the code
+        with self._mime_locks.setdefault(mime, threading.Lock()):
+            if mime in self._mime_codes:
+                return self._mime_codes[mime]
+
+            contract = self.contracts["compact_submission_registry"]
+            mime_key = Web3.keccak(text=mime)
+            code = contract.functions.mimeCodes(mime_key).call()
+
+            if code == 0:
+                # Outside the request's step sequence: a retry finds the code cached or on-chain and skips this
+                receipt = self._send_transaction(contract.functions.registerMimeType(mime), 150000, idempotent=False)
+                if receipt.status == 1:
+                    code = int(receipt.logs[0]['topics'][1].hex(), 16)
+                else:
+                    # "MIME type already registered": another process registered it first
+                    code = contract.functions.mimeCodes(mime_key).call(block_identifier=receipt.blockNumber)
+                    if code == 0:
+                        raise Exception(f"Failed to register MIME type {mime}")
+
+            self._mime_codes[mime] = code
+            self._mime_types[code] = mime
+            return code
+
+    def _mime_type(self, code: int, block: int = None) -> str:
+        """Resolve a compact registry MIME code to its MIME type
+
+        Codes never change once registered. Until a code is known here,
+        block-pinned lookups go through the read cache, so concurrent
+        readers of the same block (e.g. export chunks) share one eth_call.
+        """
+        if code not in self._mime_types:
+            contract = self.contracts["compact_submission_registry"]
+            mime = self._read(contract.functions.mimeTypes(code), block)
+            self._mime_types[code] = mime
+            self._mime_codes[mime] = code
+        return self._mime_types[code]
+
+    def _register_compact_submission(self, content_hash: str, uri: str, mime: str, wait="receipt"):
+        """Register a submission on the compact registry"""
+        contract = self.contracts["compact_submission_registry"]
+        digest, content_format = pack_content_hash(content_hash)
+        mime_code = self._mime_code(mime)
+
+        receipt = self._send_transaction(
+            contract.functions.registerSubmission(digest, content_format, uri, mime_code),
+            200000,
+            wait
+        )
+        if isinstance(receipt, PendingTransaction):
+            # Not mined yet; the ID is only known from the event
+            return None, receipt
+
+        submission_id = receipt.logs[0]['topics'][1].hex()
+        return int(submission_id, 16), receipt
+
+    def _get_compact_submission(self, submission_id: int, block: int = None):
+        """Read a compact submission and decode it into the standard tuple shape"""
+        contract = self.contracts["compact_submission_registry"]
+        digest, submitter, timestamp, mime_code, content_format = self._read(
+            contract.functions.getSubmission(submission_id), block
+        )
+
+        # The URI is only kept in the registration event
+        def read_uri():
+            events = contract.events.SubmissionRegistered.get_logs(
+                fromBlock=self.compact_registry_block,
+                toBlock=block if block is not None else "latest",
+                argument_filters={'id': submission_id}
             )
-        }
+            return events[0]['args']['uri'] if events else ""
+        uri = read_uri() if block is None else self.reads.get(("SubmissionRegistered", submission_id), block, read_uri)
 
-    def register_submission(self, content_hash: str, uri: str, mime: str):
-        """Register a new submission"""
-        contract = self.contracts["submission_registry"]
+        return [
+            submitter,
+            decode_content_hash(digest, content_format),
+            uri,
+            self._mime_type(mime_code, block),
+            timestamp
+        ]
 
-        transaction = contract.functions.registerSubmission(
-            content_hash, uri, mime
-        ).build_transaction({
-            'from': self.account.address,
-            'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price
-        })
+    def register_submission(self, content_hash: str, uri: str, mime: str, wait="receipt"):
+        """Register a new submission
 
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        Returns (submission_id, receipt), or (None, pending transaction)
+        when the wait policy returns before the receipt.
+        """
+        if self.compact_registry:
+            return self._register_compact_submission(content_hash, uri, mime, wait)
+
+        contract = self.contracts["submission_registry"]
+
+        receipt = self._send_transaction(
+            contract.functions.registerSubmission(content_hash, uri, mime),
+            200000,
+            wait
+        )
+        if isinstance(receipt, PendingTransaction):
+            return None, receipt
 
         # Get submission ID from logs
         submission_id = receipt.logs[0]['topics'][1].hex()
         return int(submission_id, 16), receipt
 
-    def verify_submission(self, submission_id: int, accepted: bool, reason_code: int = 0):
+    def register_submissions_for(self, items, gas: int, wait="receipt", step: int = None):
+        """Relay submissions signed by their submitters in one transaction
+
+        Returns (outcomes, receipt) with one (submission_id, skip_reason)
+        pair per item, or (None, pending transaction) when the wait policy
+        returns before the receipt. step is the idempotency step reserved
+        for this batch when several are sent concurrently.
+        """
+        contract = self.contracts["submission_registry"]
+
+        receipt = self._send_transaction(
+            contract.functions.registerSubmissionsFor([
+                (item["submitter"], item["content_hash"], item["uri"], item["mime_type"],
+                 item["nonce"], item["deadline"], Web3.to_bytes(hexstr=item["signature"]))
+                for item in items
+            ]),
+            gas,
+            wait,
+            step=step
+        )
+        if isinstance(receipt, PendingTransaction):
+            return None, receipt
+        if receipt.status != 1:
+            raise Exception(f"registerSubmissionsFor reverted in {receipt.transactionHash.hex()}")
+
+        # Registered entries appear in item order; skipped ones carry their index
+        registered = iter(event['args']['id'] for event in
+                          contract.events.SubmissionRegistered().process_receipt(receipt, errors=DISCARD))
+        skipped = {event['args']['index']: event['args']['reason'] for event in
+                   contract.events.RelayedSubmissionSkipped().process_receipt(receipt, errors=DISCARD)}
+        outcomes = [(None, skipped[index]) if index in skipped else (next(registered), None)
+                    for index in range(len(items))]
+        return outcomes, receipt
+
+    def anchor_batch(self, root: bytes, first_index: int, count: int, wait="receipt"):
+        """Anchor the Merkle root of an off-chain submission batch"""
+        contract = self.contracts["submission_registry"]
+
+        receipt = self._send_transaction(
+            contract.functions.anchorBatch(root, first_index, count),
+            200000,
+            wait
+        )
+        if isinstance(receipt, PendingTransaction):
+            return None, receipt
+        if receipt.status != 1:
+            raise Exception(f"anchorBatch reverted in {receipt.transactionHash.hex()}")
+
+        # Get batch ID from logs
+        batch_id = receipt.logs[0]['topics'][1].hex()
+        return int(batch_id, 16), receipt
+
+    def verify_submission(self, submission_id: int, accepted: bool, reason_code: int = 0, wait="receipt"):
         """Verify a submission (accept/reject)"""
         contract = self.contracts["verification_manager"]
 
-        transaction = contract.functions.setVerification(
-            submission_id, accepted, reason_code
-        ).build_transaction({
-            'from': self.account.address,
-            'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = self._send_transaction(
+            contract.functions.setVerification(submission_id, accepted, reason_code),
+            200000,
+            wait
+        )
         return receipt
 
-    def fund_bounty(self, bounty_id: int, amount: int):
+    def fund_bounty(self, bounty_id: int, amount: int, wait="receipt"):
         """Fund a bounty pool"""
         # First approve the amount
         mock_usdt = self.contracts["mock_usdt"]
         bounty_pool = self.contracts["bounty_pool"]
 
-        # Approve transaction
-        approve_tx = mock_usdt.functions.approve(
-            bounty_pool.address, amount
-        ).build_transaction({
-            'from': self.account.address,
-            'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            'gas': 100000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-
-        signed_approve = self.w3.eth.account.sign_transaction(approve_tx, self.account.key)
-        approve_hash = self.w3.eth.send_raw_transaction(signed_approve.rawTransaction)
-        self.w3.eth.wait_for_transaction_receipt(approve_hash)
+        # Approve transaction; the next nonce keeps fundBounty ordered after it
+        self._send_transaction(
+            mock_usdt.functions.approve(bounty_pool.address, amount),
+            100000,
+            "mempool"
+        )
 
         # Fund bounty transaction
-        fund_tx = bounty_pool.functions.fundBounty(
-            bounty_id, amount
-        ).build_transaction({
-            'from': self.account.address,
-            'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-
-        signed_fund = self.w3.eth.account.sign_transaction(fund_tx, self.account.key)
-        fund_hash = self.w3.eth.send_raw_transaction(signed_fund.rawTransaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(fund_hash)
+        receipt = self._send_transaction(
+            bounty_pool.functions.fundBounty(bounty_id, amount),
+            200000,
+            wait
+        )
         return receipt
 
-    def mark_claimable(self, submission_id: int, recipient: str, amount: int):
+    def mark_claimable(self, submission_id: int, recipient: str, amount: int, wait="receipt"):
         """Mark submission as claimable for payout"""
         contract = self.contracts["bounty_pool"]
 
-        transaction = contract.functions.markClaimable(
-            submission_id, recipient, amount
-        ).build_transaction({
-            'from': self.account.address,
-            'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = self._send_transaction(
+            contract.functions.markClaimable(submission_id, recipient, amount),
+            200000,
+            wait
+        )
         return receipt
 
-    def claim_payout(self, submission_id: int, recipient: str):
+    def claim_payout(self, submission_id: int, recipient: str, wait="receipt"):
         """Claim payout for accepted submission"""
         contract = self.contracts["bounty_pool"]
 
-        transaction = contract.functions.claim(
-            submission_id, recipient
-        ).build_transaction({
-            'from': self.account.address,
-            'nonce': self.w3.eth.get_transaction_count(self.account.address),
-            'gas': 200000,
-            'gasPrice': self.w3.eth.gas_price
-        })
-
-        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = self._send_transaction(
+            contract.functions.claim(submission_id, recipient),
+            200000,
+            wait
+        )
         return receipt
 
-    def get_submission(self, submission_id: int):
-        """Get submission details"""
+    def send_submission_payout(self, content_hash: str, uri: str, mime: str, recipient: str, amount: int,
+                               reason_code: int = 0):
+        """Register, then send verify, mark claimable and claim back-to-back
+
+        The submission ID is read from the registration receipt rather than
+        predicted, so the dependent steps cannot land on a submission that
+        another request registered meanwhile. They are then sent with
+        consecutive nonces without waiting for each other's receipts. Each
+        transaction is supervised in the background (pending.receipt_future).
+        Returns (submission_id, pending transactions, error); error is the
+        exception that stopped sending, after which the remaining steps are
+        not sent.
+        """
+        if self.compact_registry:
+            registry = self.contracts["compact_submission_registry"]
+            digest, content_format = pack_content_hash(content_hash)
+            register_call = registry.functions.registerSubmission(digest, content_format, uri, self._mime_code(mime))
+        else:
+            registry = self.contracts["submission_registry"]
+            register_call = registry.functions.registerSubmission(content_hash, uri, mime)
+        verification_manager = self.contracts["verification_manager"]
+        bounty_pool = self.contracts["bounty_pool"]
+
+        pending_transactions = []
+        try:
+            registration = self._send_transaction(register_call, 200000, "mempool")
+            pending_transactions.append(registration)
+            try:
+                receipt = registration.receipt_future.result(timeout=self.supervisor.timeout)
+            except FutureTimeout:
+                raise TimeExhausted(f"Registration not mined after {self.supervisor.timeout} seconds")
+            if receipt.status != 1:
+                raise Exception("Registration reverted")
+        except Exception as e:
+            return None, pending_transactions, e
+
+        submission_id = int(receipt.logs[0]['topics'][1].hex(), 16)
+        calls = [
+            verification_manager.functions.setVerification(submission_id, True, reason_code),
+            bounty_pool.functions.markClaimable(submission_id, recipient, amount),
+            bounty_pool.functions.claim(submission_id, recipient)
+        ]
+        for function_call in calls:
+            try:
+                pending_transactions.append(self._send_transaction(function_call, 200000, "mempool"))
+            except Exception as e:
+                return submission_id, pending_transactions, e
+        return submission_id, pending_transactions, None
+
+    def get_submission(self, submission_id: int, block: int = None):
+        """Get submission details (at a block number if given)"""
+        if self.compact_registry:
+            return self._get_compact_submission(submission_id, block)
+
         contract = self.contracts["submission_registry"]
-        return contract.functions.getSubmission(submission_id).call()
+        return self._read(contract.functions.getSubmission(submission_id), block)
 
-    def get_verification(self, submission_id: int):
+    def get_verification(self, submission_id: int, block: int = None):
         """Get verification details"""
         contract = self.contracts["verification_manager"]
-        return contract.functions.getVerification(submission_id).call()
+        return self._read(contract.functions.getVerification(submission_id), block)
 
-    def get_claimable(self, submission_id: int):
+    def get_bounty(self, bounty_id: int, block: int = None):
+        """Get bounty funding details"""
+        contract = self.contracts["bounty_pool"]
+        return self._read(contract.functions.getBounty(bounty_id), block)
+
+    def get_claimable(self, submission_id: int, block: int = None):
         """Get claimable payout details"""
         contract = self.contracts["bounty_pool"]
-        return contract.functions.getClaimable(submission_id).call()
\ No newline at end of file
+        return self._read(contract.functions.getClaimable(submission_id), block)
+
+    def _read(self, function_call, block: int = None):
+        """eth_call at latest, or pinned to a block number and served from the read cache"""
+        if block is None:
+            return function_call.call()
+        key = (function_call.address, function_call._encode_transaction_data())
+        return self.reads.get(key, block, lambda: function_call.call(block_identifier=block))
+
+    def anchored_count(self) -> int:
+        """Leaves covered by the batches anchored on-chain"""
+        return self.contracts["submission_registry"].functions.anchoredCount().call()
+
+    def get_anchored_batch(self, first_index: int):
+        """(batch ID, root, count, transaction hash) of the batch starting at a leaf index, or None"""
+        contract = self.contracts["submission_registry"]
+        events = contract.events.BatchAnchored.get_logs(
+            fromBlock=self.registry_block,
+            argument_filters={'firstIndex': first_index}
+        )
+        if not events:
+            return None
+        args = events[-1]['args']
+        return args['batchId'], bytes(args['root']), args['count'], bytes(events[-1]['transactionHash'])
+
+    def verify_inclusion(self, batch_id: int, leaf: bytes, proof):
+        """Check a Merkle inclusion proof against an anchored batch root"""
+        contract = self.contracts["submission_registry"]
+        return contract.functions.verifyInclusion(batch_id, leaf, proof).call()
+
+def _label(pending: PendingTransaction, function_call):
+    """Tag a pending transaction with its function and calldata size for gas accounting"""
+    pending.function = function_call.fn_name
+    pending.payload_bytes = (len(function_call._encode_transaction_data()) - 2) // 2
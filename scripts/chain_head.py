@@ -0,0 +1,244 @@
+"""
+Shared chain head tracking, write confirmation policies and block-pinned read caching
+One poller follows latest/safe/finalized blocks for every waiting request and every read
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from web3.exceptions import BlockNotFound
+
+WAIT_MODES = ("none", "mempool", "receipt", "confirmations", "finalized")
+
+# Block tags a read can be pinned to with ?at=
+READ_TAGS = ("latest", "safe", "finalized")
+
+class HeadUnavailable(Exception):
+    """The chain head has never been read, and reading it now failed"""
+
+class WaitPolicy:
+    """How long a write waits before returning
+
+    none:            return once signed, broadcast in the background
+    mempool:         return once the node accepted the transaction
+    receipt:         return with the first receipt
+    confirmations=N: return once the receipt has N confirmations
+    finalized:       return once the receipt's block is finalized
+    """
+
+    def __init__(self, mode: str = "receipt", confirmations: int = 1):
+        self.mode = mode
+        self.confirmations = confirmations
+
+    @classmethod
+    def parse(cls, value: str):
+        value = (value or "receipt").strip().lower()
+        match = re.fullmatch(r"confirmations=(\d+)", value)
+        if match:
+            confirmations = int(match.group(1))
+            if confirmations < 1:
+                raise ValueError("confirmations must be at least 1")
+            return cls("confirmations", confirmations)
+        if value not in WAIT_MODES or value == "confirmations":
+            raise ValueError(f"Invalid wait policy '{value}', expected one of: none, mempool, receipt, "
+                             "confirmations=N, finalized")
+        return cls(value)
+
+    @property
+    def waits_for_receipt(self) -> bool:
+        return self.mode not in ("none", "mempool")
+
+    def __str__(self):
+        if self.mode == "confirmations":
+            return f"confirmations={self.confirmations}"
+        return self.mode
+
+class BlockHeadTracker:
+    """Background poller for the latest, safe and finalized block numbers
+
+    Waiters block on a condition variable instead of polling the node
+    themselves, so N requests waiting for confirmations cost one
+    eth_blockNumber per poll interval. Nodes without the "finalized" block
+    tag fall back to latest minus finality_depth, and nodes without "safe"
+    use the finalized block. on_new_head is called after each move of the
+    head, e.g. to refresh the routing view of other nodes.
+    """
+
+    def __init__(self, w3, poll_interval: float = 1.0, finality_depth: int = 64, on_new_head=None):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.finality_depth = finality_depth
+        self.on_new_head = on_new_head
+        self.latest = None
+        self.safe = None
+        self.finalized = None
+        self._finalized_tag = True
+        self._safe_tag = True
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        """Take a first reading and start the poller thread"""
+        if self._thread is not None:
+            return
+        try:
+            self.poll()
+        except Exception as e:
+            print(f"⚠️ Could not read the chain head: {e}")
+        self._thread = threading.Thread(target=self._run, name="block-head-tracker", daemon=True)
+        self._thread.start()
+
+    def poll(self):
+        """Read the head once and wake up waiters if it moved"""
+        latest = self.w3.eth.block_number
+        if latest == self.latest:
+            return
+
+        finalized = self._read_finalized(latest)
+        safe = self._read_safe(finalized)
+        with self._condition:
+            self.latest = latest
+            self.safe = safe
+            self.finalized = finalized
+            self._condition.notify_all()
+        if self.on_new_head:
+            self.on_new_head()
+
+    def resolve(self, block: int = None, at: str = None) -> int:
+        """Block number a read is pinned to: an explicit number, or the tracked latest/safe/finalized
+
+        Raises ValueError for an unknown tag or a block ahead of the head,
+        and HeadUnavailable if the head was never read and the node cannot
+        be reached now. Polls the node on a cold tracker, so call it off the
+        event loop.
+        """
+        if self.latest is None:
+            try:
+                self.poll()
+            except Exception as e:
+                raise HeadUnavailable(f"Chain head not available: {e}") from e
+        if block is not None:
+            if block > self.latest:
+                raise ValueError(f"Block {block} is ahead of the chain head ({self.latest})")
+            return block
+        at = at or "latest"
+        if at not in READ_TAGS:
+            raise ValueError(f"Invalid block tag '{at}', expected one of: {', '.join(READ_TAGS)}")
+        return getattr(self, at)
+
+    def wait_for_block(self, number: int, timeout: float) -> bool:
+        """Wait until the latest block is at least number"""
+        return self._wait(lambda: self.latest is not None and self.latest >= number, timeout)
+
+    def wait_for_finalized(self, number: int, timeout: float) -> bool:
+        """Wait until block number is finalized"""
+        return self._wait(lambda: self.finalized is not None and self.finalized >= number, timeout)
+
+    def wait_for_next(self, timeout: float):
+        """Wait for a new block and return the latest block number"""
+        current = self.latest
+        self._wait(lambda: self.latest != current, timeout)
+        return self.latest
+
+    def snapshot(self):
+        return {"latest": self.latest, "safe": self.safe, "finalized": self.finalized}
+
+    def _wait(self, predicate, timeout: float) -> bool:
+        with self._condition:
+            return self._condition.wait_for(predicate, timeout)
+
+    def _read_finalized(self, latest: int) -> int:
+        if self._finalized_tag:
+            try:
+                return self.w3.eth.get_block("finalized")["number"]
+            except BlockNotFound:
+                # Nothing finalized yet on a young chain
+                return 0
+            except ValueError:
+                # Node rejects the tag; use a fixed depth from now on
+                self._finalized_tag = False
+        return max(latest - self.finality_depth, 0)
+
+    def _read_safe(self, finalized: int) -> int:
+        if self._safe_tag:
+            try:
+                return self.w3.eth.get_block("safe")["number"]
+            except BlockNotFound:
+                return finalized
+            except ValueError:
+                self._safe_tag = False
+        return finalized
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                pass
+            time.sleep(self.poll_interval)
+
+class BlockReadCache:
+    """LRU cache of read results keyed by (call, block number)
+
+    A result at a given block never changes, so identical reads pinned to
+    the same block (concurrent requests, or sub-calls of one composite
+    view) reach the node once. Entries are keyed by number, so after a
+    reorg of the latest blocks the replaced blocks' results stay until
+    evicted; pin to safe or finalized where that matters.
+
+    Loads are single-flight: a read that misses while the same (call,
+    block) is already being loaded waits for that load instead of sending
+    its own. A failed load is not cached; its waiters get the error.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, block: int, load):
+        """Cached result of load() for key at block"""
+        entry_key = (key, block)
+        with self._lock:
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return self._entries[entry_key]
+            loading = self._loading.get(entry_key)
+            leader = loading is None
+            if leader:
+                loading = self._loading[entry_key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return loading.result()
+
+        try:
+            value = load()
+        except BaseException as e:
+            with self._lock:
+                del self._loading[entry_key]
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            if self.max_entries:
+                self._entries[entry_key] = value
+                self._entries.move_to_end(entry_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            del self._loading[entry_key]
+        loading.set_result(value)
+        return value
+
+    def snapshot(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "coalesced": self.coalesced}
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Exercise the routing provider with repeated contract reads
+Prints per-endpoint latency, error rate and how many eth_calls were hedged
+"""
+
+import json
+import sys
+import time
+from blockchain_client import BlockchainClient
+
+READS = 200
+
+def check_rpc_routing():
+    client = BlockchainClient()
+    contract = client.contracts["submission_registry"]
+
+    print(f"🔀 Routing over {len(client.rpc.endpoints)} endpoints, primary {client.rpc.primary.url}")
+
+    latencies = []
+    for _ in range(READS):
+        started = time.monotonic()
+        contract.functions.submissionCount().call()
+        latencies.append(time.monotonic() - started)
+
+    latencies.sort()
+    print(f"✅ {READS} eth_calls: p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms, "
+          f"max {latencies[-1] * 1000:.1f}ms")
+    print(json.dumps(client.rpc.snapshot(), indent=2))
+    return True
+
+if __name__ == "__main__":
+    success = check_rpc_routing()
+    sys.exit(0 if success else 1)
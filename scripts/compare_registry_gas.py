@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure per-submission gas of SubmissionRegistry vs CompactSubmissionRegistry
+Run against a local node after deploying both contracts
+"""
+
+import json
+import sys
+from blockchain_client import BlockchainClient
+from content_codec import pack_content_hash
+
+# Representative IPFS submission (CIDv0 content hash)
+CONTENT_HASH = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+URI = f"ipfs://{CONTENT_HASH}"
+MIME_TYPE = "image/png"
+RUNS = 5
+
+def send(client, function_call):
+    """Send a transaction with an estimated gas limit and return its receipt"""
+    transaction = function_call.build_transaction({
+        'from': client.account.address,
+        'nonce': client.w3.eth.get_transaction_count(client.account.address),
+        'gasPrice': client.w3.eth.gas_price
+    })
+
+    signed_txn = client.w3.eth.account.sign_transaction(transaction, client.account.key)
+    tx_hash = client.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    receipt = client.w3.eth.wait_for_transaction_receipt(tx_hash)
+    if receipt.status != 1:
+        raise Exception(f"Transaction {tx_hash.hex()} reverted")
+    return receipt
+
+def compare_registry_gas():
+    client = BlockchainClient()
+
+    with open("deployments/addresses.json", "r") as f:
+        deployment = json.load(f)
+    with open("artifacts/contracts/CompactSubmissionRegistry.sol/CompactSubmissionRegistry.json", "r") as f:
+        compact_abi = json.load(f)["abi"]
+
+    standard = client.contracts["submission_registry"]
+    compact = client.w3.eth.contract(
+        address=deployment["compactSubmissionRegistry"],
+        abi=compact_abi
+    )
+
+    # Make sure the MIME type exists in the compact registry table
+    mime_code = compact.functions.mimeCodes(client.w3.keccak(text=MIME_TYPE)).call()
+    if mime_code == 0:
+        send(client, compact.functions.registerMimeType(MIME_TYPE))
+        mime_code = compact.functions.mimeCodes(client.w3.keccak(text=MIME_TYPE)).call()
+
+    standard_gas = []
+    compact_gas = []
+    for _ in range(RUNS):
+        receipt = send(client, standard.functions.registerSubmission(CONTENT_HASH, URI, MIME_TYPE))
+        standard_gas.append(receipt.gasUsed)
+
+        receipt = send(client, compact.functions.registerSubmission(
+            *pack_content_hash(CONTENT_HASH), URI, mime_code
+        ))
+        compact_gas.append(receipt.gasUsed)
+
+    standard_avg = sum(standard_gas) / len(standard_gas)
+    compact_avg = sum(compact_gas) / len(compact_gas)
+
+    print("=== registerSubmission gas per submission ===")
+    print(f"SubmissionRegistry:        {standard_avg:,.0f}")
+    print(f"CompactSubmissionRegistry: {compact_avg:,.0f}")
+    print(f"Reduction:                 {standard_avg - compact_avg:,.0f} "
+          f"({(1 - compact_avg / standard_avg) * 100:.1f}%)")
+    return True
+
+if __name__ == "__main__":
+    success = compare_registry_gas()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,117 @@
+"""
+Encoding helpers for the compact (bytes32) submission registry
+Converts between the REST content_hash strings and on-chain digests
+"""
+
+import base64
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# Multihash prefix for sha2-256 with a 32 byte digest
+SHA256_MULTIHASH_PREFIX = bytes([0x12, 0x20])
+
+# CIDv1 prefix for the raw codec (0x55): the multihash is the sha2-256 of the bytes themselves
+CID_V1_RAW_PREFIX = bytes([0x01, 0x55])
+
+# Format tag stored next to the digest, so reads return the string that was submitted
+FORMAT_HEX = 0
+FORMAT_CID_V0 = 1
+FORMAT_CID_V1_RAW = 2
+
+def base58_encode(data: bytes) -> str:
+    """Encode bytes as base58btc"""
+    num = int.from_bytes(data, "big")
+    encoded = ""
+    while num > 0:
+        num, rem = divmod(num, 58)
+        encoded = BASE58_ALPHABET[rem] + encoded
+
+    # Leading zero bytes are encoded as leading '1's
+    padding = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * padding + encoded
+
+def base58_decode(text: str) -> bytes:
+    """Decode a base58btc string"""
+    num = 0
+    for char in text:
+        index = BASE58_ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"Invalid base58 character: {char!r}")
+        num = num * 58 + index
+
+    body = num.to_bytes((num.bit_length() + 7) // 8, "big")
+    padding = len(text) - len(text.lstrip("1"))
+    return b"\x00" * padding + body
+
+def is_cid_v0(content_hash: str) -> bool:
+    """Check whether a string is a CIDv0 (base58 sha2-256 multihash)"""
+    if len(content_hash) != 46 or not content_hash.startswith("Qm"):
+        return False
+    try:
+        return base58_decode(content_hash)[:2] == SHA256_MULTIHASH_PREFIX
+    except ValueError:
+        return False
+
+def cid_v1_raw(digest: bytes) -> str:
+    """CIDv1 (base32, raw codec) of content whose sha2-256 digest is given"""
+    encoded = base64.b32encode(CID_V1_RAW_PREFIX + SHA256_MULTIHASH_PREFIX + bytes(digest))
+    return "b" + encoded.decode().lower().rstrip("=")
+
+def is_cid_v1_raw(content_hash: str) -> bool:
+    """Check whether a string is a base32 CIDv1 with the raw codec and sha2-256"""
+    if len(content_hash) != 59 or not content_hash.startswith("b"):
+        return False
+    try:
+        decoded = _base32_decode(content_hash[1:])
+    except ValueError:
+        return False
+    return decoded[:4] == CID_V1_RAW_PREFIX + SHA256_MULTIHASH_PREFIX
+
+def content_hash_format(content_hash: str) -> int:
+    """Format tag of a content hash accepted by encode_content_hash"""
+    if content_hash.startswith("0x") and len(content_hash) == 66:
+        return FORMAT_HEX
+    if is_cid_v0(content_hash):
+        return FORMAT_CID_V0
+    if is_cid_v1_raw(content_hash):
+        return FORMAT_CID_V1_RAW
+    raise ValueError(
+        "Compact registry requires a 0x-prefixed 32 byte hex digest, a CIDv0 or a raw CIDv1 content hash"
+    )
+
+def encode_content_hash(content_hash: str) -> bytes:
+    """Convert a content hash string into a bytes32 digest
+
+    Accepts 0x-prefixed 32 byte hex digests, CIDv0 IPFS hashes and raw
+    CIDv1 (bafkrei...) hashes.
+    """
+    content_format = content_hash_format(content_hash)
+    if content_format == FORMAT_HEX:
+        return bytes.fromhex(content_hash[2:])
+    if content_format == FORMAT_CID_V0:
+        return base58_decode(content_hash)[2:]
+    return _base32_decode(content_hash[1:])[4:]
+
+def pack_content_hash(content_hash: str):
+    """(digest, format tag) to store for a content hash
+
+    Only strings that decode back unchanged are accepted, so e.g. an
+    uppercase hex digest is rejected rather than returned in lowercase.
+    """
+    digest = encode_content_hash(content_hash)
+    content_format = content_hash_format(content_hash)
+    if decode_content_hash(digest, content_format) != content_hash:
+        raise ValueError(f"Content hash '{content_hash}' is not in canonical form (hex digests must be lowercase)")
+    return digest, content_format
+
+def decode_content_hash(digest: bytes, content_format: int = FORMAT_CID_V0) -> str:
+    """Convert a bytes32 digest back into its content hash string in the given format"""
+    if content_format == FORMAT_HEX:
+        return "0x" + bytes(digest).hex()
+    if content_format == FORMAT_CID_V1_RAW:
+        return cid_v1_raw(digest)
+    return base58_encode(SHA256_MULTIHASH_PREFIX + bytes(digest))
+
+def _base32_decode(text: str) -> bytes:
+    """Decode unpadded lowercase base32 (multibase "b")"""
+    return base64.b32decode(text.upper() + "=" * (-len(text) % 8))
@@ -0,0 +1,269 @@
+"""
+Content-addressed file store for uploaded submissions
+Files are hashed while they stream in and stored once per SHA-256 digest, with a SQLite index
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from multipart.multipart import MultipartParser, parse_options_header
+from content_codec import cid_v1_raw
+from tx_coordination import _ImmediateTransaction, _new_owner, _owner_alive
+
+class UploadTooLarge(Exception):
+    """The body exceeded the configured upload limit"""
+
+class ContentStore:
+    """Stores files under their SHA-256 digest and indexes their registration
+
+    The file lives at <root>/sha256/<2 hex>/<digest hex>. The index keeps
+    one row per digest with its CID, size and MIME type, plus the
+    submission it was registered as, so uploading the same bytes again
+    costs no transaction. A registration in progress is owned by one
+    process at a time (same pid:token scheme as the idempotency store).
+    """
+
+    def __init__(self, root: str, index_path: str, max_bytes: int = 0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.owner = _new_owner()
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS contents (
+                digest TEXT PRIMARY KEY,
+                cid TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mime_type TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                submission_id INTEGER,
+                transaction_hash TEXT,
+                anchor_id TEXT,
+                registering_owner TEXT
+            )
+        """)
+
+    def writer(self) -> "ContentWriter":
+        return ContentWriter(self)
+
+    def path(self, digest: bytes) -> str:
+        hex_digest = bytes(digest).hex()
+        return os.path.join(self.root, "sha256", hex_digest[:2], hex_digest)
+
+    def get(self, digest: bytes):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, cid, size, mime_type, submission_id, transaction_hash, anchor_id "
+                "FROM contents WHERE digest = ?",
+                (bytes(digest).hex(),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "sha256": row[0],
+            "cid": row[1],
+            "size": row[2],
+            "mime_type": row[3],
+            "submission_id": row[4],
+            "transaction_hash": row[5],
+            "anchor_id": row[6]
+        }
+
+    def claim_registration(self, digest: bytes, size: int = None, mime_type: str = None):
+        """Index stored content (if size and mime_type are given) and decide whether this request registers it
+
+        Indexing and the claim are one transaction, so no other request sees
+        the row before it is claimed. Returns ("registered", record) when a
+        submission exists or was sent for it, ("in_progress", record) when
+        another live process is registering it, or ("claimed", record) when
+        the caller must register it and then call registered() or release().
+        Raises KeyError for a digest that is neither indexed nor given.
+        """
+        with self._lock:
+            with _ImmediateTransaction(self._conn):
+                if size is not None:
+                    # The first upload's MIME type is kept for the content
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO contents (digest, cid, size, mime_type, stored_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (bytes(digest).hex(), cid_v1_raw(digest), size, mime_type, time.time())
+                    )
+                row = self._conn.execute(
+                    "SELECT submission_id, transaction_hash, anchor_id, registering_owner FROM contents WHERE digest = ?",
+                    (bytes(digest).hex(),)
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"Content {bytes(digest).hex()} is not indexed")
+                submission_id, tx_hash, anchor_id, owner = row
+                if submission_id is not None or tx_hash is not None or anchor_id is not None:
+                    state = "registered"
+                elif owner and owner != self.owner and _owner_alive(owner):
+                    state = "in_progress"
+                else:
+                    state = "claimed"
+                    self._conn.execute(
+                        "UPDATE contents SET registering_owner = ? WHERE digest = ?",
+                        (self.owner, bytes(digest).hex())
+                    )
+        return state, self.get(digest)
+
+    def registered(self, digest: bytes, submission_id: int = None, transaction_hash: str = None,
+                   anchor_id: str = None):
+        """Record the submission, the transaction still to be mined or the anchor ID for a digest"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE contents SET submission_id = ?, transaction_hash = COALESCE(?, transaction_hash), "
+                "anchor_id = COALESCE(?, anchor_id), registering_owner = NULL WHERE digest = ?",
+                (submission_id, transaction_hash, anchor_id, bytes(digest).hex())
+            )
+
+    def release(self, digest: bytes):
+        """Forget a registration that failed or reverted, so the next upload retries it"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE contents SET submission_id = NULL, transaction_hash = NULL, anchor_id = NULL, "
+                "registering_owner = NULL "
+                "WHERE digest = ?",
+                (bytes(digest).hex(),)
+            )
+
+class ContentWriter:
+    """Hashes and spools one upload; commit() moves it to its digest path
+
+    The file is indexed by ContentStore.claim_registration(), in the same
+    transaction as its registration claim.
+    """
+
+    def __init__(self, store: ContentStore):
+        self.store = store
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(dir=os.path.join(store.root, "tmp"), delete=False)
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.store.max_bytes and self.size > self.store.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.store.max_bytes} bytes")
+        self._sha256.update(data)
+        self._file.write(data)
+
+    def commit(self, mime_type: str) -> dict:
+        """Store the file unless the digest is already stored
+
+        Returns sha256, cid, size and mime_type, with "deduplicated" set
+        when the bytes were already in the store.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+        digest = self._sha256.digest()
+        path = self.store.path(digest)
+        deduplicated = os.path.exists(path)
+        if deduplicated:
+            os.unlink(self._file.name)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._file.name, path)
+        return {
+            "sha256": digest.hex(),
+            "cid": cid_v1_raw(digest),
+            "size": self.size,
+            "mime_type": mime_type,
+            "deduplicated": deduplicated
+        }
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._file.name):
+            os.unlink(self._file.name)
+
+class MultipartFileReader:
+    """Streams the "file" part of a multipart/form-data body into a ContentWriter
+
+    Other small form fields (e.g. mime_type) are collected in fields; the
+    file part's own Content-Type is kept as file_content_type.
+    """
+
+    MAX_FIELD_BYTES = 64 * 1024
+
+    def __init__(self, content_type: str, writer: ContentWriter):
+        _, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise ValueError("multipart/form-data body without a boundary")
+
+        self.writer = writer
+        self.fields = {}
+        self.file_content_type = None
+        self.found_file = False
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name = None
+        self._in_file = False
+        self._field_value = b""
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+
+    def feed(self, data: bytes):
+        self._parser.write(data)
+
+    def finish(self):
+        self._parser.finalize()
+        if not self.found_file:
+            raise ValueError('multipart body has no "file" part')
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._part_name = None
+        self._field_value = b""
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._part_name = options.get(b"name", b"").decode()
+        # Only the first "file" part is stored
+        self._in_file = self._part_name == "file" and not self.found_file
+        if self._in_file:
+            self.found_file = True
+            content_type = self._headers.get(b"content-type")
+            self.file_content_type = content_type.decode().split(";")[0].strip() if content_type else None
+
+    def _on_part_data(self, data, start, end):
+        if self._in_file:
+            self.writer.write(data[start:end])
+        elif len(self._field_value) + end - start <= self.MAX_FIELD_BYTES:
+            self._field_value += data[start:end]
+
+    def _on_part_end(self):
+        if not self._in_file and self._part_name:
+            self.fields[self._part_name] = self._field_value.decode(errors="replace")
+        self._in_file = False
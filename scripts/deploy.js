@@ -28,6 +28,13 @@ async function main() {
   await bountyPool.waitForDeployment();
   console.log("BountyPool deployed to:", await bountyPool.getAddress());
 
+  // Deploy CompactSubmissionRegistry (bytes32 digest variant)
+  const CompactSubmissionRegistry = await hre.ethers.getContractFactory("CompactSubmissionRegistry");
+  const compactSubmissionRegistry = await CompactSubmissionRegistry.deploy();
+  await compactSubmissionRegistry.waitForDeployment();
+  const compactDeployReceipt = await compactSubmissionRegistry.deploymentTransaction().wait();
+  console.log("CompactSubmissionRegistry deployed to:", await compactSubmissionRegistry.getAddress());
+
   // Save deployment addresses
   const deploymentInfo = {
     network: hre.network.name,
@@ -35,6 +42,8 @@ async function main() {
     submissionRegistry: await submissionRegistry.getAddress(),
     verificationManager: await verificationManager.getAddress(),
     bountyPool: await bountyPool.getAddress(),
+    compactSubmissionRegistry: await compactSubmissionRegistry.getAddress(),
+    compactSubmissionRegistryBlock: compactDeployReceipt.blockNumber,
     deployedAt: new Date().toISOString()
   };
 
@@ -49,6 +58,7 @@ async function main() {
   console.log(`SubmissionRegistry: ${deploymentInfo.submissionRegistry}`);
   console.log(`VerificationManager: ${deploymentInfo.verificationManager}`);
   console.log(`BountyPool: ${deploymentInfo.bountyPool}`);
+  console.log(`CompactSubmissionRegistry: ${deploymentInfo.compactSubmissionRegistry}`);
   console.log("\nAddresses saved to ./deployments/addresses.json");
 }
 
@@ -4,22 +4,61 @@ Python deployment script using Web3.py
 Alternative to Hardhat deploy script for Python-first workflows
 """
 
+import argparse
+import hashlib
 import json
 import os
+import subprocess
+import rlp
+from datetime import datetime, timezone
 from web3 import Web3
 from eth_account import Account
 from config.blockchain_config import BlockchainConfig
 import sys
 
-def compile_contracts():
-    """Compile contracts using Hardhat and return ABI/bytecode"""
-    os.system("npx hardhat compile")
+CONTRACT_NAMES = ["SubmissionRegistry", "CompactSubmissionRegistry", "VerificationManager", "BountyPool", "MockUSDT"]
+SOURCE_HASH_PATH = "artifacts/.source-hash"
+
+# Chain IDs of local development nodes (Hardhat, Anvil) that support evm_setAutomine
+LOCAL_CHAIN_IDS = {31337}
+
+def source_hash() -> str:
+    """Hash of every contract source and the compiler configuration"""
+    digest = hashlib.sha256()
+    paths = ["hardhat.config.js"]
+    for root, _, files in os.walk("contracts"):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith(".sol"))
+    for path in sorted(paths):
+        digest.update(path.encode())
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def compile_contracts(force: bool = False):
+    """Compile contracts using Hardhat and return ABI/bytecode
+
+    Compilation is skipped when the sources hash to the value recorded by
+    the last successful compile and every artifact is still present.
+    """
+    current_hash = source_hash()
+    artifact_paths = {name: f"artifacts/contracts/{name}.sol/{name}.json" for name in CONTRACT_NAMES}
+
+    recorded_hash = None
+    if os.path.exists(SOURCE_HASH_PATH):
+        with open(SOURCE_HASH_PATH, "r") as f:
+            recorded_hash = f.read().strip()
+
+    if force or recorded_hash != current_hash or not all(os.path.exists(p) for p in artifact_paths.values()):
+        print("Compiling contracts...")
+        if subprocess.run(["npx", "hardhat", "compile"]).returncode != 0:
+            raise Exception("Contract compilation failed")
+        with open(SOURCE_HASH_PATH, "w") as f:
+            f.write(current_hash)
+    else:
+        print("Contracts unchanged since last compile, skipping")
 
     artifacts = {}
-    contract_names = ["SubmissionRegistry", "VerificationManager", "BountyPool", "MockUSDT"]
-
-    for name in contract_names:
-        artifact_path = f"artifacts/contracts/{name}.sol/{name}.json"
+    for name, artifact_path in artifact_paths.items():
         if os.path.exists(artifact_path):
             with open(artifact_path, 'r') as f:
                 artifact = json.load(f)
@@ -30,45 +69,41 @@ def compile_contracts():
 
     return artifacts
 
-def deploy_contract(w3, account, contract_name, artifacts, constructor_args=None):
-    """Deploy a single contract"""
-    print(f"Deploying {contract_name}...")
+def contract_address(deployer: str, nonce: int) -> str:
+    """Address of the contract CREATEd by deployer at nonce"""
+    encoded = rlp.encode([bytes.fromhex(deployer[2:]), nonce])
+    return Web3.to_checksum_address(Web3.keccak(encoded)[12:])
+
+def send_deployment(w3, account, contract_name, artifacts, nonce, gas_price, constructor_args=None):
+    """Sign and broadcast a contract deployment at a pre-assigned nonce"""
+    print(f"Deploying {contract_name} (nonce {nonce})...")
 
     contract = w3.eth.contract(
         abi=artifacts[contract_name]["abi"],
         bytecode=artifacts[contract_name]["bytecode"]
     )
 
-    # Build transaction
-    if constructor_args:
-        transaction = contract.constructor(*constructor_args).build_transaction({
-            'from': account.address,
-            'nonce': w3.eth.get_transaction_count(account.address),
-            'gas': 3000000,
-            'gasPrice': w3.eth.gas_price
-        })
-    else:
-        transaction = contract.constructor().build_transaction({
-            'from': account.address,
-            'nonce': w3.eth.get_transaction_count(account.address),
-            'gas': 3000000,
-            'gasPrice': w3.eth.gas_price
-        })
+    transaction = contract.constructor(*(constructor_args or [])).build_transaction({
+        'from': account.address,
+        'nonce': nonce,
+        'gas': 3000000,
+        'gasPrice': gas_price
+    })
 
     # Sign and send transaction
-    signed_txn = w3.eth.account.sign_transaction(transaction, account.private_key)
-    tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+    signed_txn = w3.eth.account.sign_transaction(transaction, account.key)
+    return w3.eth.send_raw_transaction(signed_txn.rawTransaction)
 
-    # Wait for transaction receipt
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-
-    if receipt.status == 1:
-        print(f"{contract_name} deployed to: {receipt.contractAddress}")
-        return receipt.contractAddress
-    else:
-        raise Exception(f"Failed to deploy {contract_name}")
+def set_automine(w3, enabled: bool) -> bool:
+    """Toggle automining on a local node; False if the node does not support it"""
+    response = w3.provider.make_request("evm_setAutomine", [enabled])
+    return "error" not in response
 
 def main():
+    parser = argparse.ArgumentParser(description="Deploy the POC contracts")
+    parser.add_argument("--force-compile", action="store_true", help="Compile even if sources are unchanged")
+    args = parser.parse_args()
+
     # Validate configuration
     try:
         BlockchainConfig.validate()
@@ -89,45 +124,78 @@ def main():
     print(f"Deploying from: {account.address}")
 
     # Compile contracts
-    print("Compiling contracts...")
-    artifacts = compile_contracts()
-
-    # Deploy contracts
+    artifacts = compile_contracts(force=args.force_compile)
+
+    # Every deployment gets its nonce up front, so addresses are known before sending
+    nonce = w3.eth.get_transaction_count(account.address, "pending")
+    gas_price = w3.eth.gas_price
+    mock_usdt_address = contract_address(account.address, nonce)
+
+    plan = [
+        ("mockUSDT", "MockUSDT", None),
+        ("submissionRegistry", "SubmissionRegistry", None),
+        ("verificationManager", "VerificationManager", None),
+        # BountyPool takes the MockUSDT address predicted from the deployer nonce
+        ("bountyPool", "BountyPool", [mock_usdt_address]),
+        # CompactSubmissionRegistry (bytes32 digest variant)
+        ("compactSubmissionRegistry", "CompactSubmissionRegistry", None)
+    ]
+
+    # On a local node, mine the whole batch into a single block
+    batched = w3.eth.chain_id in LOCAL_CHAIN_IDS and set_automine(w3, False)
+
+    tx_hashes = {}
+    try:
+        for offset, (key, contract_name, constructor_args) in enumerate(plan):
+            tx_hashes[key] = send_deployment(
+                w3, account, contract_name, artifacts, nonce + offset, gas_price, constructor_args
+            )
+        if batched:
+            response = w3.provider.make_request("evm_mine", [])
+            if "error" in response:
+                raise Exception(f"evm_mine failed: {response['error']}")
+    finally:
+        if batched:
+            set_automine(w3, True)
+
+    # Wait for every receipt before writing anything
     deployed_addresses = {}
+    deployed_blocks = {}
+    for offset, (key, contract_name, _) in enumerate(plan):
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hashes[key])
+        if receipt.status != 1:
+            raise Exception(f"Failed to deploy {contract_name}")
+        expected = contract_address(account.address, nonce + offset)
+        if receipt.contractAddress != expected:
+            raise Exception(f"{contract_name} deployed to {receipt.contractAddress}, expected {expected}")
+        deployed_addresses[key] = receipt.contractAddress
+        deployed_blocks[key] = receipt.blockNumber
+        print(f"{contract_name} deployed to: {receipt.contractAddress}")
 
-    # Deploy MockUSDT first
-    deployed_addresses["mockUSDT"] = deploy_contract(w3, account, "MockUSDT", artifacts)
-
-    # Deploy SubmissionRegistry
-    deployed_addresses["submissionRegistry"] = deploy_contract(w3, account, "SubmissionRegistry", artifacts)
-
-    # Deploy VerificationManager
-    deployed_addresses["verificationManager"] = deploy_contract(w3, account, "VerificationManager", artifacts)
-
-    # Deploy BountyPool with MockUSDT address
-    deployed_addresses["bountyPool"] = deploy_contract(
-        w3, account, "BountyPool", artifacts,
-        constructor_args=[deployed_addresses["mockUSDT"]]
-    )
-
-    # Save deployment info
+    # Save deployment info (same flat layout as scripts/deploy.js)
     deployment_info = {
         "network": BlockchainConfig.NETWORK,
-        "chainId": BlockchainConfig.CHAIN_ID,
+        "chainId": w3.eth.chain_id,
         "deployer": account.address,
-        "addresses": deployed_addresses,
-        "deployedAt": "2025-10-01"
+        **deployed_addresses,
+        "submissionRegistryBlock": deployed_blocks["submissionRegistry"],
+        "compactSubmissionRegistryBlock": deployed_blocks["compactSubmissionRegistry"],
+        "deployedAt": datetime.now(timezone.utc).isoformat()
     }
 
     os.makedirs("deployments", exist_ok=True)
-    with open("deployments/addresses.json", "w") as f:
+    temporary = "deployments/addresses.json.tmp"
+    with open(temporary, "w") as f:
         json.dump(deployment_info, f, indent=2)
+    os.replace(temporary, "deployments/addresses.json")
 
     print("\n=== Deployment Summary ===")
     print(f"Network: {deployment_info['network']}")
     for contract, address in deployed_addresses.items():
         print(f"{contract}: {address}")
+    blocks = sorted(set(deployed_blocks.values()))
+    print(f"Mined in {len(blocks)} block(s): {', '.join(map(str, blocks))}")
     print("\nAddresses saved to deployments/addresses.json")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,255 @@
+"""
+Pluggable sinks for decoded contract events
+Console output, or size/time-batched JSONL and Parquet files rotated by block range
+"""
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Columns present on every exported row
+COMMON_COLUMNS = [
+    ("block_number", "int64"),
+    ("log_index", "int64"),
+    ("block_hash", "string"),
+    ("transaction_hash", "string"),
+    ("contract", "string")
+]
+
+# (column, event argument, type) per event; uint256 values are exported as
+# decimal strings so JSONL and Parquet share the same lossless schema
+EVENT_SCHEMAS = {
+    "SubmissionRegistered": [
+        ("submission_id", "id", "uint256"),
+        ("submitter", "submitter", "address"),
+        ("content_hash", "contentHash", "string"),
+        ("uri", "uri", "string"),
+        ("mime", "mime", "string"),
+        ("timestamp", "timestamp", "int64")
+    ],
+    "SubmissionVerified": [
+        ("submission_id", "submissionId", "uint256"),
+        ("verifier", "verifier", "address"),
+        ("accepted", "accepted", "bool"),
+        ("reason_code", "reasonCode", "int64"),
+        ("timestamp", "timestamp", "int64")
+    ],
+    "BountyFunded": [
+        ("bounty_id", "bountyId", "uint256"),
+        ("amount", "amount", "uint256"),
+        ("funder", "funder", "address")
+    ],
+    "ClaimableSet": [
+        ("submission_id", "submissionId", "uint256"),
+        ("recipient", "recipient", "address"),
+        ("amount", "amount", "uint256")
+    ],
+    "PayoutClaimed": [
+        ("submission_id", "submissionId", "uint256"),
+        ("recipient", "recipient", "address"),
+        ("amount", "amount", "uint256")
+    ]
+}
+
+def event_to_row(event) -> dict:
+    """Flatten a decoded event into its export schema"""
+    row = {
+        "block_number": event["blockNumber"],
+        "log_index": event["logIndex"],
+        "block_hash": "0x" + bytes(event["blockHash"]).hex(),
+        "transaction_hash": "0x" + bytes(event["transactionHash"]).hex(),
+        "contract": event["address"]
+    }
+    for column, argument, column_type in EVENT_SCHEMAS[event["event"]]:
+        value = event["args"][argument]
+        if column_type == "uint256":
+            value = str(value)
+        elif column_type == "int64":
+            value = int(value)
+        elif column_type == "bool":
+            value = bool(value)
+        row[column] = value
+    return row
+
+class EventSink(ABC):
+    """Receives decoded events in (block_number, log_index) order"""
+
+    @abstractmethod
+    def write(self, event):
+        pass
+
+    def tick(self):
+        """Called while idle so time-based batches can be flushed"""
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class ConsoleSink(EventSink):
+    """Human-readable output, one print per event"""
+
+    def write(self, event):
+        args = event["args"]
+        name = event["event"]
+        if name == "SubmissionRegistered":
+            lines = ["📝 NEW SUBMISSION:",
+                     f"  ID: {args['id']}",
+                     f"  Submitter: {args['submitter']}",
+                     f"  Content Hash: {args['contentHash']}",
+                     f"  URI: {args['uri']}",
+                     f"  MIME: {args['mime']}"]
+        elif name == "SubmissionVerified":
+            lines = ["🔍 SUBMISSION VERIFIED:",
+                     f"  Submission ID: {args['submissionId']}",
+                     f"  Status: {'✅ ACCEPTED' if args['accepted'] else '❌ REJECTED'}",
+                     f"  Verifier: {args['verifier']}",
+                     f"  Reason Code: {args['reasonCode']}"]
+        elif name == "BountyFunded":
+            lines = ["💰 BOUNTY FUNDED:",
+                     f"  Bounty ID: {args['bountyId']}",
+                     f"  Amount: {args['amount'] / 10**6} USDT",
+                     f"  Funder: {args['funder']}"]
+        elif name == "ClaimableSet":
+            lines = ["🎯 CLAIMABLE SET:",
+                     f"  Submission ID: {args['submissionId']}",
+                     f"  Recipient: {args['recipient']}",
+                     f"  Amount: {args['amount'] / 10**6} USDT"]
+        else:
+            lines = ["💸 PAYOUT CLAIMED:",
+                     f"  Submission ID: {args['submissionId']}",
+                     f"  Recipient: {args['recipient']}",
+                     f"  Amount: {args['amount'] / 10**6} USDT"]
+        lines.append(f"  Block: {event['blockNumber']}")
+        print("\n" + "\n".join(lines), flush=True)
+
+class BatchedFileSink(EventSink):
+    """Buffers rows per event type and writes each batch as one file
+
+    A batch is written when it reaches max_rows, is older than max_seconds,
+    or the next row falls into a different block range of rotate_blocks
+    blocks. Files land in <out_dir>/<Event>/<range start>-<range end>/ and
+    are named after the first and last (block, log index) they contain, so
+    (block_number, log_index) is the row key for consumers. Each file is
+    written to a temporary name and renamed, so readers never see a
+    partial file.
+    """
+
+    extension = None
+
+    def __init__(self, out_dir: str, max_rows: int = 10000, max_seconds: float = 5,
+                 rotate_blocks: int = 10000):
+        self.out_dir = out_dir
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.rotate_blocks = rotate_blocks
+        self._buffers = {name: [] for name in EVENT_SCHEMAS}
+        self._started = {}
+
+    def write(self, event):
+        name = event["event"]
+        buffer = self._buffers[name]
+        if buffer and buffer[0]["block_number"] // self.rotate_blocks != event["blockNumber"] // self.rotate_blocks:
+            self._flush_event(name)
+            buffer = self._buffers[name]
+
+        if not buffer:
+            self._started[name] = time.monotonic()
+        buffer.append(event_to_row(event))
+
+        if len(buffer) >= self.max_rows:
+            self._flush_event(name)
+
+    def tick(self):
+        now = time.monotonic()
+        for name, buffer in self._buffers.items():
+            if buffer and now - self._started[name] >= self.max_seconds:
+                self._flush_event(name)
+
+    def flush(self):
+        for name in self._buffers:
+            self._flush_event(name)
+
+    def _flush_event(self, name: str):
+        rows = self._buffers[name]
+        if not rows:
+            return
+
+        range_start = rows[0]["block_number"] // self.rotate_blocks * self.rotate_blocks
+        directory = os.path.join(
+            self.out_dir, name, f"{range_start:012d}-{range_start + self.rotate_blocks - 1:012d}"
+        )
+        os.makedirs(directory, exist_ok=True)
+
+        first, last = rows[0], rows[-1]
+        filename = (f"{first['block_number']:012d}.{first['log_index']:05d}-"
+                    f"{last['block_number']:012d}.{last['log_index']:05d}.{self.extension}")
+        path = os.path.join(directory, filename)
+        temporary = path + ".tmp"
+
+        self._write_file(temporary, name, rows)
+        os.replace(temporary, path)
+        self._buffers[name] = []
+
+    @abstractmethod
+    def _write_file(self, path: str, name: str, rows):
+        pass
+
+class JsonlSink(BatchedFileSink):
+    extension = "jsonl"
+
+    def _write_file(self, path: str, name: str, rows):
+        with open(path, "w") as f:
+            f.write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+            f.flush()
+            os.fsync(f.fileno())
+
+class ParquetSink(BatchedFileSink):
+    extension = "parquet"
+
+    ARROW_TYPES = {
+        "int64": "int64",
+        "string": "string",
+        "uint256": "string",
+        "address": "string",
+        "bool": "bool_"
+    }
+
+    def __init__(self, *args, **kwargs):
+        if pa is None:
+            raise ImportError("Parquet output requires pyarrow: pip install -r requirements.txt")
+        super().__init__(*args, **kwargs)
+        self._schemas = {
+            name: pa.schema(
+                [(column, getattr(pa, self.ARROW_TYPES[column_type])()) for column, column_type in COMMON_COLUMNS]
+                + [(column, getattr(pa, self.ARROW_TYPES[column_type])()) for column, _, column_type in columns]
+            )
+            for name, columns in EVENT_SCHEMAS.items()
+        }
+
+    def _write_file(self, path: str, name: str, rows):
+        schema = self._schemas[name]
+        table = pa.Table.from_pylist(rows, schema=schema)
+        with open(path, "wb") as f:
+            pq.write_table(table, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+def make_sink(kind: str, out_dir: str = None, **options) -> EventSink:
+    """Build a sink by name: stdout, jsonl or parquet"""
+    if kind == "stdout":
+        return ConsoleSink()
+    if kind == "jsonl":
+        return JsonlSink(out_dir, **options)
+    if kind == "parquet":
+        return ParquetSink(out_dir, **options)
+    raise ValueError(f"Unknown sink '{kind}', expected stdout, jsonl or parquet")
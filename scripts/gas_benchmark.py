@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Gas regression benchmark for the contracts in contracts/
+Deploys a fresh set on a local node, measures each function across input sizes and compares to a baseline
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from web3 import Web3
+from eth_account import Account
+from config.blockchain_config import BlockchainConfig
+from content_codec import pack_content_hash
+from deploy import LOCAL_CHAIN_IDS, compile_contracts, contract_address, send_deployment, source_hash
+from submission_relay import BATCH_BASE_GAS, domain_separator, estimate_item_gas, sign_submission
+
+BASELINE_PATH = "benchmarks/gas_baseline.json"
+
+CONTENT_HASH = "QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG"
+MIME_TYPE = "image/png"
+RECIPIENT = "0x000000000000000000000000000000000000bEEF"
+URI_LENGTHS = (32, 128, 512, 2048)
+ANCHOR_COUNTS = (1, 1000, 1000000)
+RELAY_BATCH_SIZES = (1, 10, 50)
+AMOUNT = 100 * 10**6
+
+class Benchmark:
+    """Sends each benchmark case as one transaction and keeps its gasUsed"""
+
+    def __init__(self, w3, account):
+        self.w3 = w3
+        self.account = account
+        self.results = {}
+
+    def send(self, function_call, case: str = None, gas: int = 3000000):
+        """Send a transaction; measured when a case name is given"""
+        transaction = function_call.build_transaction({
+            'from': self.account.address,
+            'nonce': self.w3.eth.get_transaction_count(self.account.address),
+            'gas': gas,
+            'gasPrice': self.w3.eth.gas_price
+        })
+        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
+        tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt.status != 1:
+            raise Exception(f"{case or function_call.fn_name} reverted in {tx_hash.hex()}")
+        if case:
+            self.results[case] = receipt.gasUsed
+            print(f"  {case:<40} {receipt.gasUsed:>10,}")
+        return receipt
+
+def deploy(w3, account, artifacts):
+    """Deploy a fresh copy of every contract, so storage starts empty on each run"""
+    nonce = w3.eth.get_transaction_count(account.address)
+    gas_price = w3.eth.gas_price
+    plan = [
+        ("mock_usdt", "MockUSDT", None),
+        ("submission_registry", "SubmissionRegistry", None),
+        ("compact_submission_registry", "CompactSubmissionRegistry", None),
+        ("verification_manager", "VerificationManager", None),
+        ("bounty_pool", "BountyPool", [contract_address(account.address, nonce)])
+    ]
+
+    contracts = {}
+    for offset, (key, contract_name, constructor_args) in enumerate(plan):
+        tx_hash = send_deployment(w3, account, contract_name, artifacts, nonce + offset, gas_price, constructor_args)
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt.status != 1:
+            raise Exception(f"Failed to deploy {contract_name}")
+        contracts[key] = w3.eth.contract(address=receipt.contractAddress, abi=artifacts[contract_name]["abi"])
+    return contracts
+
+def run_cases(bench: Benchmark, contracts):
+    """Every case runs in the same order against the same starting state
+
+    A warm-up call precedes each group, so counters are already non-zero and
+    each measured call pays the steady-state cost a production call pays.
+    """
+    registry = contracts["submission_registry"]
+    compact = contracts["compact_submission_registry"]
+    verification_manager = contracts["verification_manager"]
+    bounty_pool = contracts["bounty_pool"]
+    mock_usdt = contracts["mock_usdt"]
+
+    print("\nSubmissionRegistry")
+    bench.send(registry.functions.registerSubmission(CONTENT_HASH, "ipfs://warm-up", MIME_TYPE))
+    for length in URI_LENGTHS:
+        bench.send(registry.functions.registerSubmission(CONTENT_HASH, _uri(length), MIME_TYPE),
+                   f"registerSubmission/uri_{length}")
+
+    bench.send(registry.functions.anchorBatch(Web3.keccak(text="warm-up"), 0, 1))
+    first_index = 1
+    for count in ANCHOR_COUNTS:
+        bench.send(registry.functions.anchorBatch(Web3.keccak(text=f"batch-{count}"), first_index, count),
+                   f"anchorBatch/count_{count}")
+        first_index += count
+
+    # Relayed batches, measured per transaction; divide by the size for the cost per submission
+    separator = domain_separator(bench.w3.eth.chain_id, registry.address)
+    nonces = iter(range(10**6))
+    def signed_batch(size: int):
+        items = []
+        for _ in range(size):
+            item = {
+                "submitter": bench.account.address,
+                "content_hash": CONTENT_HASH,
+                "uri": _uri(128),
+                "mime_type": MIME_TYPE,
+                "nonce": next(nonces),
+                "deadline": 2**64
+            }
+            item["signature"] = sign_submission(bench.account.key, separator, item)
+            items.append(item)
+        gas = BATCH_BASE_GAS + sum(estimate_item_gas(item) for item in items)
+        return registry.functions.registerSubmissionsFor([
+            (item["submitter"], item["content_hash"], item["uri"], item["mime_type"],
+             item["nonce"], item["deadline"], Web3.to_bytes(hexstr=item["signature"]))
+            for item in items
+        ]), gas
+
+    bench.send(*signed_batch(1))
+    for size in RELAY_BATCH_SIZES:
+        function_call, gas = signed_batch(size)
+        bench.send(function_call, f"registerSubmissionsFor/batch_{size}", gas)
+
+    print("\nCompactSubmissionRegistry")
+    bench.send(compact.functions.registerMimeType("text/plain"))
+    bench.send(compact.functions.registerMimeType(MIME_TYPE), "registerMimeType")
+    digest, content_format = pack_content_hash(CONTENT_HASH)
+    bench.send(compact.functions.registerSubmission(digest, content_format, "ipfs://warm-up", 2))
+    for length in URI_LENGTHS:
+        bench.send(compact.functions.registerSubmission(digest, content_format, _uri(length), 2),
+                   f"compact.registerSubmission/uri_{length}")
+
+    print("\nVerificationManager")
+    bench.send(verification_manager.functions.setVerification(0, True, 0))
+    bench.send(verification_manager.functions.setVerification(1, True, 0), "setVerification/accepted")
+    bench.send(verification_manager.functions.setVerification(2, False, 3), "setVerification/rejected")
+
+    print("\nBountyPool")
+    bench.send(mock_usdt.functions.approve(bounty_pool.address, 10 * AMOUNT), "approve")
+    bench.send(bounty_pool.functions.fundBounty(0, AMOUNT))
+    bench.send(bounty_pool.functions.fundBounty(1, AMOUNT), "fundBounty/new_bounty")
+    bench.send(bounty_pool.functions.fundBounty(1, AMOUNT), "fundBounty/top_up")
+    bench.send(bounty_pool.functions.markClaimable(0, RECIPIENT, AMOUNT // 10))
+    bench.send(bounty_pool.functions.markClaimable(1, RECIPIENT, AMOUNT // 10), "markClaimable")
+    # The first payout to a recipient creates its token balance; later ones only add to it
+    bench.send(bounty_pool.functions.claim(0, RECIPIENT), "claim/first_payout")
+    bench.send(bounty_pool.functions.claim(1, RECIPIENT), "claim/repeat_recipient")
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print the comparison table; False if any case regressed beyond threshold percent"""
+    print(f"\n{'case':<40} {'baseline':>10} {'current':>10} {'delta':>8}")
+    regressions = []
+    for case, gas in results.items():
+        expected = baseline.get(case)
+        if expected is None:
+            print(f"{case:<40} {'-':>10} {gas:>10,} {'new':>8}")
+            continue
+        change = (gas - expected) / expected * 100
+        marker = " ❌" if change > threshold else ""
+        print(f"{case:<40} {expected:>10,} {gas:>10,} {change:>+7.2f}%{marker}")
+        if change > threshold:
+            regressions.append(case)
+    for case in baseline:
+        if case not in results:
+            print(f"{case:<40} {baseline[case]:>10,} {'-':>10} {'removed':>8}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) use more than {threshold}% more gas than the baseline: "
+              f"{', '.join(regressions)}")
+        print("If the increase is intended, re-run with --update-baseline and commit the new baseline")
+        return False
+    print(f"\n✅ No case exceeds the baseline by more than {threshold}%")
+    return True
+
+def _uri(length: int) -> str:
+    prefix = "ipfs://"
+    return prefix + "x" * (length - len(prefix))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure contract gas and fail on regressions")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=1.0,
+                        help="Allowed increase per case, in percent of the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the measured values as the baseline")
+    parser.add_argument("--force-compile", action="store_true", help="Compile even if sources are unchanged")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Report the measurements and exit 0 when no baseline is recorded")
+    args = parser.parse_args()
+
+    w3 = Web3(Web3.HTTPProvider(BlockchainConfig.RPC_URL))
+    if not w3.is_connected():
+        print("Failed to connect to blockchain")
+        sys.exit(1)
+    if w3.eth.chain_id not in LOCAL_CHAIN_IDS:
+        # The benchmark deploys a fresh set of contracts on every run
+        print(f"Refusing to run on chain {w3.eth.chain_id}; start a local node (npx hardhat node)")
+        sys.exit(1)
+
+    account = Account.from_key(BlockchainConfig.PRIVATE_KEY)
+    artifacts = compile_contracts(force=args.force_compile)
+    bench = Benchmark(w3, account)
+    run_cases(bench, deploy(w3, account, artifacts))
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+                "source_hash": source_hash(),
+                "cases": bench.results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        # A check without a baseline would pass any regression, so it fails unless explicitly allowed
+        print(f"\n{'case':<40} {'current':>10}")
+        for case, gas_used in bench.results.items():
+            print(f"{case:<40} {gas_used:>10,}")
+        print(f"\n❌ No baseline at {args.baseline}; record it with --update-baseline and commit it")
+        sys.exit(0 if args.allow_missing_baseline else 1)
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    if baseline.get("source_hash") != source_hash():
+        print("\nContract sources changed since the baseline was recorded")
+    if not compare(bench.results, baseline["cases"], args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
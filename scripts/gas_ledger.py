@@ -0,0 +1,140 @@
+"""
+Gas accounting for the transactions this API pays for
+One row per mined transaction (SQLite), aggregated by function and payload size on read
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Upper bounds of the gasUsed histogram buckets; the last bucket is open-ended
+GAS_BUCKETS = (25000, 50000, 75000, 100000, 150000, 200000, 300000, 500000, 1000000)
+
+class GasLedger:
+    """Records gasUsed and the effective gas price of every mined transaction
+
+    Rows are keyed by transaction hash, so a receipt seen twice (a retried
+    request re-attaching to its transaction, or two workers waiting on the
+    same nonce) is only counted once. Payload size is the calldata length,
+    bucketed by powers of two, which separates e.g. short and long URIs.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS gas_usage (
+                transaction_hash TEXT PRIMARY KEY,
+                function TEXT NOT NULL,
+                payload_bytes INTEGER NOT NULL,
+                payload_bucket INTEGER NOT NULL,
+                gas_used INTEGER NOT NULL,
+                gas_limit INTEGER,
+                effective_gas_price INTEGER NOT NULL,
+                fee_wei INTEGER NOT NULL,
+                succeeded INTEGER NOT NULL,
+                block_number INTEGER NOT NULL,
+                recorded_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS gas_usage_function ON gas_usage (function, recorded_at);
+        """)
+
+    def record(self, function: str, payload_bytes: int, receipt, gas_limit: int = None, gas_price: int = None):
+        """Add a mined transaction; gas_price is used when the receipt has no effectiveGasPrice"""
+        price = receipt.get("effectiveGasPrice", gas_price) or 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO gas_usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    "0x" + bytes(receipt["transactionHash"]).hex(),
+                    function or "unknown",
+                    payload_bytes,
+                    _payload_bucket(payload_bytes),
+                    receipt["gasUsed"],
+                    gas_limit,
+                    price,
+                    receipt["gasUsed"] * price,
+                    int(receipt["status"] == 1),
+                    receipt["blockNumber"],
+                    time.time()
+                )
+            )
+
+    def summary(self, function: str = None, since: float = None):
+        """Totals, gasUsed histogram and payload-size breakdown per function"""
+        where, params = [], []
+        if function:
+            where.append("function = ?")
+            params.append(function)
+        if since:
+            where.append("recorded_at >= ?")
+            params.append(since)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        bucket_case = "CASE " + " ".join(
+            f"WHEN gas_used <= {bound} THEN {bound}" for bound in GAS_BUCKETS
+        ) + " ELSE NULL END"
+
+        with self._lock:
+            totals = self._conn.execute(
+                "SELECT function, COUNT(*), SUM(1 - succeeded), SUM(gas_used), MIN(gas_used), MAX(gas_used), "
+                "TOTAL(fee_wei), MAX(gas_limit) "
+                f"FROM gas_usage {clause} GROUP BY function ORDER BY function", params
+            ).fetchall()
+            histogram = self._conn.execute(
+                f"SELECT function, {bucket_case} AS bucket, COUNT(*) "
+                f"FROM gas_usage {clause} GROUP BY function, bucket", params
+            ).fetchall()
+            by_size = self._conn.execute(
+                "SELECT function, payload_bucket, COUNT(*), SUM(gas_used), MIN(gas_used), MAX(gas_used) "
+                f"FROM gas_usage {clause} GROUP BY function, payload_bucket ORDER BY function, payload_bucket", params
+            ).fetchall()
+
+        functions = {}
+        for name, count, reverted, gas_used, gas_min, gas_max, fee_wei, gas_limit in totals:
+            functions[name] = {
+                "count": count,
+                "reverted": reverted,
+                "gas_used_total": gas_used,
+                "gas_used_avg": round(gas_used / count),
+                "gas_used_min": gas_min,
+                "gas_used_max": gas_max,
+                # Largest gas limit sent, to compare against gas_used_max
+                "gas_limit_max": gas_limit,
+                "fee_total_eth": fee_wei / 10**18,
+                "effective_gas_price_avg_gwei": round(fee_wei / gas_used / 10**9, 4) if gas_used else 0,
+                "gas_histogram": [{"le": bound, "count": 0} for bound in GAS_BUCKETS] + [{"le": None, "count": 0}],
+                "by_payload_size": []
+            }
+        for name, bucket, count in histogram:
+            index = GAS_BUCKETS.index(bucket) if bucket is not None else len(GAS_BUCKETS)
+            functions[name]["gas_histogram"][index]["count"] = count
+        for name, bucket, count, gas_used, gas_min, gas_max in by_size:
+            functions[name]["by_payload_size"].append({
+                "payload_bytes_le": bucket,
+                "count": count,
+                "gas_used_avg": round(gas_used / count),
+                "gas_used_min": gas_min,
+                "gas_used_max": gas_max
+            })
+
+        return {
+            "transactions": sum(entry["count"] for entry in functions.values()),
+            "gas_used_total": sum(entry["gas_used_total"] for entry in functions.values()),
+            "fee_total_eth": sum(entry["fee_total_eth"] for entry in functions.values()),
+            "functions": functions
+        }
+
+def _payload_bucket(size: int) -> int:
+    """Smallest power of two >= size (calldata of a call without arguments is 4 bytes)"""
+    bucket = 4
+    while bucket < size:
+        bucket *= 2
+    return bucket
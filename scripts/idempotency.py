@@ -0,0 +1,152 @@
+"""
+Idempotency-Key support for POST endpoints
+ASGI middleware backed by IdempotencyStore
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from starlette.concurrency import run_in_threadpool
+from idempotency_store import ContentMismatch, IdempotentRequest, ReplayCompleted, current_request
+
+MISMATCH_DETAIL = "Idempotency-Key was already used with a different request"
+
+class IdempotencyMiddleware:
+    """Deduplicates POST requests carrying an Idempotency-Key header
+
+    - completed keys replay the stored response
+    - keys in progress elsewhere wait for that request to finish
+    - otherwise the request runs with an IdempotentRequest in context, so
+      BlockchainClient re-attaches to any transaction already sent for it
+
+    Bodies of streaming_paths (uploads) are not buffered. Their fingerprint
+    only covers the media type (multipart boundaries differ between
+    retries), and the handler binds the key to the body's digest through
+    IdempotentRequest.check_content once it has hashed the stream. A retry
+    of a completed key is therefore run up to that check, then replayed or
+    rejected depending on the digest.
+    """
+
+    def __init__(self, app, store, wait_seconds: float = 180, poll_interval: float = 0.5, streaming_paths=()):
+        self.app = app
+        self.store = store
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self.streaming_paths = set(streaming_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key")
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        key = key.decode("latin-1")
+
+        streaming = scope["path"] in self.streaming_paths
+        if streaming:
+            body = headers.get(b"content-type", b"").split(b";")[0].strip()
+        else:
+            # Buffer the request body so it can be fingerprinted and replayed
+            body = b""
+            while True:
+                message = await receive()
+                body += message.get("body", b"")
+                if not message.get("more_body", False):
+                    break
+
+        fingerprint = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), scope["query_string"], body])
+        ).hexdigest()
+
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            state, record = await run_in_threadpool(self.store.claim, key, fingerprint)
+            if state == "claimed":
+                break
+            if state == "completed":
+                if streaming:
+                    await self._replay_streaming(scope, receive, send, key, record)
+                else:
+                    await _send_json(send, record["status_code"], record["response"], replayed=True)
+                return
+            if state == "mismatch":
+                await _send_json(send, 422, {"detail": MISMATCH_DETAIL})
+                return
+            if time.monotonic() >= deadline:
+                await _send_json(send, 409, {
+                    "detail": "A request with this Idempotency-Key is still in progress"
+                })
+                return
+            await asyncio.sleep(self.poll_interval)
+
+        owner = record["owner"]
+        response = {"status": 500, "body": b""}
+        body_replayed = False
+
+        async def replay_receive():
+            nonlocal body_replayed
+            if body_replayed or streaming:
+                return await receive()
+            body_replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        async def renew_lease():
+            # Receipt and confirmation waits can outlast the lease; a retry must not take the key over meanwhile
+            while True:
+                await asyncio.sleep(self.store.lease_seconds / 3)
+                await run_in_threadpool(self.store.renew, key, owner)
+
+        renewer = asyncio.create_task(renew_lease())
+        token = current_request.set(IdempotentRequest(self.store, key))
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except ContentMismatch:
+            await _send_json(send, 422, {"detail": MISMATCH_DETAIL})
+        finally:
+            renewer.cancel()
+            current_request.reset(token)
+            try:
+                content = json.loads(response["body"] or b"null")
+            except ValueError:
+                content = None
+
+            if 200 <= response["status"] < 300 and content is not None:
+                await run_in_threadpool(self.store.complete, key, owner, response["status"], content)
+            else:
+                await run_in_threadpool(self.store.release, key, owner)
+
+    async def _replay_streaming(self, scope, receive, send, key: str, record: dict):
+        """Run a streamed retry of a completed key until the handler has checked its content"""
+        token = current_request.set(IdempotentRequest(self.store, key, completed=record))
+        try:
+            await self.app(scope, receive, send)
+        except ReplayCompleted:
+            await _send_json(send, record["status_code"], record["response"], replayed=True)
+        except ContentMismatch:
+            await _send_json(send, 422, {"detail": MISMATCH_DETAIL})
+        finally:
+            current_request.reset(token)
+
+async def _send_json(send, status_code: int, content, replayed: bool = False):
+    body = json.dumps(content).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode())
+    ]
+    if replayed:
+        headers.append((b"idempotent-replayed", b"true"))
+
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,260 @@
+"""
+Persisted idempotency key store (SQLite)
+Maps each Idempotency-Key to its in-flight transactions and final response
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from tx_coordination import _new_owner, _owner_alive, _retire_owner
+
+# Set for the duration of a request carrying an Idempotency-Key header
+current_request = ContextVar("idempotent_request", default=None)
+
+class ContentMismatch(Exception):
+    """The key was already used with a different streamed body"""
+
+class ReplayCompleted(Exception):
+    """The streamed body matches a request that already completed under the key"""
+
+    def __init__(self, record: dict):
+        super().__init__("Idempotent request already completed")
+        self.record = record
+
+class IdempotentRequest:
+    """Per-request handle used by BlockchainClient to attach to recorded transactions
+
+    completed is the stored response when a streamed request is re-run only
+    to check its content against a completed key.
+    """
+
+    def __init__(self, store, key: str, completed: dict = None):
+        self.store = store
+        self.key = key
+        self.completed = completed
+        self._step = 0
+        # Threadpool calls of one request (e.g. gathered batches) share this object
+        self._lock = threading.Lock()
+
+    def next_step(self) -> int:
+        """Sequence number of the next transaction sent by this request"""
+        with self._lock:
+            step = self._step
+            self._step += 1
+        return step
+
+    def reserve_steps(self, count: int) -> int:
+        """Take count consecutive step numbers at once and return the first
+
+        For transactions sent concurrently: each gets a fixed step from its
+        position, so a retry re-attaches every one to its own transactions
+        whatever order the threads run in.
+        """
+        with self._lock:
+            first = self._step
+            self._step += count
+        return first
+
+    def check_content(self, content_digest: str):
+        """Bind the digest of a streamed body to the key, once the handler has computed it
+
+        Streamed bodies are fingerprinted without their bytes. Raises
+        ContentMismatch if the key is bound to other content, and
+        ReplayCompleted if this content already completed under the key.
+        """
+        if not self.store.bind_content(self.key, content_digest):
+            raise ContentMismatch(self.key)
+        if self.completed is not None:
+            raise ReplayCompleted(self.completed)
+
+    def get_transactions(self, step: int):
+        return self.store.get_transactions(self.key, step)
+
+    def record_transaction(self, step: int, tx_hash: bytes, raw_tx: bytes):
+        self.store.record_transaction(self.key, step, tx_hash, raw_tx)
+
+    def forget_transaction(self, step: int, tx_hash: bytes):
+        self.store.forget_transaction(self.key, step, tx_hash)
+
+class IdempotencyStore:
+    """SQLite-backed idempotency records
+
+    A key is claimed with a lease while its request is being processed.
+    Signed transactions are recorded before broadcast, so a retry attaches
+    to them instead of sending new ones. Successful responses are stored
+    and replayed for later duplicates.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, lease_seconds: float):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                status TEXT NOT NULL,
+                owner TEXT,
+                lease_expires REAL,
+                status_code INTEGER,
+                response TEXT,
+                content_digest TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS idempotency_transactions (
+                key TEXT NOT NULL,
+                step INTEGER NOT NULL,
+                tx_hash BLOB NOT NULL,
+                raw_tx BLOB NOT NULL,
+                PRIMARY KEY (key, step, tx_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_idempotency_created ON idempotency_keys (created_at);
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(idempotency_keys)")]
+        if "content_digest" not in columns:
+            try:
+                self._conn.execute("ALTER TABLE idempotency_keys ADD COLUMN content_digest TEXT")
+            except sqlite3.OperationalError:
+                # Added by another worker meanwhile
+                pass
+        self.purge_expired()
+
+    def claim(self, key: str, fingerprint: str):
+        """Try to take ownership of a key
+
+        Returns (state, record) where state is one of "claimed", "completed",
+        "mismatch" or "busy".
+        """
+        now = time.time()
+        owner = _new_owner()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, status, owner, lease_expires, status_code, response "
+                    "FROM idempotency_keys WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO idempotency_keys (key, fingerprint, status, owner, lease_expires, created_at) "
+                        "VALUES (?, ?, 'in_progress', ?, ?, ?)",
+                        (key, fingerprint, owner, now + self.lease_seconds, now)
+                    )
+                    state, record = "claimed", {"owner": owner}
+                else:
+                    stored_fingerprint, status, current_owner, lease_expires, status_code, response = row
+                    if stored_fingerprint != fingerprint:
+                        state, record = "mismatch", None
+                    elif status == "completed":
+                        state, record = "completed", {"status_code": status_code, "response": json.loads(response)}
+                    elif status == "in_progress" and lease_expires > now and _owner_alive(current_owner):
+                        state, record = "busy", None
+                    else:
+                        # Released, expired or abandoned by a dead process
+                        self._conn.execute(
+                            "UPDATE idempotency_keys SET status = 'in_progress', owner = ?, lease_expires = ? "
+                            "WHERE key = ?",
+                            (owner, now + self.lease_seconds, key)
+                        )
+                        state, record = "claimed", {"owner": owner}
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if state != "claimed":
+            _retire_owner(owner)
+        return state, record
+
+    def complete(self, key: str, owner: str, status_code: int, response: dict):
+        """Store the final response for a key"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET status = 'completed', status_code = ?, response = ?, "
+                "lease_expires = NULL WHERE key = ? AND owner = ?",
+                (status_code, json.dumps(response), key, owner)
+            )
+        _retire_owner(owner)
+
+    def renew(self, key: str, owner: str) -> bool:
+        """Extend the lease of a key still being processed by owner"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE idempotency_keys SET lease_expires = ? WHERE key = ? AND owner = ? AND status = 'in_progress'",
+                (time.time() + self.lease_seconds, key, owner)
+            ).rowcount > 0
+
+    def release(self, key: str, owner: str):
+        """Give up ownership after a failed attempt so a retry can resume"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET status = 'released', lease_expires = NULL "
+                "WHERE key = ? AND owner = ?",
+                (key, owner)
+            )
+        _retire_owner(owner)
+
+    def bind_content(self, key: str, content_digest: str) -> bool:
+        """Bind a content digest to a key on first use; False if another one is bound"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET content_digest = ? WHERE key = ? AND content_digest IS NULL",
+                (content_digest, key)
+            )
+            row = self._conn.execute(
+                "SELECT content_digest FROM idempotency_keys WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and row[0] == content_digest
+
+    def get_transactions(self, key: str, step: int):
+        """Return every (tx_hash, raw_tx) recorded for a request step, oldest first
+
+        A step has several entries when its transaction was replaced with
+        higher fees.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tx_hash, raw_tx FROM idempotency_transactions WHERE key = ? AND step = ? ORDER BY rowid",
+                (key, step)
+            ).fetchall()
+        return [(bytes(tx_hash), bytes(raw_tx)) for tx_hash, raw_tx in rows]
+
+    def record_transaction(self, key: str, step: int, tx_hash: bytes, raw_tx: bytes):
+        """Record a signed transaction before it is broadcast"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO idempotency_transactions (key, step, tx_hash, raw_tx) VALUES (?, ?, ?, ?)",
+                (key, step, bytes(tx_hash), bytes(raw_tx))
+            )
+
+    def forget_transaction(self, key: str, step: int, tx_hash: bytes):
+        """Drop a recorded transaction the node rejected, so a retry does not re-attach to it"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM idempotency_transactions WHERE key = ? AND step = ? AND tx_hash = ?",
+                (key, step, bytes(tx_hash))
+            )
+
+    def purge_expired(self):
+        """Remove keys older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM idempotency_transactions WHERE key IN "
+                "(SELECT key FROM idempotency_keys WHERE created_at < ?)",
+                (cutoff,)
+            )
+            self._conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (cutoff,))
@@ -1,77 +1,185 @@
 #!/usr/bin/env python3
 """
 Event listener for monitoring blockchain events
-Useful for debugging and monitoring the POC
+Useful for debugging and monitoring the POC, and for exporting event history
 """
 
+import argparse
 import time
-from blockchain_client import BlockchainClient
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from web3 import Web3
+from config.blockchain_config import BlockchainConfig
+from blockchain_client import load_contracts
+from bounty_analytics import event_signature
+from content_codec import decode_content_hash
+from event_sinks import make_sink
+from rpc_router import RoutingProvider
 
-def listen_to_events():
-    """Listen to all contract events"""
-    print("🎧 Starting event listener...")
+class EventReader:
+    """Read-only access to the deployed contracts
+
+    Unlike BlockchainClient it needs no account and starts no head tracker,
+    supervisor or stores, so exporting does not touch the API's databases.
+    """
+
+    def __init__(self):
+        self.w3 = Web3(RoutingProvider(
+            BlockchainConfig.RPC_URLS,
+            timeout=BlockchainConfig.RPC_TIMEOUT,
+            hedge_min_delay=BlockchainConfig.RPC_HEDGE_MIN_DELAY_MS / 1000,
+            failure_cooldown=BlockchainConfig.RPC_FAILURE_COOLDOWN
+        ))
+        self.compact_registry = BlockchainConfig.SUBMISSION_REGISTRY_MODE == "compact"
+        self.contracts, _ = load_contracts(self.w3, self.compact_registry)
+        self._mime_types = {}
+
+    def mime_type(self, code: int) -> str:
+        """Resolve a compact registry MIME code; codes never change once registered"""
+        if code not in self._mime_types:
+            self._mime_types[code] = self.contracts["compact_submission_registry"].functions.mimeTypes(code).call()
+        return self._mime_types[code]
+
+def event_sources(client):
+    """Map (contract address, topic0) to the event decoder for every exported event"""
+    watched = [
+        ("verification_manager", "SubmissionVerified"),
+        ("bounty_pool", "BountyFunded"),
+        ("bounty_pool", "ClaimableSet"),
+        ("bounty_pool", "PayoutClaimed")
+    ]
+    if client.compact_registry:
+        watched.append(("compact_submission_registry", "SubmissionRegistered"))
+    else:
+        watched.append(("submission_registry", "SubmissionRegistered"))
+
+    sources = {}
+    for contract_key, event_name in watched:
+        contract = client.contracts[contract_key]
+        topic = client.w3.keccak(text=event_signature(contract, event_name))
+        sources[(contract.address, topic)] = contract.events[event_name]()
+    return sources
+
+def normalize(client, event):
+    """Decode compact registry events into the standard SubmissionRegistered shape"""
+    if event["event"] != "SubmissionRegistered" or "contentDigest" not in event["args"]:
+        return event
+
+    args = dict(event["args"])
+    args["contentHash"] = decode_content_hash(args.pop("contentDigest"), args.pop("contentFormat"))
+    args["mime"] = client.mime_type(args.pop("mimeCode"))
+    return {**event, "args": args}
+
+def fetch_events(client, sources, from_block: int, to_block: int):
+    """Decoded events of every source in a block range, in chain order
+
+    Ranges the node refuses (too many results) are split in half and retried.
+    """
+    try:
+        logs = client.w3.eth.get_logs({
+            "address": sorted({address for address, _ in sources}),
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [sorted({topic for _, topic in sources})]
+        })
+    except ValueError:
+        if from_block == to_block:
+            raise
+        middle = (from_block + to_block) // 2
+        return (fetch_events(client, sources, from_block, middle)
+                + fetch_events(client, sources, middle + 1, to_block))
+
+    events = []
+    for log in logs:
+        decoder = sources.get((log["address"], log["topics"][0]))
+        if decoder is not None:
+            events.append(normalize(client, decoder.process_log(log)))
+    events.sort(key=lambda event: (event["blockNumber"], event["logIndex"]))
+    return events
+
+def backfill(client, sink, from_block: int, to_block: int, chunk_size: int, workers: int):
+    """Export a block range with several eth_getLogs chunks in flight
+
+    At most 2 * workers chunks are fetched ahead of the sink, so memory
+    stays bounded however long the range is.
+    """
+    sources = event_sources(client)
+    chunks = [(start, min(start + chunk_size - 1, to_block)) for start in range(from_block, to_block + 1, chunk_size)]
+    exported = 0
+    started = time.monotonic()
+
+    print(f"📦 Backfilling blocks {from_block}-{to_block} in {len(chunks)} chunks...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Results are consumed in submission order, so the sink still sees chain order
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(fetch_events, client, sources, *chunk))
+            if len(in_flight) < 2 * workers:
+                continue
+            exported += _write_events(sink, in_flight.popleft().result())
+        while in_flight:
+            exported += _write_events(sink, in_flight.popleft().result())
+    sink.close()
 
-    client = BlockchainClient()
+    elapsed = time.monotonic() - started
+    print(f"✅ Exported {exported} events in {elapsed:.1f}s")
 
-    # Create event filters
-    submission_filter = client.contracts["submission_registry"].events.SubmissionRegistered.create_filter(fromBlock="latest")
-    verification_filter = client.contracts["verification_manager"].events.SubmissionVerified.create_filter(fromBlock="latest")
-    bounty_funded_filter = client.contracts["bounty_pool"].events.BountyFunded.create_filter(fromBlock="latest")
-    claimable_filter = client.contracts["bounty_pool"].events.ClaimableSet.create_filter(fromBlock="latest")
-    payout_filter = client.contracts["bounty_pool"].events.PayoutClaimed.create_filter(fromBlock="latest")
+def _write_events(sink, events) -> int:
+    for event in events:
+        sink.write(event)
+    return len(events)
+
+def listen_to_events(client, sink, confirmations: int, poll_interval: float):
+    """Follow new events from the current head"""
+    print("🎧 Starting event listener...")
+    sources = event_sources(client)
+    cursor = client.w3.eth.block_number - confirmations
 
     print("Listening for events... (Press Ctrl+C to stop)")
 
     try:
         while True:
-            # Check for new submission events
-            for event in submission_filter.get_new_entries():
-                print(f"\n📝 NEW SUBMISSION:")
-                print(f"  ID: {event['args']['id']}")
-                print(f"  Submitter: {event['args']['submitter']}")
-                print(f"  Content Hash: {event['args']['contentHash']}")
-                print(f"  URI: {event['args']['uri']}")
-                print(f"  MIME: {event['args']['mime']}")
-                print(f"  Block: {event['blockNumber']}")
-
-            # Check for verification events
-            for event in verification_filter.get_new_entries():
-                status = "✅ ACCEPTED" if event['args']['accepted'] else "❌ REJECTED"
-                print(f"\n🔍 SUBMISSION VERIFIED:")
-                print(f"  Submission ID: {event['args']['submissionId']}")
-                print(f"  Status: {status}")
-                print(f"  Verifier: {event['args']['verifier']}")
-                print(f"  Reason Code: {event['args']['reasonCode']}")
-                print(f"  Block: {event['blockNumber']}")
-
-            # Check for bounty funding events
-            for event in bounty_funded_filter.get_new_entries():
-                print(f"\n💰 BOUNTY FUNDED:")
-                print(f"  Bounty ID: {event['args']['bountyId']}")
-                print(f"  Amount: {event['args']['amount'] / 10**6} USDT")
-                print(f"  Funder: {event['args']['funder']}")
-                print(f"  Block: {event['blockNumber']}")
-
-            # Check for claimable events
-            for event in claimable_filter.get_new_entries():
-                print(f"\n🎯 CLAIMABLE SET:")
-                print(f"  Submission ID: {event['args']['submissionId']}")
-                print(f"  Recipient: {event['args']['recipient']}")
-                print(f"  Amount: {event['args']['amount'] / 10**6} USDT")
-                print(f"  Block: {event['blockNumber']}")
-
-            # Check for payout events
-            for event in payout_filter.get_new_entries():
-                print(f"\n💸 PAYOUT CLAIMED:")
-                print(f"  Submission ID: {event['args']['submissionId']}")
-                print(f"  Recipient: {event['args']['recipient']}")
-                print(f"  Amount: {event['args']['amount'] / 10**6} USDT")
-                print(f"  Block: {event['blockNumber']}")
-
-            time.sleep(2)  # Poll every 2 seconds
+            target = client.w3.eth.block_number - confirmations
+            if target > cursor:
+                for event in fetch_events(client, sources, cursor + 1, target):
+                    sink.write(event)
+                cursor = target
+            sink.tick()
+            time.sleep(poll_interval)
 
     except KeyboardInterrupt:
+        sink.close()
         print("\n👋 Event listener stopped")
 
+def main():
+    parser = argparse.ArgumentParser(description="Listen to or export contract events")
+    parser.add_argument("--sink", choices=["stdout", "jsonl", "parquet"], default="stdout")
+    parser.add_argument("--out", default="data/events", help="Output directory for file sinks")
+    parser.add_argument("--backfill", nargs=2, type=int, metavar=("FROM", "TO"),
+                        help="Export a block range and exit")
+    parser.add_argument("--confirmations", type=int, default=0,
+                        help="Blocks to stay behind the head when listening")
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    parser.add_argument("--batch-seconds", type=float, default=5)
+    parser.add_argument("--rotate-blocks", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Blocks per eth_getLogs call")
+    parser.add_argument("--workers", type=int, default=4, help="eth_getLogs calls in flight during backfill")
+    args = parser.parse_args()
+
+    options = {}
+    if args.sink != "stdout":
+        options = {
+            "max_rows": args.batch_rows,
+            "max_seconds": args.batch_seconds,
+            "rotate_blocks": args.rotate_blocks
+        }
+    sink = make_sink(args.sink, args.out, **options)
+    client = EventReader()
+
+    if args.backfill:
+        backfill(client, sink, args.backfill[0], args.backfill[1], args.chunk_size, args.workers)
+    else:
+        listen_to_events(client, sink, args.confirmations, poll_interval=2)
+
 if __name__ == "__main__":
-    listen_to_events()
\ No newline at end of file
+    main()
@@ -0,0 +1,334 @@
+"""
+Merkle-batched submission anchoring
+Submissions are buffered off-chain and only each batch root is committed
+via SubmissionRegistry.anchorBatch
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from eth_abi import encode
+from web3 import Web3
+
+LEAF_SIZE = 32
+
+# first leaf index, leaf count, batch id, Merkle root, anchor tx hash
+BATCH_RECORD = struct.Struct(">QIQ32s32s")
+
+# Offset of each leaf's submission record in submissions.bin, and the length prefix of a record
+RECORD_OFFSET = struct.Struct(">Q")
+RECORD_LENGTH = struct.Struct(">I")
+
+# Index entry of leaves written before submission records were kept
+NO_RECORD = 2**64 - 1
+
+# Anchor IDs are leaf indexes, prefixed so they are never mistaken for on-chain submission IDs
+ANCHOR_ID_PREFIX = "anchor-"
+
+def format_anchor_id(index: int) -> str:
+    return f"{ANCHOR_ID_PREFIX}{index}"
+
+def parse_anchor_id(anchor_id: str) -> int:
+    """Leaf index of an anchor ID; raises ValueError for anything else"""
+    if not anchor_id.startswith(ANCHOR_ID_PREFIX) or not anchor_id[len(ANCHOR_ID_PREFIX):].isdigit():
+        raise ValueError(f"Invalid anchor ID '{anchor_id}', expected {ANCHOR_ID_PREFIX}<n>")
+    return int(anchor_id[len(ANCHOR_ID_PREFIX):])
+
+def hash_leaf(submitter: str, content_hash: str, uri: str, mime: str, timestamp: int) -> bytes:
+    """Double-hashed leaf, matching SubmissionRegistry.submissionLeaf"""
+    encoded = encode(
+        ["address", "string", "string", "string", "uint256"],
+        [submitter, content_hash, uri, mime, timestamp]
+    )
+    return bytes(Web3.keccak(Web3.keccak(encoded)))
+
+def hash_pair(a: bytes, b: bytes) -> bytes:
+    """Commutative pair hash, matching OpenZeppelin MerkleProof"""
+    return bytes(Web3.keccak(a + b if a < b else b + a))
+
+def build_tree(leaves):
+    """Build all tree levels from the leaves up to the root
+
+    An unpaired node is promoted to the next level unchanged.
+    """
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [hash_pair(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def get_proof(levels, index: int):
+    """Sibling hashes from leaf to root for the leaf at index"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+class AnchorStore:
+    """Append-only local storage of leaves, their submissions and anchored batches
+
+    leaves.bin holds fixed-size 32 byte leaves, so a submission's anchor ID is
+    its leaf index (exposed as "anchor-<index>"). The submission fields each
+    leaf hashes are appended to submissions.bin, located through the
+    fixed-size offsets in submission_index.bin. batches.bin holds one
+    fixed-size record per anchored batch; trees are rebuilt from the leaves
+    when a proof is requested.
+    """
+
+    def __init__(self, data_dir: str):
+        os.makedirs(data_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._leaves = open(os.path.join(data_dir, "leaves.bin"), "a+b")
+        self._records = open(os.path.join(data_dir, "submissions.bin"), "a+b")
+        self._index = open(os.path.join(data_dir, "submission_index.bin"), "a+b")
+        self._batches = open(os.path.join(data_dir, "batches.bin"), "a+b")
+
+        # Drop any partially written trailing records
+        self._leaves.truncate(self._leaves.seek(0, os.SEEK_END) // LEAF_SIZE * LEAF_SIZE)
+        self._index.truncate(self._index.seek(0, os.SEEK_END) // RECORD_OFFSET.size * RECORD_OFFSET.size)
+        self._batches.truncate(self._batches.seek(0, os.SEEK_END) // BATCH_RECORD.size * BATCH_RECORD.size)
+
+        self.leaf_count = self._leaves.seek(0, os.SEEK_END) // LEAF_SIZE
+        indexed = self._index.seek(0, os.SEEK_END) // RECORD_OFFSET.size
+        if indexed > self.leaf_count:
+            # Records are durable before their leaf; these belong to adds that never completed
+            self._records.truncate(self._read_offset(self.leaf_count))
+            self._index.truncate(self.leaf_count * RECORD_OFFSET.size)
+        elif indexed < self.leaf_count:
+            # Leaves written before submission records were kept
+            self._index.seek(0, os.SEEK_END)
+            self._index.write(RECORD_OFFSET.pack(NO_RECORD) * (self.leaf_count - indexed))
+            self._index.flush()
+        self.batches = []
+        self._batches.seek(0)
+        while True:
+            record = self._batches.read(BATCH_RECORD.size)
+            if len(record) < BATCH_RECORD.size:
+                break
+            self.batches.append(BATCH_RECORD.unpack(record))
+        self._batch_starts = [batch[0] for batch in self.batches]
+
+    @property
+    def anchored_count(self) -> int:
+        """Number of leaves covered by anchored batches"""
+        if not self.batches:
+            return 0
+        first_index, count = self.batches[-1][:2]
+        return first_index + count
+
+    def append(self, leaf: bytes, record: dict) -> int:
+        """Append a leaf with its submission record and return its index once both are on disk"""
+        data = json.dumps(record).encode()
+        with self._lock:
+            offset = self._records.seek(0, os.SEEK_END)
+            self._records.write(RECORD_LENGTH.pack(len(data)) + data)
+            self._records.flush()
+            self._index.seek(0, os.SEEK_END)
+            self._index.write(RECORD_OFFSET.pack(offset))
+            self._index.flush()
+            # The record must be durable before the leaf that makes it part of the log
+            os.fsync(self._records.fileno())
+            os.fsync(self._index.fileno())
+
+            self._leaves.seek(0, os.SEEK_END)
+            self._leaves.write(leaf)
+            self._leaves.flush()
+            # The caller reports the ID to the client; it must survive a crash
+            os.fsync(self._leaves.fileno())
+            index = self.leaf_count
+            self.leaf_count += 1
+            return index
+
+    def read_record(self, index: int):
+        """Submission fields of a leaf, or None for leaves stored without them"""
+        with self._lock:
+            offset = self._read_offset(index)
+            if offset == NO_RECORD:
+                return None
+            self._records.seek(offset)
+            length, = RECORD_LENGTH.unpack(self._records.read(RECORD_LENGTH.size))
+            return json.loads(self._records.read(length))
+
+    def read_leaves(self, first_index: int, count: int):
+        """Read a contiguous range of leaves"""
+        with self._lock:
+            self._leaves.seek(first_index * LEAF_SIZE)
+            data = self._leaves.read(count * LEAF_SIZE)
+        return [data[i:i + LEAF_SIZE] for i in range(0, len(data), LEAF_SIZE)]
+
+    def append_batch(self, first_index: int, count: int, batch_id: int, root: bytes, tx_hash: bytes):
+        """Record an anchored batch"""
+        record = (first_index, count, batch_id, root, tx_hash)
+        with self._lock:
+            # Leaves must be durable before the batch that covers them
+            os.fsync(self._leaves.fileno())
+            self._batches.seek(0, os.SEEK_END)
+            self._batches.write(BATCH_RECORD.pack(*record))
+            self._batches.flush()
+            os.fsync(self._batches.fileno())
+            self.batches.append(record)
+            self._batch_starts.append(first_index)
+
+    def _read_offset(self, index: int) -> int:
+        self._index.seek(index * RECORD_OFFSET.size)
+        return RECORD_OFFSET.unpack(self._index.read(RECORD_OFFSET.size))[0]
+
+    def find_batch(self, index: int):
+        """Return the batch record covering a leaf index, or None if still pending"""
+        position = bisect_right(self._batch_starts, index) - 1
+        if position < 0:
+            return None
+        batch = self.batches[position]
+        if index >= batch[0] + batch[1]:
+            return None
+        return batch
+
+class SubmissionAnchorer:
+    """Buffers submissions and anchors them on a time/size window"""
+
+    def __init__(self, client, store: AnchorStore, batch_size: int, window_seconds: float, tree_cache_size: int = 8):
+        self.client = client
+        self.store = store
+        self.batch_size = batch_size
+        self.window_seconds = window_seconds
+        self.tree_cache_size = tree_cache_size
+        self._trees = OrderedDict()
+        self._tree_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._oldest_pending = time.monotonic() if self.pending_count else None
+        self._thread = None
+
+    @property
+    def pending_count(self) -> int:
+        return self.store.leaf_count - self.store.anchored_count
+
+    def start(self):
+        """Start the background anchoring loop"""
+        self._thread = threading.Thread(target=self._run, name="submission-anchorer", daemon=True)
+        self._thread.start()
+
+    def add(self, submitter: str, content_hash: str, uri: str, mime: str, timestamp: int):
+        """Buffer a submission and return (leaf index, leaf); blocks on an fsync"""
+        leaf = hash_leaf(submitter, content_hash, uri, mime, timestamp)
+        record = {"submitter": submitter, "content_hash": content_hash, "uri": uri, "mime_type": mime,
+                  "timestamp": timestamp}
+        with self._condition:
+            index = self.store.append(leaf, record)
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            if self.pending_count >= self.batch_size:
+                self._condition.notify()
+        return index, leaf
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait(timeout=1.0)
+                due = self.pending_count >= self.batch_size or (
+                    self._oldest_pending is not None
+                    and time.monotonic() - self._oldest_pending >= self.window_seconds
+                )
+            if due:
+                try:
+                    self.anchor_pending()
+                except Exception as e:
+                    print(f"❌ Failed to anchor submission batch: {e}")
+
+    def reconcile(self) -> int:
+        """Record batches anchored on-chain but missing from the local log
+
+        A crash between the anchorBatch receipt and append_batch leaves the
+        chain ahead; those batches are read back from their BatchAnchored
+        events. Returns the number of batches recorded.
+        """
+        recorded = 0
+        anchored = self.client.anchored_count()
+        while self.store.anchored_count < anchored:
+            first_index = self.store.anchored_count
+            batch = self.client.get_anchored_batch(first_index)
+            if batch is None:
+                raise Exception(f"No BatchAnchored event for leaf {first_index}")
+            batch_id, root, count, tx_hash = batch
+            if first_index + count > self.store.leaf_count or \
+                    build_tree(self.store.read_leaves(first_index, count))[-1][0] != root:
+                raise Exception(f"On-chain batch {batch_id} does not match local leaves {first_index}-"
+                                f"{first_index + count - 1}")
+            self.store.append_batch(first_index, count, batch_id, root, tx_hash)
+            recorded += 1
+        return recorded
+
+    def anchor_pending(self):
+        """Anchor up to batch_size pending leaves in a single transaction
+
+        The contract only accepts a batch starting at its anchoredCount, so a
+        batch resent after a crash reverts rather than anchoring leaves twice;
+        reconcile() then picks up the batch that did land.
+        """
+        recorded = self.reconcile()
+        if recorded:
+            print(f"🔁 Recorded {recorded} anchored batches missing from the local log")
+        first_index = self.store.anchored_count
+        count = min(self.store.leaf_count - first_index, self.batch_size)
+        if count == 0:
+            with self._condition:
+                self._oldest_pending = time.monotonic() if self.pending_count else None
+            return None
+
+        levels = build_tree(self.store.read_leaves(first_index, count))
+        root = levels[-1][0]
+        batch_id, receipt = self.client.anchor_batch(root, first_index, count)
+        self.store.append_batch(first_index, count, batch_id, root, bytes(receipt.transactionHash))
+        self._cache_tree(batch_id, levels)
+
+        with self._condition:
+            self._oldest_pending = time.monotonic() if self.pending_count else None
+        return batch_id
+
+    def _cache_tree(self, batch_id: int, levels):
+        with self._tree_lock:
+            self._trees[batch_id] = levels
+            self._trees.move_to_end(batch_id)
+            while len(self._trees) > self.tree_cache_size:
+                self._trees.popitem(last=False)
+
+    def get_submission(self, index: int):
+        """Submission fields hashed into a leaf; None for leaves stored without them"""
+        if index >= self.store.leaf_count:
+            raise KeyError(index)
+        return self.store.read_record(index)
+
+    def get_proof(self, index: int):
+        """Inclusion proof for an anchored submission, or None if still pending"""
+        if index >= self.store.leaf_count:
+            raise KeyError(index)
+
+        batch = self.store.find_batch(index)
+        if batch is None:
+            return None
+
+        first_index, count, batch_id, root, tx_hash = batch
+        with self._tree_lock:
+            levels = self._trees.get(batch_id)
+        if levels is None:
+            levels = build_tree(self.store.read_leaves(first_index, count))
+            self._cache_tree(batch_id, levels)
+
+        position = index - first_index
+        return {
+            "batch_id": batch_id,
+            "leaf": levels[0][position],
+            "leaf_index": position,
+            "root": root,
+            "proof": get_proof(levels, position),
+            "transaction_hash": tx_hash
+        }
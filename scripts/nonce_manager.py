@@ -0,0 +1,78 @@
+"""
+Local nonce allocation for the signing account
+Lets several transactions be in flight without colliding on nonces
+"""
+
+import threading
+
+# Node rejections meaning the nonce is already used by a mined or pending transaction
+NONCE_TAKEN_ERRORS = ("nonce too low", "replacement transaction underpriced")
+
+def nonce_taken(error: Exception) -> bool:
+    """Whether a broadcast was rejected because its nonce is used, e.g. by another sender with the same key"""
+    message = str(error).lower()
+    return any(text in message for text in NONCE_TAKEN_ERRORS)
+
+class NonceManager:
+    """Hands out consecutive nonces without a get_transaction_count per transaction
+
+    A released nonce below the counter is kept and handed out again before
+    the counter advances (as SharedNonceManager does); re-reading the
+    "pending" count instead would reissue nonces that are reserved but not
+    yet at the node.
+    """
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next_nonce = None
+        self._released = set()
+
+    def reserve(self) -> int:
+        """Reserve the lowest released nonce, or the next one"""
+        with self._lock:
+            if self._released:
+                nonce = min(self._released)
+                self._released.discard(nonce)
+                return nonce
+            if self._next_nonce is None:
+                self._next_nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def release(self, nonce: int):
+        """Give back a nonce whose transaction was never broadcast"""
+        with self._lock:
+            if self._next_nonce == nonce + 1:
+                self._next_nonce = nonce
+                # Released nonces just below the counter need no gap tracking any more
+                while self._next_nonce - 1 in self._released:
+                    self._next_nonce -= 1
+                    self._released.discard(self._next_nonce)
+            else:
+                # Later nonces are already out; this one is handed out next so no gap is left
+                self._released.add(nonce)
+
+    def resync(self):
+        """Forget the local counter and re-read it from the node
+
+        Called when a broadcast finds the counter behind the chain; releasing
+        the rejected nonce would only hand it out again.
+        """
+        with self._lock:
+            self._next_nonce = None
+            self._released.clear()
+
+    def signed(self, nonce: int, raw_tx: bytes):
+        """Nothing to record for a single process"""
+
+    def claim_stale(self, gap_seconds: float):
+        """A single process has no other workers to recover from"""
+        return []
+
+    def prune(self, confirmed_nonce: int):
+        """Drop released nonces that were used meanwhile (e.g. filled by recovery)"""
+        with self._lock:
+            self._released = {nonce for nonce in self._released if nonce >= confirmed_nonce}
@@ -0,0 +1,242 @@
+"""
+Pipelined submission-to-payout workflow
+Registers, then sends verify, mark claimable and claim with consecutive nonces and tracks them as one unit
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from web3.exceptions import TransactionNotFound
+
+STEPS = ("register", "verify", "mark_claimable", "claim")
+
+class WorkflowStore:
+    """Workflow records (SQLite), shared by every API worker"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflows (
+                workflow_id TEXT PRIMARY KEY,
+                idempotency_key TEXT UNIQUE,
+                record TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def save(self, record: dict, idempotency_key: str = None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO workflows (workflow_id, idempotency_key, record, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(workflow_id) DO UPDATE SET record = excluded.record, updated_at = excluded.updated_at",
+                (record["workflow_id"], idempotency_key, json.dumps(record), time.time())
+            )
+
+    def get(self, workflow_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM workflows WHERE workflow_id = ?", (workflow_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_key(self, idempotency_key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM workflows WHERE idempotency_key = ?", (idempotency_key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+class PayoutWorkflows:
+    """Starts submission-payout workflows and follows their transactions
+
+    The dependent steps need the submission ID, so they are sent once the
+    registration is mined; the three of them are then in the mempool
+    together, so a workflow normally completes in two or three blocks. A
+    step that reverts or is never mined does not stop the later ones (they
+    are already sent); instead the final record lists the compensation each
+    outcome needs.
+    """
+
+    def __init__(self, client, store: WorkflowStore):
+        self.client = client
+        self.store = store
+        self._lock = threading.Lock()
+        self._tracking = {}
+
+    def start(self, content_hash: str, uri: str, mime: str, recipient: str, amount: int,
+              reason_code: int = 0, idempotency_key: str = None, waiting: bool = True) -> dict:
+        """Send every step and return the workflow record with its steps pending
+
+        Blocks until the registration is mined. Pass waiting=False when
+        wait() will not be called for this workflow.
+        """
+        previous = self.store.find_by_key(idempotency_key) if idempotency_key else None
+        # A retried request re-attaches its recorded transactions, registration included
+        submission_id, pending_transactions, error = self.client.send_submission_payout(
+            content_hash, uri, mime, recipient, amount, reason_code=reason_code
+        )
+
+        record = {
+            "workflow_id": previous["workflow_id"] if previous else uuid.uuid4().hex,
+            "status": "pending",
+            "submission_id": submission_id,
+            "registered_submission_id": None,
+            "recipient": recipient,
+            "amount": amount,
+            "created_at": previous["created_at"] if previous else int(time.time()),
+            "steps": [],
+            "compensation": []
+        }
+        for index, step in enumerate(STEPS):
+            if index < len(pending_transactions):
+                pending = pending_transactions[index]
+                record["steps"].append({
+                    "step": step,
+                    "status": "pending",
+                    "nonce": pending.nonce,
+                    "transaction_hash": "0x" + bytes(pending.tx_hash).hex(),
+                    "block_number": None,
+                    "error": None
+                })
+            else:
+                record["steps"].append({
+                    "step": step,
+                    "status": "failed" if index == len(pending_transactions) else "not_sent",
+                    "nonce": None,
+                    "transaction_hash": None,
+                    "block_number": None,
+                    "error": str(error) if index == len(pending_transactions) else None
+                })
+
+        if not pending_transactions:
+            self._finish(record)
+        self.store.save(record, idempotency_key)
+
+        done = threading.Event()
+        receipts = {}
+        with self._lock:
+            self._tracking[record["workflow_id"]] = (done, receipts)
+        threading.Thread(
+            target=self._track,
+            args=(record, pending_transactions, done, receipts, waiting),
+            name=f"workflow-{record['workflow_id'][:8]}",
+            daemon=True
+        ).start()
+        return record
+
+    def wait(self, workflow_id: str, timeout: float = None):
+        """Block until a workflow started here is settled
+
+        Returns (record, receipt of the last mined step or None).
+        """
+        with self._lock:
+            done, receipts = self._tracking[workflow_id]
+        done.wait(timeout)
+        if done.is_set():
+            with self._lock:
+                self._tracking.pop(workflow_id, None)
+        record = self.store.get(workflow_id)
+        last = max(receipts.values(), key=lambda receipt: receipt.blockNumber, default=None)
+        return record, last
+
+    def get(self, workflow_id: str):
+        """Workflow record; steps tracked by a stopped worker are re-checked once"""
+        record = self.store.get(workflow_id)
+        if record is None or record["status"] != "pending":
+            return record
+        with self._lock:
+            if workflow_id in self._tracking:
+                return record
+
+        for entry in record["steps"]:
+            if entry["status"] != "pending":
+                continue
+            try:
+                receipt = self.client.w3.eth.get_transaction_receipt(entry["transaction_hash"])
+            except TransactionNotFound:
+                # Possibly re-priced under another hash; left pending
+                return record
+            self._record_receipt(record, STEPS.index(entry["step"]), receipt)
+
+        self._finish(record)
+        self.store.save(record)
+        return record
+
+    def _track(self, record: dict, pending_transactions, done: threading.Event, receipts: dict, waiting: bool):
+        try:
+            for index, pending in enumerate(pending_transactions):
+                entry = record["steps"][index]
+                try:
+                    receipt = pending.receipt_future.result()
+                except Exception as e:
+                    entry["status"] = "failed"
+                    entry["error"] = str(e)
+                else:
+                    receipts[entry["step"]] = receipt
+                    self._record_receipt(record, index, receipt)
+                self.store.save(record)
+
+            self._finish(record)
+            self.store.save(record)
+        finally:
+            done.set()
+            if not waiting:
+                with self._lock:
+                    self._tracking.pop(record["workflow_id"], None)
+
+    def _record_receipt(self, record: dict, index: int, receipt):
+        entry = record["steps"][index]
+        entry["status"] = "succeeded" if receipt.status == 1 else "reverted"
+        entry["block_number"] = receipt.blockNumber
+        entry["transaction_hash"] = "0x" + bytes(receipt.transactionHash).hex()
+        if STEPS[index] == "register" and receipt.status == 1:
+            record["registered_submission_id"] = int(receipt.logs[0]['topics'][1].hex(), 16)
+
+    def _finish(self, record: dict):
+        """Set the final status and the compensation list"""
+        outcome = {entry["step"]: entry["status"] for entry in record["steps"]}
+        # Later steps are only sent with the ID from a mined registration
+        submission_id = record["registered_submission_id"]
+        compensation = []
+
+        if outcome["register"] == "succeeded":
+            if outcome["verify"] != "succeeded" and outcome["mark_claimable"] == "succeeded":
+                compensation.append({
+                    "step": "verify",
+                    "action": f"submission {submission_id} was marked claimable without this workflow's verification; "
+                              f"check GET /verifications/{submission_id}"
+                })
+            elif outcome["verify"] != "succeeded":
+                compensation.append({
+                    "step": "verify",
+                    "action": f"retry POST /verifications for submission {submission_id}"
+                })
+            if outcome["mark_claimable"] != "succeeded":
+                compensation.append({
+                    "step": "mark_claimable",
+                    "action": f"retry POST /payouts/mark-claimable and POST /payouts/claim for submission {submission_id}"
+                })
+            elif outcome["claim"] != "succeeded":
+                compensation.append({
+                    "step": "claim",
+                    "action": f"payout for submission {submission_id} is claimable but unpaid; "
+                              f"retry POST /payouts/claim once the pool holds enough funds"
+                })
+
+        record["compensation"] = compensation
+        if all(status == "succeeded" for status in outcome.values()) and not compensation:
+            record["status"] = "completed"
+        elif any(status == "succeeded" for status in outcome.values()):
+            record["status"] = "compensation_required"
+        else:
+            record["status"] = "failed"
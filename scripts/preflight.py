@@ -0,0 +1,112 @@
+"""
+Pre-flight checks for contract writes
+Rejects predictable reverts from the local state mirror, or an eth_call simulation, before broadcasting
+"""
+
+from eth_abi import decode
+from web3 import Web3
+from web3.exceptions import ContractCustomError, ContractLogicError
+
+# Revert reasons caused by state that already exists on chain (409); anything else is a bad request (422)
+CONFLICT_REASONS = {
+    "Already verified",
+    "Already marked claimable",
+    "Already claimed"
+}
+
+# Selector of the Error(string) payload produced by require(..., "reason")
+ERROR_STRING_SELECTOR = "0x08c379a0"
+
+class PreflightRejected(Exception):
+    """A write that would revert, detected before it was signed"""
+
+    def __init__(self, reason: str, source: str):
+        super().__init__(reason)
+        self.reason = reason
+        self.source = source  # "mirror", "simulation", "balance" or "input"
+
+    @property
+    def conflict(self) -> bool:
+        return self.reason in CONFLICT_REASONS
+
+class Preflight:
+    """Checks each write against the analytics state mirror, then optionally simulates it
+
+    The mirror lookup is a primary-key read with no RPC. It only trails the
+    chain by the ingestion confirmations, and the states it rejects
+    (verified, marked claimable, claimed) never revert back outside a
+    reorg. With simulate enabled the call is also run with eth_call against
+    the pending state, which covers the blocks the mirror has not ingested
+    yet and every other revert; the revert reason is decoded from the
+    require message or the custom error ABI. Without a mirror (analytics
+    disabled) only the input and optional simulation checks run.
+    """
+
+    def __init__(self, client, mirror=None, simulate: bool = False):
+        self.client = client
+        self.mirror = mirror
+        self.simulate = simulate
+        self._custom_errors = {}
+        for contract in client.contracts.values():
+            for item in contract.abi:
+                if item.get("type") == "error":
+                    signature = f"{item['name']}({','.join(param['type'] for param in item['inputs'])})"
+                    self._custom_errors["0x" + bytes(Web3.keccak(text=signature)[:4]).hex()] = item["name"]
+
+    def verification(self, submission_id: int, accepted: bool, reason_code: int):
+        if self.mirror and self.mirror.get_verification(submission_id):
+            raise PreflightRejected("Already verified", "mirror")
+        self._simulate(
+            self.client.contracts["verification_manager"].functions.setVerification(submission_id, accepted, reason_code)
+        )
+
+    def mark_claimable(self, submission_id: int, recipient: str, amount: int):
+        if amount <= 0:
+            raise PreflightRejected("Amount must be greater than 0", "input")
+        if self.mirror and self.mirror.get_claimable(submission_id):
+            raise PreflightRejected("Already marked claimable", "mirror")
+        self._simulate(
+            self.client.contracts["bounty_pool"].functions.markClaimable(submission_id, recipient, amount)
+        )
+
+    def claim(self, submission_id: int, recipient: str):
+        claimable = self.mirror.get_claimable(submission_id) if self.mirror else None
+        if claimable:
+            if claimable["recipient"].lower() != recipient.lower():
+                raise PreflightRejected("Not authorized recipient", "mirror")
+            if claimable["claimed"]:
+                raise PreflightRejected("Already claimed", "mirror")
+        self._simulate(self.client.contracts["bounty_pool"].functions.claim(submission_id, recipient))
+
+    def fund_bounty(self, bounty_id: int, amount: int):
+        if amount <= 0:
+            raise PreflightRejected("Amount must be greater than 0", "input")
+        # fundBounty itself cannot be simulated before its approve is mined; check the balance it would pull
+        if self.simulate:
+            balance = self.client.contracts["mock_usdt"].functions.balanceOf(self.client.account.address).call(
+                block_identifier="pending"
+            )
+        elif self.mirror:
+            balance = self.mirror.get_token_balance(self.client.account.address) or 0
+        else:
+            return
+        if balance < amount:
+            raise PreflightRejected(f"Insufficient token balance: {balance} < {amount}", "balance")
+
+    def _simulate(self, function_call):
+        if not self.simulate:
+            return
+        try:
+            function_call.call({"from": self.client.account.address}, block_identifier="pending")
+        except ContractCustomError as e:
+            data = e.data if isinstance(e.data, str) else str(e.message)
+            raise PreflightRejected(self._custom_errors.get(data[:10], f"Custom error {data[:10]}"), "simulation")
+        except ContractLogicError as e:
+            raise PreflightRejected(_revert_reason(e), "simulation")
+
+def _revert_reason(error: ContractLogicError) -> str:
+    """require() message from the revert data (Hardhat) or the error message (Geth)"""
+    data = error.data.get("data") if isinstance(error.data, dict) else error.data
+    if isinstance(data, str) and data.startswith(ERROR_STRING_SELECTOR):
+        return decode(["string"], bytes.fromhex(data[10:]))[0]
+    return (error.message or "execution reverted").removeprefix("execution reverted: ")
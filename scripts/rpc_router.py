@@ -0,0 +1,360 @@
+"""
+Multi-endpoint RPC provider for Web3.py
+Routes reads to the fastest healthy node, hedges slow eth_calls and pins
+writes, nonce queries and the chain head to a single primary
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from web3 import HTTPProvider
+from web3.providers.base import BaseProvider
+from web3._utils.request import make_post_request
+
+# Sent to the primary only, so nonces and broadcasts never skew across nodes,
+# and the head that reads are pinned to is the node the receipts come from
+PINNED_METHODS = {
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_getTransactionCount",
+    "eth_getTransactionByHash",
+    "eth_getTransactionReceipt",
+    "eth_blockNumber"
+}
+
+# Position of the block parameter of reads that can be pinned to a block number
+BLOCK_PARAMS = {
+    "eth_call": 1,
+    "eth_getBalance": 1,
+    "eth_getCode": 1,
+    "eth_getStorageAt": 2
+}
+
+# Reads that get a second, hedged request when the first one is slow
+HEDGED_METHODS = {"eth_call"}
+
+# JSON-RPC error code of a reverted eth_call / eth_estimateGas
+EXECUTION_REVERTED = 3
+
+class NodeError(Exception):
+    """A JSON-RPC error response that another node may answer differently"""
+
+    def __init__(self, response: dict):
+        error = response["error"]
+        super().__init__(error.get("message", error) if isinstance(error, dict) else error)
+        self.response = response
+
+def is_deterministic_error(error) -> bool:
+    """Whether every node would return the same error (an execution revert)"""
+    if not isinstance(error, dict):
+        return False
+    return error.get("code") == EXECUTION_REVERTED or "revert" in str(error.get("message", "")).lower()
+
+def pinned_block(method, params):
+    """Block number a read is pinned to, or None for a block tag or a read without a block"""
+    if method == "eth_getLogs":
+        value = params[0].get("toBlock") if params and isinstance(params[0], dict) else None
+    elif method in BLOCK_PARAMS and len(params) > BLOCK_PARAMS[method]:
+        value = params[BLOCK_PARAMS[method]]
+    else:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.startswith("0x"):
+        return int(value, 16)
+    return None
+
+class EndpointStats:
+    """Latency and error tracking for one RPC endpoint"""
+
+    def __init__(self, url: str, timeout: float, alpha: float):
+        self.url = url
+        self.provider = HTTPProvider(url, request_kwargs={"timeout": timeout})
+        self.alpha = alpha
+        self.ewma_latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.last_used = 0.0
+        self.latencies = deque(maxlen=200)
+        # Highest block the node is known to have, from eth_blockNumber and pinned reads
+        self.head = None
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def score(self) -> float:
+        """Lower is better; unmeasured endpoints are tried first"""
+        latency = self.ewma_latency if self.ewma_latency is not None else 0.0
+        return latency * (1 + 10 * self.error_rate)
+
+    def p95(self) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.last_used = time.monotonic()
+        self.latencies.append(latency)
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        )
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self.consecutive_failures = 0
+
+    def record_head(self, block: int):
+        if self.head is None or block > self.head:
+            self.head = block
+
+    def record_failure(self, cooldown: float):
+        self.requests += 1
+        self.last_used = time.monotonic()
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= 3:
+            # Circuit breaker: back off exponentially, capped at 16x the cooldown
+            self.down_until = time.monotonic() + cooldown * 2 ** min(self.consecutive_failures - 3, 4)
+
+    def snapshot(self):
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "p95_latency_ms": round(self.p95() * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "head": self.head
+        }
+
+class RoutingProvider(BaseProvider):
+    """Web3 provider over several RPC endpoints
+
+    The first URL is the primary. Reads go to the healthy endpoint with the
+    lowest EWMA latency (weighted by error rate) and fail over on transport
+    errors and on JSON-RPC error responses (e.g. "header not found" from a
+    lagging node), except execution reverts, which every node returns alike.
+    eth_call is hedged to the next endpoint after a p95-based delay. If
+    every endpoint answers with an error, the last error response is
+    returned so Web3 raises it as usual.
+
+    A read pinned to a block number only goes to endpoints known to be at
+    or past that block, and to the primary, so a read right after a write
+    never lands on a replica that has not seen the write's block yet.
+    Endpoint heads are learned from probe() and from pinned reads.
+    """
+
+    def __init__(self, urls, timeout: float = 10, hedge_min_delay: float = 0.05,
+                 failure_cooldown: float = 5, ewma_alpha: float = 0.2, resample_interval: float = 10):
+        super().__init__()
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+        self.endpoints = [EndpointStats(url, timeout, ewma_alpha) for url in urls]
+        self.primary = self.endpoints[0]
+        self.hedge_min_delay = hedge_min_delay
+        self.failure_cooldown = failure_cooldown
+        self.resample_interval = resample_interval
+        self.hedged_requests = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(self.endpoints), thread_name_prefix="rpc-router")
+
+    def make_request(self, method, params):
+        # "pending" state is the primary's mempool, where our transactions are sent
+        if method in PINNED_METHODS or "pending" in params or len(self.endpoints) == 1:
+            # Nowhere to fail over to; errors such as "nonce too low" are answers, not node faults
+            return self._request(self.primary, method, params, check_error=False)
+
+        candidates = self._ranked(pinned_block(method, params))
+        try:
+            if method in HEDGED_METHODS and len(candidates) > 1:
+                return self._hedged_request(candidates, method, params)
+
+            last_error = None
+            for endpoint in candidates:
+                try:
+                    return self._request(endpoint, method, params)
+                except Exception as e:
+                    last_error = e
+            raise last_error
+        except NodeError as e:
+            return e.response
+
+    def batch_request(self, calls, primary: bool = False):
+        """Send several (method, params) calls as one JSON-RPC batch
+
+        The batch goes to the best read endpoint (or the primary) and fails
+        over like a single read. Returns one response dict per call, in call order; a call that
+        failed on the node has an "error" entry instead of a "result".
+        """
+        payload = json.dumps([
+            {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+            for index, (method, params) in enumerate(calls)
+        ]).encode()
+        pinned = any(method in PINNED_METHODS or "pending" in params for method, params in calls)
+        blocks = [pinned_block(method, params) for method, params in calls]
+        candidates = [self.primary] if primary or pinned or len(self.endpoints) == 1 else self._ranked(
+            max((block for block in blocks if block is not None), default=None)
+        )
+
+        last_error = None
+        for endpoint in candidates:
+            started = time.monotonic()
+            try:
+                responses = json.loads(
+                    make_post_request(endpoint.url, payload, **endpoint.provider.get_request_kwargs())
+                )
+                if not isinstance(responses, list):
+                    # Nodes without batch support answer with a single error object
+                    raise ValueError(f"Batch request rejected: {responses.get('error')}")
+            except Exception as e:
+                with self._lock:
+                    endpoint.record_failure(self.failure_cooldown)
+                last_error = e
+                continue
+
+            with self._lock:
+                endpoint.record_success(time.monotonic() - started)
+                for block, response in zip(blocks, responses):
+                    if block is not None and "result" in response:
+                        endpoint.record_head(block)
+            by_id = {response.get("id"): response for response in responses}
+            return [
+                by_id.get(index, {"error": {"message": "Missing from batch response"}})
+                for index in range(len(calls))
+            ]
+        raise last_error
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return any(endpoint.provider.is_connected(show_traceback) for endpoint in self.endpoints)
+
+    def probe(self):
+        """Query the head block of every endpoint in parallel
+
+        Returns one entry per endpoint with its block number, or the error
+        if it could not be reached.
+        """
+        futures = [
+            (endpoint, self._executor.submit(self._request, endpoint, "eth_blockNumber", []))
+            for endpoint in self.endpoints
+        ]
+        results = []
+        for endpoint, future in futures:
+            try:
+                response = future.result()
+                if "error" in response:
+                    raise ValueError(response["error"])
+                results.append({"url": endpoint.url, "block_number": int(response["result"], 16), "error": None})
+            except Exception as e:
+                results.append({"url": endpoint.url, "block_number": None, "error": str(e)})
+        return results
+
+    def refresh_heads(self):
+        """Re-read the head of every other endpoint in the background
+
+        Called on each new block, so reads pinned to it can go to the
+        replicas that have it.
+        """
+        for endpoint in self.endpoints[1:]:
+            self._executor.submit(self._resample, endpoint)
+
+    def snapshot(self):
+        """Per-endpoint routing statistics"""
+        with self._lock:
+            return {
+                "primary": self.primary.url,
+                "hedged_requests": self.hedged_requests,
+                "endpoints": [endpoint.snapshot() for endpoint in self.endpoints]
+            }
+
+    def _ranked(self, block: int = None):
+        """Healthy endpoints ordered by score, unhealthy ones last
+
+        With a block number, only endpoints known to be at or past it are
+        ranked, and the primary is added last if it is not among them.
+        Endpoints that have not been used for resample_interval get a
+        background eth_blockNumber, so a node that recovered is re-measured
+        without delaying the caller.
+        """
+        now = time.monotonic()
+        with self._lock:
+            eligible = [
+                e for e in self.endpoints
+                if block is None or (e.head is not None and e.head >= block)
+            ]
+            healthy = sorted((e for e in eligible if e.healthy), key=lambda e: e.score())
+            unhealthy = [e for e in eligible if not e.healthy]
+            if self.primary not in eligible:
+                # The node our transactions went to has every block they were mined in
+                unhealthy.append(self.primary)
+            stale = [e for e in self.endpoints if now - e.last_used >= self.resample_interval]
+            for endpoint in stale:
+                endpoint.last_used = now
+
+        for endpoint in stale:
+            self._executor.submit(self._resample, endpoint)
+        return healthy + unhealthy
+
+    def _resample(self, endpoint: EndpointStats):
+        try:
+            self._request(endpoint, "eth_blockNumber", [])
+        except Exception:
+            pass
+
+    def _request(self, endpoint: EndpointStats, method, params, check_error: bool = True):
+        """Send one request; with check_error, a non-deterministic error response raises NodeError"""
+        started = time.monotonic()
+        try:
+            response = endpoint.provider.make_request(method, params)
+            if check_error and "error" in response and not is_deterministic_error(response["error"]):
+                raise NodeError(response)
+        except Exception:
+            with self._lock:
+                endpoint.record_failure(self.failure_cooldown)
+            raise
+
+        with self._lock:
+            endpoint.record_success(time.monotonic() - started)
+            if "result" in response:
+                if method == "eth_blockNumber":
+                    endpoint.head = int(response["result"], 16)
+                else:
+                    block = pinned_block(method, params)
+                    if block is not None:
+                        endpoint.record_head(block)
+        return response
+
+    def _hedged_request(self, candidates, method, params):
+        """Send to the best endpoint and hedge to the next one if it is slow"""
+        first, second = candidates[0], candidates[1]
+        with self._lock:
+            delay = max(self.hedge_min_delay, first.p95())
+
+        futures = {self._executor.submit(self._request, first, method, params)}
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            with self._lock:
+                self.hedged_requests += 1
+            futures.add(self._executor.submit(self._request, second, method, params))
+
+        last_error = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+
+        # Both hedged attempts failed; fall back to the remaining endpoints
+        for endpoint in candidates[2:]:
+            try:
+                return self._request(endpoint, method, params)
+            except Exception as e:
+                last_error = e
+        raise last_error
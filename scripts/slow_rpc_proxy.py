@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+JSON-RPC proxy that adds latency in front of a local node
+Used to test RPC routing and hedged reads with one artificially slow endpoint
+"""
+
+import random
+import sys
+import time
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+USAGE = "Usage: python scripts/slow_rpc_proxy.py <listen_port> <upstream_url> <delay_ms> [jitter_ms] [error_rate]"
+
+def make_handler(upstream_url: str, delay: float, jitter: float, error_rate: float):
+    session = requests.Session()
+
+    class SlowProxyHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay + random.uniform(0, jitter))
+
+            if random.random() < error_rate:
+                self.send_response(502)
+                self.end_headers()
+                return
+
+            upstream = session.post(upstream_url, data=body, headers={"Content-Type": "application/json"})
+            self.send_response(upstream.status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(upstream.content)))
+            self.end_headers()
+            self.wfile.write(upstream.content)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SlowProxyHandler
+
+def main():
+    if len(sys.argv) < 4:
+        print(USAGE)
+        return False
+
+    port = int(sys.argv[1])
+    upstream_url = sys.argv[2]
+    delay = float(sys.argv[3]) / 1000
+    jitter = float(sys.argv[4]) / 1000 if len(sys.argv) > 4 else 0.0
+    error_rate = float(sys.argv[5]) if len(sys.argv) > 5 else 0.0
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(upstream_url, delay, jitter, error_rate))
+    print(f"🐢 Proxying http://127.0.0.1:{port} -> {upstream_url} "
+          f"(+{delay * 1000:.0f}ms, jitter {jitter * 1000:.0f}ms, error rate {error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,198 @@
+"""
+Bulk export of the submission registry as NDJSON
+Reads the registry in JSON-RPC batches with several chunks in flight, pinned to one block
+"""
+
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from eth_abi import decode
+from web3 import Web3
+from content_codec import decode_content_hash
+
+INCLUDE_OPTIONS = {"verification", "claimable"}
+
+class ExportError(Exception):
+    """A chunk could not be read; the stream ends with an error line"""
+
+class SubmissionExporter:
+    """Streams submission records in ID order with bounded memory
+
+    Each chunk of IDs is one JSON-RPC batch of eth_calls to the public
+    mapping getters (which never revert), plus one eth_getLogs for the
+    URIs when the compact registry is in use. At most in_flight chunks are
+    requested ahead of the consumer, so memory stays constant however many
+    records are exported, and a slow client slows the reads down instead of
+    queueing them. Every call is pinned to one block from the shared head
+    tracker (safe by default), so the output is a consistent snapshot that
+    every read node has and that is unlikely to be reorged.
+    """
+
+    def __init__(self, client, chunk_size: int = 200, in_flight: int = 4):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.in_flight = in_flight
+        self._executor = ThreadPoolExecutor(max_workers=in_flight, thread_name_prefix="export")
+
+        if client.compact_registry:
+            self.registry = client.contracts["compact_submission_registry"]
+            self._registered_topic = "0x" + bytes(Web3.keccak(
+                text="SubmissionRegistered(uint256,address,bytes32,uint8,string,uint16,uint64)"
+            )).hex()
+        else:
+            self.registry = client.contracts["submission_registry"]
+        self.verification_manager = client.contracts["verification_manager"]
+        self.bounty_pool = client.contracts["bounty_pool"]
+
+        self._getters = {
+            "submission": _Getter(self.registry, "submissions"),
+            "verification": _Getter(self.verification_manager, "verifications"),
+            "claimable": _Getter(self.bounty_pool, "claimablePayouts")
+        }
+
+    def snapshot(self, at: str = "safe"):
+        """(block number, submission count) the export is pinned to
+
+        at is a head tracker tag (latest, safe or finalized); ValueError
+        for an unknown one.
+        """
+        block = self.client.head.resolve(at=at)
+        count = self.registry.functions.submissionCount().call(block_identifier=block)
+        return block, count
+
+    def records(self, from_id: int, to_id: int, include=(), block: int = None):
+        """Yield one dict per submission from from_id to to_id inclusive"""
+        if block is None:
+            block = self.client.head.resolve(at="safe")
+        chunks = iter(range(from_id, to_id + 1, self.chunk_size))
+        pending = deque()
+
+        def submit_next():
+            start = next(chunks, None)
+            if start is not None:
+                end = min(start + self.chunk_size - 1, to_id)
+                pending.append(self._executor.submit(self._fetch_chunk, start, end, include, block))
+
+        for _ in range(self.in_flight):
+            submit_next()
+        try:
+            while pending:
+                records = pending.popleft().result()
+                submit_next()
+                yield from records
+        finally:
+            # The client went away or a chunk failed; drop the reads queued behind it
+            for future in pending:
+                future.cancel()
+
+    def ndjson(self, from_id: int, to_id: int, include=(), block: int = None):
+        """Yield NDJSON bytes, one piece per chunk
+
+        A chunk that cannot be read ends the stream with an {"error": ...}
+        line, since the status code has already been sent.
+        """
+        lines = []
+        try:
+            for record in self.records(from_id, to_id, include, block):
+                lines.append(json.dumps(record))
+                if len(lines) >= self.chunk_size:
+                    yield ("\n".join(lines) + "\n").encode()
+                    lines = []
+        except Exception as e:
+            lines.append(json.dumps({"error": str(e)}))
+        if lines:
+            yield ("\n".join(lines) + "\n").encode()
+
+    def _fetch_chunk(self, start: int, end: int, include, block: int):
+        ids = range(start, end + 1)
+        block_tag = hex(block)
+        calls = [self._getters["submission"].call(i, block_tag) for i in ids]
+        for name in ("verification", "claimable"):
+            if name in include:
+                calls.extend(self._getters[name].call(i, block_tag) for i in ids)
+        if self.client.compact_registry:
+            calls.append(("eth_getLogs", [{
+                "address": self.registry.address,
+                "fromBlock": hex(self.client.compact_registry_block),
+                "toBlock": block_tag,
+                # An OR over the indexed ID topic; every ID of the chunk in one query
+                "topics": [self._registered_topic, ["0x" + format(i, "064x") for i in ids]]
+            }]))
+
+        responses = self.client.rpc.batch_request(calls)
+        if any("error" in response for response in responses):
+            # A read node behind the pinned block; the primary produced or follows it
+            responses = self.client.rpc.batch_request(calls, primary=True)
+        errors = [response["error"] for response in responses if "error" in response]
+        if errors:
+            raise ExportError(f"Submissions {start}-{end}: {errors[0].get('message', errors[0])}")
+
+        results = iter(response["result"] for response in responses)
+        submissions = [self._getters["submission"].decode(next(results)) for _ in ids]
+        extras = {}
+        for name in ("verification", "claimable"):
+            if name in include:
+                extras[name] = [self._getters[name].decode(next(results)) for _ in ids]
+        uris = {}
+        if self.client.compact_registry:
+            for log in next(results):
+                uri = decode(["bytes32", "uint8", "string", "uint16", "uint64"], bytes.fromhex(log["data"][2:]))[2]
+                uris[int(log["topics"][1], 16)] = uri
+
+        records = []
+        for offset, submission_id in enumerate(ids):
+            record = self._submission(submission_id, submissions[offset], uris, block)
+            if "verification" in extras:
+                verifier, accepted, reason_code, timestamp, exists = extras["verification"][offset]
+                record["verification"] = {
+                    "verifier": verifier,
+                    "accepted": accepted,
+                    "reason_code": reason_code,
+                    "timestamp": timestamp
+                } if exists else None
+            if "claimable" in extras:
+                recipient, amount, claimed, exists = extras["claimable"][offset]
+                record["claimable"] = {
+                    "recipient": recipient,
+                    "amount": amount,
+                    "amount_usdt": amount / 10**6,
+                    "claimed": claimed
+                } if exists else None
+            records.append(record)
+        return records
+
+    def _submission(self, submission_id: int, values, uris: dict, block: int):
+        """Same fields as GET /submissions/{id}"""
+        if self.client.compact_registry:
+            digest, submitter, timestamp, mime_code, content_format = values
+            uri = uris.get(submission_id, "")
+            content_hash = decode_content_hash(digest, content_format)
+            mime = self.client._mime_type(mime_code, block)
+        else:
+            submitter, content_hash, uri, mime, timestamp = values
+        return {
+            "submission_id": submission_id,
+            "submitter": submitter,
+            "content_hash": content_hash,
+            "uri": uri,
+            "mime_type": mime,
+            "timestamp": timestamp
+        }
+
+class _Getter:
+    """Pre-encoded eth_call for a public mapping getter taking one uint256"""
+
+    def __init__(self, contract, name: str):
+        abi = next(item for item in contract.abi if item.get("type") == "function" and item["name"] == name)
+        self.address = contract.address
+        self.selector = contract.encodeABI(fn_name=name, args=[0])[:10]
+        self.output_types = [output["type"] for output in abi["outputs"]]
+
+    def call(self, key: int, block_tag: str):
+        return ("eth_call", [{"to": self.address, "data": self.selector + format(key, "064x")}, block_tag])
+
+    def decode(self, result: str):
+        values = decode(self.output_types, bytes.fromhex(result[2:]))
+        # Addresses come back lowercase from eth_abi
+        return [Web3.to_checksum_address(value) if output == "address" else value
+                for output, value in zip(self.output_types, values)]
@@ -0,0 +1,215 @@
+"""
+Relaying of EIP-712 signed submissions (SubmissionRegistry.registerSubmissionsFor)
+Signatures are checked off-chain, across processes for large requests, and valid entries are sent in gas-bounded batches
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from eth_abi import encode
+from eth_account import Account
+from eth_account.messages import SignableMessage
+from web3 import Web3
+
+DOMAIN_NAME = "SubmissionRegistry"
+DOMAIN_VERSION = "1"
+
+SUBMISSION_TYPES = {
+    "EIP712Domain": [
+        {"name": "name", "type": "string"},
+        {"name": "version", "type": "string"},
+        {"name": "chainId", "type": "uint256"},
+        {"name": "verifyingContract", "type": "address"}
+    ],
+    "Submission": [
+        {"name": "submitter", "type": "address"},
+        {"name": "contentHash", "type": "string"},
+        {"name": "uri", "type": "string"},
+        {"name": "mime", "type": "string"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "deadline", "type": "uint256"}
+    ]
+}
+
+DOMAIN_TYPEHASH = Web3.keccak(text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+SUBMISSION_TYPEHASH = Web3.keccak(
+    text="Submission(address submitter,string contentHash,string uri,string mime,uint256 nonce,uint256 deadline)"
+)
+
+# Skip reasons emitted by RelayedSubmissionSkipped
+SKIP_REASONS = {1: "expired", 2: "nonce_used", 3: "bad_signature"}
+
+# Gas of one relayed entry besides its strings: nonce bit, submitter and timestamp
+# slots, signature recovery and the event. Every slot is priced as newly written.
+ITEM_BASE_GAS = 80000
+BATCH_BASE_GAS = 50000
+SSTORE_GAS = 22100
+
+# Below this many signatures the process pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+def domain_separator(chain_id: int, registry_address: str) -> bytes:
+    return Web3.keccak(encode(
+        ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+        [DOMAIN_TYPEHASH, Web3.keccak(text=DOMAIN_NAME), Web3.keccak(text=DOMAIN_VERSION), chain_id, registry_address]
+    ))
+
+def submission_message(separator: bytes, item: dict) -> SignableMessage:
+    """EIP-712 message a submitter signs for one submission"""
+    struct_hash = Web3.keccak(encode(
+        ["bytes32", "address", "bytes32", "bytes32", "bytes32", "uint256", "uint256"],
+        [
+            SUBMISSION_TYPEHASH,
+            item["submitter"],
+            Web3.keccak(text=item["content_hash"]),
+            Web3.keccak(text=item["uri"]),
+            Web3.keccak(text=item["mime_type"]),
+            item["nonce"],
+            item["deadline"]
+        ]
+    ))
+    return SignableMessage(b"\x01", bytes(separator), bytes(struct_hash))
+
+def sign_submission(private_key, separator: bytes, item: dict) -> str:
+    """Signature of a submission by its submitter, as a 0x hex string"""
+    signed = Account.sign_message(submission_message(separator, item), private_key)
+    return "0x" + bytes(signed.signature).hex()
+
+def estimate_item_gas(item: dict) -> int:
+    """Upper bound of the gas one entry adds to registerSubmissionsFor"""
+    strings = [item["content_hash"].encode(), item["uri"].encode(), item["mime_type"].encode()]
+    # A string under 32 bytes shares the length slot; longer ones add one slot per word
+    slots = sum(1 + ((len(value) + 31) // 32 if len(value) >= 32 else 0) for value in strings)
+    size = sum(len(value) for value in strings)
+    calldata = 7 * 32 + 96 + size
+    return ITEM_BASE_GAS + SSTORE_GAS * slots + 16 * calldata + 8 * size
+
+def _recover_signers(separator: bytes, items):
+    """Signer of each item, or None for a malformed signature (runs in pool workers)"""
+    signers = []
+    for item in items:
+        try:
+            signers.append(Account.recover_message(submission_message(separator, item), signature=item["signature"]))
+        except Exception:
+            signers.append(None)
+    return signers
+
+class SubmissionRelayer:
+    """Verifies signed submissions and splits the valid ones into batches
+
+    verify() rejects entries the contract would skip (expired, bad
+    signature, nonce already used on-chain, repeated within the request
+    or being relayed by another request), so no gas is spent on them. The
+    contract still checks every entry, so a race with another relayer only
+    costs the skipped entry's gas. Accepted nonces stay reserved until
+    release() is called after their batch.
+    """
+
+    def __init__(self, client, max_batch_gas: int = 15000000, verify_workers: int = 0):
+        self.client = client
+        self.registry = client.contracts["submission_registry"]
+        self.chain_id = client.w3.eth.chain_id
+        self.separator = domain_separator(self.chain_id, self.registry.address)
+        self.max_batch_gas = max_batch_gas
+        self.verify_workers = verify_workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+        self._in_flight = set()
+
+    def typed_data(self):
+        """Domain and types a client signs with (eth_signTypedData_v4)"""
+        return {
+            "types": SUBMISSION_TYPES,
+            "primaryType": "Submission",
+            "domain": {
+                "name": DOMAIN_NAME,
+                "version": DOMAIN_VERSION,
+                "chainId": self.chain_id,
+                "verifyingContract": self.registry.address
+            }
+        }
+
+    def verify(self, items):
+        """Reason each item is rejected, or None; accepted nonces are reserved"""
+        reasons = [None] * len(items)
+        now = time.time()
+        signers = self._recover(items)
+        seen = set()
+        for index, (item, signer) in enumerate(zip(items, signers)):
+            key = (item["submitter"], item["nonce"])
+            if item["deadline"] < now:
+                reasons[index] = "expired"
+            elif signer != item["submitter"]:
+                reasons[index] = "bad_signature"
+            elif key in seen:
+                reasons[index] = "duplicate"
+            seen.add(key)
+
+        candidates = [index for index, reason in enumerate(reasons) if reason is None]
+        for index, used in zip(candidates, self._nonces_used([items[index] for index in candidates])):
+            if used:
+                reasons[index] = "nonce_used"
+
+        with self._lock:
+            for index, item in enumerate(items):
+                if reasons[index] is None:
+                    key = (item["submitter"], item["nonce"])
+                    if key in self._in_flight:
+                        reasons[index] = "in_flight"
+                    else:
+                        self._in_flight.add(key)
+        return reasons
+
+    def release(self, items):
+        with self._lock:
+            for item in items:
+                self._in_flight.discard((item["submitter"], item["nonce"]))
+
+    def batches(self, items):
+        """Split items into batches whose estimated gas stays under max_batch_gas
+
+        Returns (items, gas limit) pairs; an entry larger than the limit
+        goes alone.
+        """
+        batches = []
+        current, gas = [], BATCH_BASE_GAS
+        for item in items:
+            item_gas = estimate_item_gas(item)
+            if current and gas + item_gas > self.max_batch_gas:
+                batches.append((current, gas))
+                current, gas = [], BATCH_BASE_GAS
+            current.append(item)
+            gas += item_gas
+        if current:
+            batches.append((current, gas))
+        return batches
+
+    def _recover(self, items):
+        if len(items) < PARALLEL_THRESHOLD or self.verify_workers == 1:
+            return _recover_signers(self.separator, items)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.verify_workers)
+        size = -(-len(items) // self.verify_workers)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        signers = []
+        for chunk_signers in self._pool.map(_recover_signers, [self.separator] * len(chunks), chunks):
+            signers.extend(chunk_signers)
+        return signers
+
+    def _nonces_used(self, items):
+        """Whether each item's nonce is already used on-chain, one bitmap word read per (submitter, word)"""
+        words = sorted({(item["submitter"], item["nonce"] >> 8) for item in items})
+        bitmaps = {}
+        for start in range(0, len(words), 500):
+            chunk = words[start:start + 500]
+            calls = [("eth_call", [{
+                "to": self.registry.address,
+                "data": self.registry.encodeABI(fn_name="nonceBitmap", args=[submitter, word])
+            }, "latest"]) for submitter, word in chunk]
+            responses = self.client.rpc.batch_request(calls)
+            for key, response in zip(chunk, responses):
+                if "error" in response:
+                    raise Exception(f"Failed to read nonces: {response['error'].get('message', response['error'])}")
+                bitmaps[key] = int(response["result"], 16)
+        return [bool(bitmaps[(item["submitter"], item["nonce"] >> 8)] >> (item["nonce"] & 0xff) & 1) for item in items]
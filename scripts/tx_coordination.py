@@ -0,0 +1,411 @@
+"""
+Cross-process transaction coordination for multi-worker deployments
+Shared nonce reservations, pending transaction registry and leader election
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+def _connect(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Tokens of the owners created by this process and not retired yet
+_live_tokens = set()
+
+def _new_owner() -> str:
+    """A "pid:token" owner for rows this process takes over"""
+    token = uuid.uuid4().hex
+    _live_tokens.add(token)
+    return f"{os.getpid()}:{token}"
+
+def _retire_owner(owner: str):
+    """Mark an owner created by _new_owner() as finished"""
+    _live_tokens.discard(owner.partition(":")[2])
+
+def _owner_alive(owner: str) -> bool:
+    """Whether a "pid:token" owner still runs
+
+    Under our own pid the token decides, so another instance in this
+    process stays alive while an earlier run that had the same pid does not.
+    """
+    pid, _, token = owner.partition(":")
+    if int(pid) == os.getpid():
+        return token in _live_tokens
+    return _pid_alive(int(pid))
+
+class SharedNonceManager:
+    """Nonce allocation shared by every worker through a SQLite WAL file
+
+    Same interface as NonceManager. Each reserved nonce is a row owned by
+    the reserving process, moving from "reserved" to "signed" (with the raw
+    transaction) before broadcast. A released nonce becomes "free" and is
+    handed out again before the counter advances. Rows owned by a dead
+    process are picked up by claim_stale(), so a worker crash leaves no gap.
+
+    The stored counter outlives the workers, so each process re-reads it
+    from the node before its first reservation, and again on resync().
+    """
+
+    def __init__(self, w3, address: str, path: str):
+        self.w3 = w3
+        self.address = address
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._checked = False
+        self._conn = _connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS nonce_state (
+                address TEXT PRIMARY KEY,
+                next_nonce INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS nonce_reservations (
+                address TEXT NOT NULL,
+                nonce INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                owner_pid INTEGER,
+                raw_tx BLOB,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (address, nonce)
+            );
+        """)
+
+    def reserve(self) -> int:
+        """Reserve the lowest free nonce, or the next one"""
+        with self._lock, self._transaction():
+            if not self._checked:
+                # Transactions sent with the key while no worker ran put the stored counter behind
+                self._read_counter()
+                self._checked = True
+            reusable = self._conn.execute(
+                "SELECT nonce, state, owner_pid FROM nonce_reservations "
+                "WHERE address = ? AND state IN ('free', 'reserved') AND owner_pid IS NOT ? ORDER BY nonce",
+                (self.address, self.pid)
+            ).fetchall()
+            for nonce, state, owner_pid in reusable:
+                if state == "free" or not _pid_alive(owner_pid):
+                    self._conn.execute(
+                        "UPDATE nonce_reservations SET state = 'reserved', owner_pid = ?, updated_at = ? "
+                        "WHERE address = ? AND nonce = ?",
+                        (self.pid, time.time(), self.address, nonce)
+                    )
+                    return nonce
+
+            nonce = self._next_nonce()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nonce_reservations (address, nonce, state, owner_pid, raw_tx, updated_at) "
+                "VALUES (?, ?, 'reserved', ?, NULL, ?)",
+                (self.address, nonce, self.pid, time.time())
+            )
+            self._conn.execute(
+                "UPDATE nonce_state SET next_nonce = ? WHERE address = ?",
+                (nonce + 1, self.address)
+            )
+            return nonce
+
+    def signed(self, nonce: int, raw_tx: bytes):
+        """Record the signed transaction for a nonce before it is broadcast"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE nonce_reservations SET state = 'signed', raw_tx = ?, updated_at = ? "
+                "WHERE address = ? AND nonce = ?",
+                (bytes(raw_tx), time.time(), self.address, nonce)
+            )
+
+    def release(self, nonce: int):
+        """Give back a nonce whose transaction was never broadcast"""
+        with self._lock, self._transaction():
+            row = self._conn.execute(
+                "SELECT next_nonce FROM nonce_state WHERE address = ?", (self.address,)
+            ).fetchone()
+            if row and row[0] == nonce + 1:
+                self._conn.execute(
+                    "DELETE FROM nonce_reservations WHERE address = ? AND nonce = ?", (self.address, nonce)
+                )
+                self._conn.execute(
+                    "UPDATE nonce_state SET next_nonce = ? WHERE address = ?", (nonce, self.address)
+                )
+            else:
+                # Later nonces are already out; the next reserve() refills the gap
+                self._conn.execute(
+                    "UPDATE nonce_reservations SET state = 'free', owner_pid = NULL, raw_tx = NULL, updated_at = ? "
+                    "WHERE address = ? AND nonce = ?",
+                    (time.time(), self.address, nonce)
+                )
+
+    def resync(self):
+        """Re-read the counter from the node
+
+        Called when a broadcast finds the nonce taken by another sender with
+        the same key. Free and unsigned nonces below the node's pending count
+        are dropped with it; handing them out again would only be rejected.
+        """
+        with self._lock, self._transaction():
+            self._read_counter()
+
+    def claim_stale(self, gap_seconds: float):
+        """Take over rows left behind by dead workers or free for too long
+
+        Returns (nonce, raw_tx) pairs now owned by this process: raw_tx is the
+        transaction to rebroadcast, or None for a gap that must be filled.
+        """
+        cutoff = time.time() - gap_seconds
+        claimed = []
+        with self._lock, self._transaction():
+            rows = self._conn.execute(
+                "SELECT nonce, state, owner_pid, raw_tx, updated_at FROM nonce_reservations "
+                "WHERE address = ? ORDER BY nonce",
+                (self.address,)
+            ).fetchall()
+            for nonce, state, owner_pid, raw_tx, updated_at in rows:
+                abandoned = owner_pid is not None and owner_pid != self.pid and not _pid_alive(owner_pid)
+                if (state == "free" and updated_at < cutoff) or (state in ("reserved", "signed") and abandoned):
+                    self._conn.execute(
+                        "UPDATE nonce_reservations SET state = ?, owner_pid = ?, updated_at = ? "
+                        "WHERE address = ? AND nonce = ?",
+                        ("signed" if raw_tx else "reserved", self.pid, time.time(), self.address, nonce)
+                    )
+                    claimed.append((nonce, bytes(raw_tx) if raw_tx else None))
+        return claimed
+
+    def prune(self, confirmed_nonce: int):
+        """Forget reservations below the account's mined transaction count"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM nonce_reservations WHERE address = ? AND nonce < ?",
+                (self.address, confirmed_nonce)
+            )
+
+    def _next_nonce(self) -> int:
+        row = self._conn.execute(
+            "SELECT next_nonce FROM nonce_state WHERE address = ?", (self.address,)
+        ).fetchone()
+        if row and row[0] is not None:
+            return row[0]
+        return self._read_counter()
+
+    def _read_counter(self) -> int:
+        """Set the counter from the node's pending count, never below nonces other workers still hold"""
+        pending_count = self.w3.eth.get_transaction_count(self.address, "pending")
+        # The node already has a transaction for each of these; signed rows stay for claim_stale()
+        self._conn.execute(
+            "DELETE FROM nonce_reservations WHERE address = ? AND state IN ('free', 'reserved') AND nonce < ?",
+            (self.address, pending_count)
+        )
+        highest = self._conn.execute(
+            "SELECT MAX(nonce) FROM nonce_reservations WHERE address = ? AND state != 'free'",
+            (self.address,)
+        ).fetchone()[0]
+        next_nonce = max(pending_count, highest + 1 if highest is not None else 0)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO nonce_state (address, next_nonce) VALUES (?, ?)",
+            (self.address, next_nonce)
+        )
+        return next_nonce
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn)
+
+class SharedPendingRegistry:
+    """Pending transactions of every worker, for listing and cross-worker cancel
+
+    The worker waiting on a transaction refreshes it from here on each
+    poll, so a replacement sent by another worker (a cancel) is followed.
+    """
+
+    def __init__(self, path: str):
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_transactions (
+                nonce INTEGER PRIMARY KEY,
+                owner_pid INTEGER NOT NULL,
+                transaction_json TEXT NOT NULL,
+                hashes TEXT NOT NULL,
+                bumps INTEGER NOT NULL,
+                sent_block INTEGER,
+                cancel_from INTEGER,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def register(self, pending):
+        self._store(pending, self.pid)
+
+    def update(self, pending):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner_pid FROM pending_transactions WHERE nonce = ?", (pending.nonce,)
+            ).fetchone()
+        self._store(pending, row[0] if row else self.pid)
+
+    def refresh(self, pending):
+        """Pull replacements sent by other workers into a local PendingTransaction"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transaction_json, hashes, bumps, cancel_from FROM pending_transactions WHERE nonce = ?",
+                (pending.nonce,)
+            ).fetchone()
+        if row is None:
+            return
+        hashes = [bytes.fromhex(h[2:]) for h in json.loads(row[1])]
+        if len(hashes) > len(pending.hashes):
+            with pending.lock:
+                pending.transaction = _decode_transaction(row[0])
+                pending.hashes = hashes
+                pending.bumps = row[2]
+                pending.cancel_from = row[3]
+
+    def remove(self, pending):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM pending_transactions WHERE nonce = ? AND owner_pid = ?", (pending.nonce, self.pid)
+            )
+
+    def get(self, nonce: int):
+        """Rebuild a PendingTransaction from the registry, or None"""
+        from tx_supervisor import PendingTransaction
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transaction_json, hashes, bumps, sent_block, cancel_from FROM pending_transactions "
+                "WHERE nonce = ?",
+                (nonce,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        pending = PendingTransaction(nonce, _decode_transaction(row[0]))
+        pending.hashes = [bytes.fromhex(h[2:]) for h in json.loads(row[1])]
+        pending.bumps = row[2]
+        pending.sent_block = row[3]
+        pending.cancel_from = row[4]
+        return pending
+
+    def claim_orphans(self):
+        """Take over transactions whose worker died, so they are supervised again"""
+        with self._lock:
+            rows = self._conn.execute("SELECT nonce, owner_pid FROM pending_transactions").fetchall()
+            orphaned = [nonce for nonce, owner_pid in rows if owner_pid != self.pid and not _pid_alive(owner_pid)]
+            for nonce in orphaned:
+                self._conn.execute(
+                    "UPDATE pending_transactions SET owner_pid = ? WHERE nonce = ?", (self.pid, nonce)
+                )
+        return [pending for pending in map(self.get, orphaned) if pending is not None]
+
+    def prune(self, confirmed_nonce: int):
+        """Drop entries whose nonce is already mined (e.g. left by a dead worker)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pending_transactions WHERE nonce < ?", (confirmed_nonce,))
+
+    def snapshot(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT nonce, owner_pid, hashes, bumps, sent_block, cancel_from FROM pending_transactions "
+                "ORDER BY nonce"
+            ).fetchall()
+        return [
+            {
+                "nonce": nonce,
+                "hashes": json.loads(hashes),
+                "bumps": bumps,
+                "sent_block": sent_block,
+                "cancelling": cancel_from is not None,
+                "worker_pid": owner_pid
+            }
+            for nonce, owner_pid, hashes, bumps, sent_block, cancel_from in rows
+        ]
+
+    def _store(self, pending, owner_pid: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pending_transactions "
+                "(nonce, owner_pid, transaction_json, hashes, bumps, sent_block, cancel_from, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (pending.nonce, owner_pid, _encode_transaction(pending.transaction),
+                 json.dumps(["0x" + bytes(h).hex() for h in pending.hashes]),
+                 pending.bumps, pending.sent_block, pending.cancel_from, time.time())
+            )
+
+class LeaderLock:
+    """Non-blocking flock so background singletons run in exactly one worker
+
+    The OS drops the lock when the holding process exits, and another
+    worker takes over on its next attempt.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        handle = open(self.path, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    @property
+    def is_leader(self) -> bool:
+        return self._file is not None
+
+    def run_when_leader(self, callback, retry_interval: float = 5):
+        """Call callback once this process becomes the leader"""
+        if self.try_acquire():
+            callback()
+            return
+
+        def wait_for_leadership():
+            while not self.try_acquire():
+                time.sleep(retry_interval)
+            callback()
+
+        threading.Thread(target=wait_for_leadership, name="leader-election", daemon=True).start()
+
+class _ImmediateTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+def _encode_transaction(transaction: dict) -> str:
+    return json.dumps({
+        key: "0x" + bytes(value).hex() if isinstance(value, (bytes, bytearray)) else value
+        for key, value in (transaction or {}).items()
+    })
+
+def _decode_transaction(value: str) -> dict:
+    return json.loads(value) or None
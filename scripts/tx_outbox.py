@@ -0,0 +1,252 @@
+"""
+Write-ahead transaction outbox (SQLite)
+Every write is recorded before it is signed, and every signed version before it is broadcast
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from tx_coordination import _ImmediateTransaction, _new_owner, _owner_alive
+
+# Entries in these states may still consume their nonce
+OPEN_STATES = ("queued", "signed", "sent")
+
+class TransactionOutbox:
+    """Durable log of write intents and their transactions
+
+    An entry moves queued → signed → sent → mined, failed (reverted, or
+    rejected before broadcast) or replaced (its nonce was taken by another
+    transaction, e.g. a cancellation). Each transition is appended to
+    outbox_events with the transaction hash it concerns; fee bumps add a
+    "bumped" event with the new signed version. Entries are owned by the
+    process that created them, so a restarted or surviving worker only
+    recovers the entries of processes that are gone.
+    """
+
+    def __init__(self, path: str):
+        # The pid alone is not enough: a restarted container often gets the same one
+        self.owner = _new_owner()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                function TEXT NOT NULL,
+                to_address TEXT,
+                calldata TEXT NOT NULL,
+                gas_limit INTEGER NOT NULL,
+                owner TEXT NOT NULL,
+                state TEXT NOT NULL,
+                nonce INTEGER,
+                transaction_hash TEXT,
+                block_number INTEGER,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, updated_at);
+            CREATE TABLE IF NOT EXISTS outbox_events (
+                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                entry_id INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                transaction_hash TEXT,
+                raw_tx BLOB,
+                detail TEXT,
+                at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS outbox_events_entry ON outbox_events (entry_id);
+            CREATE INDEX IF NOT EXISTS outbox_events_hash ON outbox_events (transaction_hash);
+        """)
+
+    def enqueue(self, function: str, to_address: str, calldata: str, gas_limit: int) -> int:
+        """Record a write intent before a nonce is signed for it"""
+        now = time.time()
+        with self._lock:
+            with _ImmediateTransaction(self._conn):
+                entry_id = self._conn.execute(
+                    "INSERT INTO outbox (function, to_address, calldata, gas_limit, owner, state, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                    (function, to_address, calldata, gas_limit, self.owner, now, now)
+                ).lastrowid
+                self._append(entry_id, "queued", None, None, None, now)
+        return entry_id
+
+    def signed(self, entry_id: int, nonce: int, tx_hash: bytes, raw_tx: bytes):
+        """Record the signed transaction; must happen before it is broadcast"""
+        self._transition(entry_id, "signed", tx_hash, raw_tx, nonce=nonce)
+
+    def sent(self, entry_id: int, tx_hash: bytes):
+        self._transition(entry_id, "sent", tx_hash)
+
+    def bumped(self, entry_id: int, tx_hash: bytes, raw_tx: bytes):
+        """A re-priced version of the same nonce; the state is unchanged"""
+        now = time.time()
+        with self._lock:
+            with _ImmediateTransaction(self._conn):
+                self._conn.execute(
+                    "UPDATE outbox SET transaction_hash = ?, updated_at = ? WHERE entry_id = ?",
+                    (_hex(tx_hash), now, entry_id)
+                )
+                self._append(entry_id, "bumped", tx_hash, raw_tx, None, now)
+
+    def failed(self, entry_id: int, error: str):
+        """The write never reached the chain, or reverted"""
+        self._transition(entry_id, "failed", None, error=error)
+
+    def mined(self, receipt, cancelled: bool = False):
+        """Resolve the entry owning the receipt's transaction hash, if any
+
+        An entry already marked failed is corrected too: a broadcast that
+        timed out may still have reached the node.
+        """
+        entry_id = self.find(receipt["transactionHash"])
+        if entry_id is None:
+            return
+        if cancelled:
+            state, error = "replaced", "cancelled"
+        elif receipt["status"] == 1:
+            state, error = "mined", None
+        else:
+            state, error = "failed", "reverted"
+        with self._lock:
+            current = self._conn.execute(
+                "SELECT state, block_number FROM outbox WHERE entry_id = ?", (entry_id,)
+            ).fetchone()
+        if current == (state, receipt["blockNumber"]):
+            return
+        self._transition(entry_id, state, receipt["transactionHash"], block_number=receipt["blockNumber"], error=error)
+
+    def replaced(self, entry_id: int, detail: str):
+        """Another transaction was mined at the entry's nonce"""
+        self._transition(entry_id, "replaced", None, error=detail)
+
+    def find(self, tx_hash: bytes):
+        """Entry that signed a transaction hash"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry_id FROM outbox_events WHERE transaction_hash = ? LIMIT 1", (_hex(tx_hash),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, tx_hash: bytes):
+        """State and latest transaction hash of the entry that signed a hash, or None"""
+        entry_id = self.find(tx_hash)
+        if entry_id is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, transaction_hash FROM outbox WHERE entry_id = ?", (entry_id,)
+            ).fetchone()
+        return {"entry_id": entry_id, "state": row[0], "transaction_hash": row[1]} if row else None
+
+    def claim_orphans(self):
+        """Take over open entries whose owner process is gone
+
+        Returns (entry, [(tx_hash, raw_tx), ...]) per entry, oldest signed
+        version first; queued entries have no versions.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id, owner, state, nonce, function FROM outbox "
+                f"WHERE state IN {OPEN_STATES} ORDER BY entry_id"
+            ).fetchall()
+        orphans = []
+        for entry_id, owner, state, nonce, function in rows:
+            if owner == self.owner or _owner_alive(owner):
+                continue
+            with self._lock:
+                claimed = self._conn.execute(
+                    "UPDATE outbox SET owner = ? WHERE entry_id = ? AND owner = ?",
+                    (self.owner, entry_id, owner)
+                ).rowcount
+                versions = self._conn.execute(
+                    "SELECT transaction_hash, raw_tx FROM outbox_events "
+                    "WHERE entry_id = ? AND raw_tx IS NOT NULL ORDER BY event_id", (entry_id,)
+                ).fetchall()
+            if claimed:
+                orphans.append((
+                    {"entry_id": entry_id, "state": state, "nonce": nonce, "function": function},
+                    [(bytes.fromhex(tx_hash[2:]), raw_tx) for tx_hash, raw_tx in versions]
+                ))
+        return orphans
+
+    def entries(self, state: str = None, limit: int = 100):
+        """Newest entries with their transitions"""
+        query = "SELECT entry_id, function, to_address, state, nonce, transaction_hash, block_number, error, " \
+                "created_at, updated_at FROM outbox"
+        params = []
+        if state:
+            query += " WHERE state = ?"
+            params.append(state)
+        query += " ORDER BY entry_id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            result = []
+            for row in rows:
+                events = self._conn.execute(
+                    "SELECT state, transaction_hash, detail, at FROM outbox_events WHERE entry_id = ? ORDER BY event_id",
+                    (row[0],)
+                ).fetchall()
+                result.append({
+                    "entry_id": row[0],
+                    "function": row[1],
+                    "to": row[2],
+                    "state": row[3],
+                    "nonce": row[4],
+                    "transaction_hash": row[5],
+                    "block_number": row[6],
+                    "error": row[7],
+                    "created_at": row[8],
+                    "updated_at": row[9],
+                    "events": [
+                        {"state": state, "transaction_hash": tx_hash, "detail": detail, "at": at}
+                        for state, tx_hash, detail, at in events
+                    ]
+                })
+        return result
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+
+    def prune(self, retention_seconds: float):
+        """Drop resolved entries older than the retention window"""
+        cutoff = time.time() - retention_seconds
+        with self._lock:
+            with _ImmediateTransaction(self._conn):
+                self._conn.execute(
+                    "DELETE FROM outbox_events WHERE entry_id IN (SELECT entry_id FROM outbox "
+                    f"WHERE state NOT IN {OPEN_STATES} AND updated_at < ?)", (cutoff,)
+                )
+                self._conn.execute(f"DELETE FROM outbox WHERE state NOT IN {OPEN_STATES} AND updated_at < ?", (cutoff,))
+
+    def _transition(self, entry_id: int, state: str, tx_hash, raw_tx: bytes = None,
+                    nonce: int = None, block_number: int = None, error: str = None):
+        now = time.time()
+        with self._lock:
+            with _ImmediateTransaction(self._conn):
+                self._conn.execute(
+                    "UPDATE outbox SET state = ?, nonce = COALESCE(?, nonce), "
+                    "transaction_hash = COALESCE(?, transaction_hash), block_number = COALESCE(?, block_number), "
+                    "error = ?, updated_at = ? WHERE entry_id = ?",
+                    (state, nonce, _hex(tx_hash) if tx_hash else None, block_number, error, now, entry_id)
+                )
+                self._append(entry_id, state, tx_hash, raw_tx, error, now)
+
+    def _append(self, entry_id: int, state: str, tx_hash, raw_tx, detail, at: float):
+        self._conn.execute(
+            "INSERT INTO outbox_events (entry_id, state, transaction_hash, raw_tx, detail, at) VALUES (?, ?, ?, ?, ?, ?)",
+            (entry_id, state, _hex(tx_hash) if tx_hash else None, bytes(raw_tx) if raw_tx else None, detail, at)
+        )
+
+def _hex(value) -> str:
+    return "0x" + bytes(value).hex()
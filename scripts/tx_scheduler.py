@@ -0,0 +1,167 @@
+"""
+Admission control and priority lanes for outgoing transactions
+Sits between the FastAPI endpoints and BlockchainClient writes
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from bisect import insort
+from collections import deque
+from starlette.concurrency import run_in_threadpool
+
+# Lower value is served first
+DEFAULT_PRIORITIES = {
+    "claim": 0,
+    "verification": 0,
+    "claimable": 1,
+    "bounty": 1,
+    "submission": 2,
+    "workflow": 2
+}
+
+class SchedulerSaturated(Exception):
+    """Raised when the pending queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Transaction queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class LaneStats:
+    def __init__(self, priority: int, limit: int):
+        self.priority = priority
+        self.limit = limit
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_times = deque(maxlen=1000)
+        self.service_times = deque(maxlen=1000)
+
+    def snapshot(self):
+        waits = sorted(self.wait_times)
+        return {
+            "priority": self.priority,
+            "limit": self.limit,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "p50": round(_percentile(waits, 0.50) * 1000, 1),
+                "p95": round(_percentile(waits, 0.95) * 1000, 1),
+                "max": round(waits[-1] * 1000, 1) if waits else 0.0
+            }
+        }
+
+class TransactionScheduler:
+    """Bounded priority queue with per-lane concurrency limits
+
+    Waiting requests are started in priority order whenever a slot frees up,
+    skipping lanes that are at their own limit. When the queue is full new
+    requests are rejected immediately with a Retry-After estimate.
+    """
+
+    def __init__(self, max_concurrency: int, queue_depth: int, lane_limits: dict, priorities: dict = None):
+        priorities = priorities or DEFAULT_PRIORITIES
+        self.max_concurrency = max_concurrency
+        self.queue_depth = queue_depth
+        self.lanes = {
+            lane: LaneStats(priority, lane_limits.get(lane, max_concurrency))
+            for lane, priority in priorities.items()
+        }
+        self._waiting = []
+        self._running = 0
+        self._sequence = itertools.count()
+
+    async def run(self, lane: str, func, *args, **kwargs):
+        """Run a blocking client call once the lane is admitted"""
+        stats = self.lanes[lane]
+        if len(self._waiting) >= self.queue_depth:
+            stats.rejected += 1
+            raise SchedulerSaturated(self._retry_after())
+
+        enqueued_at = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        entry = (stats.priority, next(self._sequence), lane, future)
+        insort(self._waiting, entry)
+        stats.queued += 1
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if entry in self._waiting:
+                self._waiting.remove(entry)
+                stats.queued -= 1
+            elif future.done() and not future.cancelled():
+                self._release(stats)
+            raise
+
+        started_at = time.monotonic()
+        stats.wait_times.append(started_at - enqueued_at)
+        try:
+            result = await run_in_threadpool(func, *args, **kwargs)
+            stats.completed += 1
+            return result
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.service_times.append(time.monotonic() - started_at)
+            self._release(stats)
+
+    def _dispatch(self):
+        """Admit waiting requests in priority order while slots are free"""
+        index = 0
+        while index < len(self._waiting) and self._running < self.max_concurrency:
+            _, _, lane, future = self._waiting[index]
+            stats = self.lanes[lane]
+            if stats.running >= stats.limit:
+                index += 1
+                continue
+
+            self._waiting.pop(index)
+            stats.queued -= 1
+            stats.running += 1
+            self._running += 1
+            future.set_result(None)
+
+    def _release(self, stats: LaneStats):
+        stats.running -= 1
+        self._running -= 1
+        self._dispatch()
+
+    def _retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain"""
+        service_times = [t for stats in self.lanes.values() for t in stats.service_times]
+        average = sum(service_times) / len(service_times) if service_times else 1.0
+        return max(1, math.ceil(len(self._waiting) / self.max_concurrency * average))
+
+    def snapshot(self):
+        """Queue depth and wait-time metrics"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_depth_limit": self.queue_depth,
+            "queued": len(self._waiting),
+            "running": self._running,
+            "lanes": {lane: stats.snapshot() for lane, stats in self.lanes.items()}
+        }
+
+def parse_lane_limits(value: str) -> dict:
+    """Parse "claim:4,submission:2" into a dict"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        lane, limit = item.split(":")
+        limits[lane.strip()] = int(limit)
+    return limits
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(math.ceil(fraction * len(sorted_values))) - 1)
+    return sorted_values[max(index, 0)]
@@ -0,0 +1,490 @@
+"""
+Pending transaction supervisor
+Re-prices transactions that stay unmined and follows every replacement hash
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+# Nodes require at least +10% on every fee field for a same-nonce replacement
+MIN_REPLACEMENT_BUMP = 0.10
+
+class TransactionCancelled(Exception):
+    """Raised when a transaction was replaced by a cancelling self-transfer"""
+
+    def __init__(self, nonce: int, receipt):
+        super().__init__(f"Transaction with nonce {nonce} was cancelled")
+        self.nonce = nonce
+        self.receipt = receipt
+
+class TransactionReplaced(Exception):
+    """Raised when a nonce was mined with a transaction that is not one of ours"""
+
+    def __init__(self, nonce: int):
+        super().__init__(f"Nonce {nonce} was used by another transaction")
+        self.nonce = nonce
+
+class PendingTransaction:
+    """A nonce slot and every signed version of the transaction sent into it"""
+
+    def __init__(self, nonce: int, transaction: dict = None):
+        self.nonce = nonce
+        self.transaction = transaction
+        self.hashes = []
+        self.raw_transactions = []
+        self.cancel_from = None
+        self.sent_block = None
+        self.bumps = 0
+        self.on_replaced = None
+        self.receipt_future = None
+        # Contract function and calldata length, for gas accounting
+        self.function = None
+        self.payload_bytes = 0
+        self.outbox_id = None
+        self.lock = threading.Lock()
+
+    @property
+    def tx_hash(self) -> bytes:
+        return self.hashes[-1]
+
+    @property
+    def raw_tx(self) -> bytes:
+        return self.raw_transactions[-1]
+
+    @property
+    def transactionHash(self) -> bytes:
+        """Same attribute name as on a receipt"""
+        return self.hashes[-1]
+
+    def snapshot(self):
+        return {
+            "nonce": self.nonce,
+            "hashes": ["0x" + bytes(h).hex() for h in self.hashes],
+            "bumps": self.bumps,
+            "sent_block": self.sent_block,
+            "cancelling": self.cancel_from is not None
+        }
+
+class LocalPendingRegistry:
+    """Pending transactions of this process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def register(self, pending: PendingTransaction):
+        with self._lock:
+            self._pending[pending.nonce] = pending
+
+    def update(self, pending: PendingTransaction):
+        pass
+
+    def refresh(self, pending: PendingTransaction):
+        pass
+
+    def remove(self, pending: PendingTransaction):
+        with self._lock:
+            if self._pending.get(pending.nonce) is pending:
+                del self._pending[pending.nonce]
+
+    def get(self, nonce: int):
+        with self._lock:
+            return self._pending.get(nonce)
+
+    def claim_orphans(self):
+        return []
+
+    def prune(self, confirmed_nonce: int):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            return [pending.snapshot() for pending in self._pending.values()]
+
+class TransactionSupervisor:
+    """Tracks sent transactions and bumps fees when they get stuck
+
+    After stuck_blocks blocks without inclusion the same nonce is re-signed
+    with fees raised by bump_fraction (at least the 10% replacement minimum,
+    for gasPrice or for both EIP-1559 fee fields). The caller is resolved with
+    whichever of the hashes is mined.
+    """
+
+    def __init__(self, w3, account, stuck_blocks: int = 3, bump_fraction: float = 0.125,
+                 max_bumps: int = 5, max_fee_wei: int = None, use_eip1559: bool = False,
+                 poll_interval: float = 1.0, timeout: float = 120, head=None,
+                 confirmation_timeout: float = 1800, registry=None, ledger=None, outbox=None):
+        self.w3 = w3
+        self.account = account
+        self.head = head
+        self.confirmation_timeout = confirmation_timeout
+        self.stuck_blocks = stuck_blocks
+        self.bump_fraction = max(bump_fraction, MIN_REPLACEMENT_BUMP)
+        self.max_bumps = max_bumps
+        self.max_fee_wei = max_fee_wei
+        self.use_eip1559 = use_eip1559
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.registry = registry or LocalPendingRegistry()
+        self.ledger = ledger
+        self.outbox = outbox
+        self._broadcast_queue = None
+
+    def fee_params(self) -> dict:
+        """Fee fields for a new transaction"""
+        if self.use_eip1559:
+            tip = self.w3.eth.max_priority_fee
+            base_fee = self.w3.eth.get_block("latest")["baseFeePerGas"]
+            return {'maxPriorityFeePerGas': tip, 'maxFeePerGas': 2 * base_fee + tip}
+        return {'gasPrice': self.w3.eth.gas_price}
+
+    def sign(self, transaction: dict) -> PendingTransaction:
+        """Sign a transaction and start tracking its nonce"""
+        pending = PendingTransaction(transaction['nonce'], transaction)
+        signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
+        pending.hashes.append(signed_txn.hash)
+        pending.raw_transactions.append(signed_txn.rawTransaction)
+        return pending
+
+    def broadcast(self, pending: PendingTransaction):
+        """Send the latest signed version of a pending transaction"""
+        try:
+            self.w3.eth.send_raw_transaction(pending.raw_tx)
+        except ValueError as e:
+            # A retried or hedged send reached the node first; this transaction is in its pool
+            if "already known" not in str(e).lower():
+                raise
+        pending.sent_block = self._head_number()
+        self.registry.register(pending)
+        if self.outbox is not None and pending.outbox_id is not None:
+            self.outbox.sent(pending.outbox_id, pending.tx_hash)
+
+    def broadcast_later(self, pending: PendingTransaction, on_error=None):
+        """Queue a broadcast and supervise the transaction in the background
+
+        Broadcasts go through a single worker so nonces reach the node in
+        the order they were signed. on_error is called if the node rejects it.
+        pending.receipt_future is set right away and resolved with the
+        receipt, or with the broadcast error.
+        """
+        pending.receipt_future = Future()
+        with self._lock:
+            if self._broadcast_queue is None:
+                self._broadcast_queue = queue.Queue()
+                threading.Thread(target=self._broadcast_worker, name="tx-broadcaster", daemon=True).start()
+        self._broadcast_queue.put((pending, on_error))
+
+    def watch(self, pending: PendingTransaction) -> Future:
+        """Keep re-pricing a transaction in the background until it is mined
+
+        Returns a Future (also set as pending.receipt_future) resolved with
+        the receipt; one created by broadcast_later() is reused.
+        """
+        future = pending.receipt_future
+        if future is None or future.done():
+            future = Future()
+            pending.receipt_future = future
+
+        def run():
+            try:
+                while True:
+                    try:
+                        future.set_result(self._supervise(pending))
+                        return
+                    except TimeExhausted:
+                        if pending.nonce is None:
+                            # Adopted versions have no known nonce to check; stop following them
+                            raise
+                        self._check_replaced(pending)
+            except (TransactionCancelled, TransactionReplaced) as e:
+                future.set_exception(e)
+            except Exception as e:
+                print(f"⚠️ Transaction {pending.tx_hash.hex()} not confirmed: {e}")
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"tx-watch-{pending.nonce}", daemon=True).start()
+        return future
+
+    def adopt(self, recorded) -> PendingTransaction:
+        """Track transactions recorded by an earlier attempt, rebroadcasting if unknown
+
+        Adopted transactions are waited on but not re-priced, since only the
+        signed form is known.
+        """
+        pending = PendingTransaction(nonce=None)
+        for tx_hash, raw_tx in recorded:
+            pending.hashes.append(tx_hash)
+            pending.raw_transactions.append(raw_tx)
+
+        known = False
+        for tx_hash in pending.hashes:
+            try:
+                self.w3.eth.get_transaction(tx_hash)
+                known = True
+                break
+            except TransactionNotFound:
+                continue
+        if not known:
+            self.w3.eth.send_raw_transaction(pending.raw_tx)
+        pending.sent_block = self._head_number()
+        return pending
+
+    def wait(self, pending: PendingTransaction, timeout: float = None):
+        """Wait until one of the pending transaction's hashes is mined
+
+        If the caller's timeout runs out first the nonce is still taken, so
+        the transaction stays registered and is supervised in the background
+        until it is mined or its nonce is used by another transaction.
+        """
+        try:
+            return self._supervise(pending, timeout)
+        except TimeExhausted:
+            if pending.receipt_future is None:
+                self.watch(pending)
+            raise
+
+    def _supervise(self, pending: PendingTransaction, timeout: float = None):
+        """Poll and re-price until mined; the registry entry is removed once the nonce is used"""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            seen_block = self._head_number()
+            receipt = self._find_receipt(pending)
+            if receipt is not None:
+                if pending.nonce is not None:
+                    self.registry.remove(pending)
+                cancelled = pending.cancel_from is not None and receipt.transactionHash in pending.hashes[pending.cancel_from:]
+                self._record_gas(pending, receipt, cancelled)
+                self._record_outcome(receipt, cancelled)
+                if cancelled:
+                    raise TransactionCancelled(pending.nonce, receipt)
+                return receipt
+
+            if time.monotonic() >= deadline:
+                raise TimeExhausted(
+                    f"Transaction {pending.tx_hash.hex()} is not in the chain after {timeout or self.timeout} seconds"
+                )
+
+            # Another worker may have replaced it (cancel) meanwhile
+            self.registry.refresh(pending)
+            if pending.transaction is not None and pending.bumps < self.max_bumps:
+                if seen_block - pending.sent_block >= self.stuck_blocks:
+                    self.bump(pending)
+
+            if self.head is not None:
+                # Receipts only change with a new block
+                self.head.wait_for_block(seen_block + 1, max(deadline - time.monotonic(), 0))
+            else:
+                time.sleep(self.poll_interval)
+
+    def _check_replaced(self, pending: PendingTransaction):
+        """Close the entry and raise TransactionReplaced if the nonce was mined with none of our versions"""
+        if self.w3.eth.get_transaction_count(self.account.address, "latest") <= pending.nonce:
+            return
+        if self._find_receipt(pending) is not None:
+            # Mined between the last poll and the nonce check; the next poll returns it
+            return
+        self.registry.remove(pending)
+        if self.outbox is not None and pending.outbox_id is not None:
+            self.outbox.replaced(pending.outbox_id, f"Nonce {pending.nonce} was used by another transaction")
+        raise TransactionReplaced(pending.nonce)
+
+    def confirm(self, receipt, policy, timeout: float = None):
+        """Wait until a receipt has the confirmations or finality a WaitPolicy asks for
+
+        Waiting is driven by the shared head tracker. The receipt is
+        re-read once the target block is reached; if its block was reorged
+        out, the transaction is followed to its new block and counted again.
+        """
+        if policy.mode not in ("confirmations", "finalized"):
+            return receipt
+
+        deadline = time.monotonic() + (timeout or self.confirmation_timeout)
+        tx_hash = receipt.transactionHash
+        while True:
+            remaining = max(deadline - time.monotonic(), 0)
+            if policy.mode == "confirmations":
+                reached = self.head.wait_for_block(receipt.blockNumber + policy.confirmations - 1, remaining)
+            else:
+                reached = self.head.wait_for_finalized(receipt.blockNumber, remaining)
+            if not reached:
+                raise TimeExhausted(f"Transaction {tx_hash.hex()} did not reach {policy} in time")
+
+            current = self._get_receipt(tx_hash)
+            while current is None:
+                # Reorged out and back in the mempool; wait for re-inclusion
+                seen_block = self.head.latest
+                if not self.head.wait_for_block(seen_block + 1, max(deadline - time.monotonic(), 0)):
+                    raise TimeExhausted(f"Transaction {tx_hash.hex()} was reorged out and not re-included")
+                current = self._get_receipt(tx_hash)
+
+            if current.blockHash == receipt.blockHash:
+                return current
+            receipt = current
+
+    def bump(self, pending: PendingTransaction, transaction: dict = None) -> bool:
+        """Re-sign the same nonce with higher fees and broadcast it"""
+        with pending.lock:
+            bumped = self._bump(pending, transaction)
+        if bumped:
+            self.registry.update(pending)
+        return bumped
+
+    def _bump(self, pending: PendingTransaction, transaction: dict = None) -> bool:
+        replacement = dict(transaction or pending.transaction)
+        if not self._raise_fees(replacement, pending.transaction):
+            return False
+
+        signed_txn = self.w3.eth.account.sign_transaction(replacement, self.account.key)
+        if self.outbox is not None and pending.outbox_id is None:
+            # Rebuilt from the shared registry or adopted; find the entry by an earlier hash
+            pending.outbox_id = self.outbox.find(pending.tx_hash)
+        if self.outbox is not None and pending.outbox_id is not None:
+            # Write-ahead: a version is recorded before the node can see it
+            self.outbox.bumped(pending.outbox_id, signed_txn.hash, signed_txn.rawTransaction)
+        try:
+            self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        except ValueError as e:
+            message = str(e).lower()
+            if "nonce too low" in message or "already known" in message:
+                # An earlier version was mined meanwhile; the next poll picks it up
+                return False
+            if "underpriced" in message:
+                # Fees still too low for this node; retry with a larger bump next time
+                pending.transaction = replacement
+                pending.bumps += 1
+                return False
+            raise
+
+        pending.transaction = replacement
+        pending.hashes.append(signed_txn.hash)
+        pending.raw_transactions.append(signed_txn.rawTransaction)
+        pending.sent_block = self._head_number()
+        pending.bumps += 1
+        if pending.on_replaced:
+            pending.on_replaced(signed_txn.hash, signed_txn.rawTransaction)
+        return True
+
+    def cancel(self, nonce: int) -> bytes:
+        """Replace a pending transaction with a zero-value self-transfer"""
+        pending = self.registry.get(nonce)
+        if pending is None or pending.transaction is None:
+            raise KeyError(nonce)
+
+        cancel_tx = {
+            'from': self.account.address,
+            'to': self.account.address,
+            'value': 0,
+            'data': b'',
+            'gas': 21000,
+            'nonce': nonce,
+            'chainId': pending.transaction.get('chainId', self.w3.eth.chain_id)
+        }
+        for field in ('gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas', 'type'):
+            if field in pending.transaction:
+                cancel_tx[field] = pending.transaction[field]
+
+        with pending.lock:
+            if not self._bump(pending, cancel_tx):
+                raise Exception(f"Could not broadcast cancellation for nonce {nonce}")
+            pending.cancel_from = len(pending.hashes) - 1
+        self.registry.update(pending)
+        return pending.tx_hash
+
+    def fill_gap(self, nonce: int) -> PendingTransaction:
+        """Occupy an abandoned nonce with a zero-value self-transfer"""
+        transaction = {
+            'from': self.account.address,
+            'to': self.account.address,
+            'value': 0,
+            'data': b'',
+            'gas': 21000,
+            'nonce': nonce,
+            'chainId': self.w3.eth.chain_id,
+            **self.fee_params()
+        }
+        pending = self.sign(transaction)
+        pending.function = "fill_gap"
+        self.broadcast(pending)
+        return pending
+
+    def pending_snapshot(self):
+        """Tracked transactions that are not mined yet"""
+        return self.registry.snapshot()
+
+    def _record_gas(self, pending: PendingTransaction, receipt, cancelled: bool):
+        if self.ledger is None:
+            return
+        transaction = pending.transaction or {}
+        try:
+            self.ledger.record(
+                "cancel" if cancelled else pending.function,
+                0 if cancelled else pending.payload_bytes,
+                receipt,
+                gas_limit=transaction.get("gas"),
+                gas_price=transaction.get("gasPrice")
+            )
+        except Exception as e:
+            # Accounting never fails a write
+            print(f"⚠️ Gas accounting failed for {receipt.transactionHash.hex()}: {e}")
+
+    def _record_outcome(self, receipt, cancelled: bool):
+        if self.outbox is None:
+            return
+        try:
+            self.outbox.mined(receipt, cancelled)
+        except Exception as e:
+            # The transaction is mined either way; the next recovery pass resolves the entry
+            print(f"⚠️ Outbox update failed for {receipt.transactionHash.hex()}: {e}")
+
+    def _find_receipt(self, pending: PendingTransaction):
+        for tx_hash in reversed(pending.hashes):
+            receipt = self._get_receipt(tx_hash)
+            if receipt is not None:
+                return receipt
+        return None
+
+    def _get_receipt(self, tx_hash: bytes):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    def _head_number(self) -> int:
+        """Latest block from the shared tracker, or from the node without one"""
+        if self.head is not None and self.head.latest is not None:
+            return self.head.latest
+        return self.w3.eth.block_number
+
+    def _broadcast_worker(self):
+        while True:
+            pending, on_error = self._broadcast_queue.get()
+            try:
+                self.broadcast(pending)
+            except Exception as e:
+                print(f"❌ Broadcast of transaction {pending.tx_hash.hex()} failed: {e}")
+                if on_error:
+                    on_error(e)
+                pending.receipt_future.set_exception(e)
+                continue
+            self.watch(pending)
+
+    def _raise_fees(self, replacement: dict, previous: dict) -> bool:
+        """Raise every fee field by the bump fraction, respecting the fee cap"""
+        fields = ['maxFeePerGas', 'maxPriorityFeePerGas'] if 'maxFeePerGas' in previous else ['gasPrice']
+        for field in fields:
+            bumped = math.ceil(previous[field] * (1 + self.bump_fraction))
+            if field == 'gasPrice':
+                bumped = max(bumped, self.w3.eth.gas_price)
+            if self.max_fee_wei is not None and bumped > self.max_fee_wei:
+                return False
+            replacement[field] = bumped
+
+        if 'maxFeePerGas' in replacement:
+            # The fee cap must stay above the tip
+            replacement['maxFeePerGas'] = max(replacement['maxFeePerGas'], replacement['maxPriorityFeePerGas'])
+        return True
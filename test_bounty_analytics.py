@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bounty analytics aggregates, reorg rollback and pre-flight balance check
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from bounty_analytics import ZERO_ADDRESS, BountyAnalytics
+from preflight import Preflight, PreflightRejected
+
+FUNDER = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+RECIPIENT = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+VERIFIER = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+
+def event(name, block, log_index, **args):
+    return {
+        "event": name,
+        "args": args,
+        "blockNumber": block,
+        "logIndex": log_index,
+        "blockHash": bytes([block]) * 32,
+        "transactionHash": bytes([block, log_index]) * 16
+    }
+
+def block_hash(block):
+    return "0x" + (bytes([block]) * 32).hex()
+
+def make_store(tmp_path, reorg_depth=128):
+    return BountyAnalytics(str(tmp_path / "analytics.db"), reorg_depth=reorg_depth)
+
+def apply_history(store):
+    store.apply_range([
+        event("BountyFunded", 1, 0, bountyId=1, funder=FUNDER, amount=500),
+        event("ClaimableSet", 1, 1, submissionId=7, recipient=RECIPIENT, amount=200),
+        event("SubmissionVerified", 1, 2, submissionId=7, verifier=VERIFIER, accepted=True)
+    ], 1, block_hash(1))
+    store.apply_range([
+        event("BountyFunded", 2, 0, bountyId=1, funder=FUNDER, amount=300),
+        event("BountyFunded", 2, 1, bountyId=2, funder=FUNDER, amount=100),
+        event("PayoutClaimed", 2, 2, submissionId=7, recipient=RECIPIENT, amount=200)
+    ], 2, block_hash(2))
+
+def test_apply_range_updates_aggregates(tmp_path):
+    store = make_store(tmp_path)
+    apply_history(store)
+
+    assert store.get_bounty(1) == {"total_funded": 800, "funding_count": 2}
+    assert store.get_bounty(2) == {"total_funded": 100, "funding_count": 1}
+    assert store.get_funder(FUNDER) == {"total_funded": 900, "funding_count": 3}
+    assert store.get_claimable(7) == {"recipient": RECIPIENT, "amount": 200, "claimed": True}
+    assert store.get_verification(7) == {"verifier": VERIFIER, "accepted": True}
+    assert store.get_recipient(RECIPIENT) == {
+        "outstanding_amount": 0, "outstanding_count": 0, "paid_amount": 200, "paid_count": 1
+    }
+    assert store.summary() == {
+        "total_funded": 900, "funding_count": 3, "bounty_count": 2, "outstanding_claimable": 0,
+        "outstanding_count": 0, "total_paid": 200, "payout_count": 1, "synced_block": 2
+    }
+    assert store.recent_blocks() == [(2, block_hash(2)), (1, block_hash(1))]
+
+def test_rollback_reverts_events_above_fork(tmp_path):
+    store = make_store(tmp_path)
+    apply_history(store)
+
+    assert store.rollback(1) == 3
+    assert store.cursor == 1
+    assert store.get_bounty(1) == {"total_funded": 500, "funding_count": 1}
+    assert store.get_bounty(2) is None
+    assert store.get_funder(FUNDER) == {"total_funded": 500, "funding_count": 1}
+    assert store.get_claimable(7) == {"recipient": RECIPIENT, "amount": 200, "claimed": False}
+    assert store.get_recipient(RECIPIENT) == {
+        "outstanding_amount": 200, "outstanding_count": 1, "paid_amount": 0, "paid_count": 0
+    }
+    assert store.summary()["bounty_count"] == 1
+    assert store.recent_blocks() == [(1, block_hash(1))]
+
+def test_rollback_to_genesis_empties_every_table(tmp_path):
+    store = make_store(tmp_path)
+    apply_history(store)
+
+    store.rollback(0)
+    assert store.get_bounty(1) is None
+    assert store.get_funder(FUNDER) is None
+    assert store.get_claimable(7) is None
+    assert store.get_verification(7) is None
+    assert store.get_recipient(RECIPIENT) is None
+    assert store.summary() == {
+        "total_funded": 0, "funding_count": 0, "bounty_count": 0, "outstanding_claimable": 0,
+        "outstanding_count": 0, "total_paid": 0, "payout_count": 0, "synced_block": 0
+    }
+
+def test_failed_range_leaves_store_unchanged(tmp_path):
+    store = make_store(tmp_path)
+    apply_history(store)
+
+    # A repeated (block, log index) violates the journal key and aborts the whole range
+    duplicate = event("BountyFunded", 3, 0, bountyId=3, funder=FUNDER, amount=50)
+    with pytest.raises(sqlite3.IntegrityError):
+        store.apply_range([duplicate, duplicate], 3, block_hash(3))
+
+    assert store.cursor == 2
+    assert store.get_bounty(3) is None
+    assert store.summary()["total_funded"] == 900
+
+def test_journal_is_trimmed_to_reorg_depth(tmp_path):
+    store = make_store(tmp_path, reorg_depth=1)
+    apply_history(store)
+    store.apply_range([], 3, block_hash(3))
+
+    # Block 1 is beyond the reorg window, so only block 2 can still be undone
+    assert store.rollback(0) == 3
+    assert store.get_bounty(1) == {"total_funded": 500, "funding_count": 1}
+
+def test_aggregates_survive_reopen(tmp_path):
+    apply_history(make_store(tmp_path))
+    reopened = make_store(tmp_path)
+    assert reopened.cursor == 2
+    assert reopened.get_bounty(1) == {"total_funded": 800, "funding_count": 2}
+
+def test_token_balances_follow_transfers(tmp_path):
+    store = make_store(tmp_path)
+    store.apply_range([
+        event("Transfer", 1, 0, **{"from": ZERO_ADDRESS, "to": FUNDER, "value": 1000}),
+        event("Transfer", 1, 1, **{"from": FUNDER, "to": RECIPIENT, "value": 300})
+    ], 1, block_hash(1))
+    store.apply_range([
+        event("Transfer", 2, 0, **{"from": RECIPIENT, "to": ZERO_ADDRESS, "value": 100})
+    ], 2, block_hash(2))
+
+    assert store.get_token_balance(FUNDER) == 700
+    assert store.get_token_balance(RECIPIENT) == 200
+    assert store.get_token_balance(ZERO_ADDRESS) is None
+    assert store.get_token_balance(VERIFIER) is None
+
+    store.rollback(1)
+    assert store.get_token_balance(RECIPIENT) == 300
+
+class FakeToken:
+    """balanceOf(...).call() that counts the RPC reads it would send"""
+
+    abi = []
+
+    def __init__(self, balance):
+        self.balance = balance
+        self.calls = 0
+        self.functions = SimpleNamespace(balanceOf=lambda account: SimpleNamespace(call=self.call))
+
+    def call(self, block_identifier=None):
+        self.calls += 1
+        return self.balance
+
+def make_preflight(store, simulate, chain_balance=0):
+    token = FakeToken(chain_balance)
+    client = SimpleNamespace(contracts={"mock_usdt": token}, account=SimpleNamespace(address=FUNDER))
+    return Preflight(client, store, simulate=simulate), token
+
+def test_fund_bounty_checks_the_mirrored_balance(tmp_path):
+    store = make_store(tmp_path)
+    store.apply_range([
+        event("Transfer", 1, 0, **{"from": ZERO_ADDRESS, "to": FUNDER, "value": 500})
+    ], 1, block_hash(1))
+    preflight, token = make_preflight(store, simulate=False)
+
+    preflight.fund_bounty(1, 500)
+    with pytest.raises(PreflightRejected) as rejected:
+        preflight.fund_bounty(1, 501)
+    assert rejected.value.source == "balance"
+    assert token.calls == 0
+
+def test_fund_bounty_reads_the_chain_when_simulating(tmp_path):
+    preflight, token = make_preflight(make_store(tmp_path), simulate=True, chain_balance=1000)
+    preflight.fund_bounty(1, 1000)
+    assert token.calls == 1
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Unit tests for wait policies, the block head tracker and the pinned-block read cache
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from chain_head import BlockHeadTracker, BlockReadCache, WaitPolicy
+
+@pytest.mark.parametrize("value, mode, confirmations, waits", [
+    (None, "receipt", 1, True),
+    ("", "receipt", 1, True),
+    ("none", "none", 1, False),
+    (" Mempool ", "mempool", 1, False),
+    ("finalized", "finalized", 1, True),
+    ("confirmations=3", "confirmations", 3, True)
+])
+def test_wait_policy_parse(value, mode, confirmations, waits):
+    policy = WaitPolicy.parse(value)
+    assert (policy.mode, policy.confirmations, policy.waits_for_receipt) == (mode, confirmations, waits)
+
+def test_wait_policy_round_trips_through_str():
+    for value in ("none", "mempool", "receipt", "confirmations=12", "finalized"):
+        assert str(WaitPolicy.parse(value)) == value
+
+@pytest.mark.parametrize("value", ["confirmations", "confirmations=0", "confirmations=-1", "eventually"])
+def test_wait_policy_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        WaitPolicy.parse(value)
+
+class FakeEth:
+    """Node without the finalized and safe block tags"""
+
+    def __init__(self, block_number):
+        self.block_number = block_number
+
+    def get_block(self, tag):
+        raise ValueError({"code": -32602, "message": f"invalid block tag {tag}"})
+
+def test_tracker_falls_back_to_finality_depth():
+    eth = FakeEth(100)
+    tracker = BlockHeadTracker(SimpleNamespace(eth=eth), finality_depth=64)
+    tracker.poll()
+    assert tracker.snapshot() == {"latest": 100, "safe": 36, "finalized": 36}
+
+    eth.block_number = 30
+    tracker.poll()
+    assert tracker.snapshot() == {"latest": 30, "safe": 0, "finalized": 0}
+
+def test_tracker_resolves_reads():
+    tracker = BlockHeadTracker(SimpleNamespace(eth=FakeEth(100)), finality_depth=10)
+    assert tracker.resolve() == 100
+    assert tracker.resolve(at="finalized") == 90
+    assert tracker.resolve(block=42) == 42
+    with pytest.raises(ValueError):
+        tracker.resolve(block=101)
+    with pytest.raises(ValueError):
+        tracker.resolve(at="pending")
+
+def test_waiters_wake_on_a_new_head():
+    eth = FakeEth(100)
+    tracker = BlockHeadTracker(SimpleNamespace(eth=eth))
+    tracker.poll()
+    assert not tracker.wait_for_block(101, timeout=0.01)
+    eth.block_number = 101
+    tracker.poll()
+    assert tracker.wait_for_block(101, timeout=0.01)
+
+def test_cache_keys_by_call_and_block():
+    cache = BlockReadCache()
+    loads = []
+
+    def load(value):
+        loads.append(value)
+        return value
+
+    assert cache.get("balance", 10, lambda: load(1)) == 1
+    assert cache.get("balance", 10, lambda: load(2)) == 1
+    assert cache.get("balance", 11, lambda: load(3)) == 3
+    assert cache.get("owner", 10, lambda: load(4)) == 4
+    assert loads == [1, 3, 4]
+    assert cache.snapshot() == {"entries": 3, "hits": 1, "misses": 3, "coalesced": 0}
+
+def test_cache_evicts_least_recently_used():
+    cache = BlockReadCache(max_entries=2)
+    cache.get("a", 1, lambda: "a")
+    cache.get("b", 1, lambda: "b")
+    cache.get("a", 1, lambda: "stale")
+    cache.get("c", 1, lambda: "c")
+    assert cache.get("a", 1, lambda: "reloaded") == "a"
+    assert cache.get("b", 1, lambda: "reloaded") == "reloaded"
+
+def test_failed_load_is_not_cached():
+    cache = BlockReadCache()
+
+    def fail():
+        raise ConnectionError("node down")
+
+    with pytest.raises(ConnectionError):
+        cache.get("balance", 10, fail)
+    assert cache.get("balance", 10, lambda: 5) == 5
+
+def test_concurrent_misses_share_one_load():
+    cache = BlockReadCache()
+    started = threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(cache.get, "balance", 10, slow_load)
+        started.wait()
+        followers = [pool.submit(cache.get, "balance", 10, slow_load) for _ in range(3)]
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert cache.snapshot()["coalesced"] == 3
+
+def test_concurrent_waiters_get_the_load_error():
+    cache = BlockReadCache()
+    started = threading.Event()
+
+    def failing_load():
+        started.set()
+        time.sleep(0.1)
+        raise ConnectionError("node down")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(cache.get, "balance", 10, failing_load)
+        started.wait()
+        follower = pool.submit(cache.get, "balance", 10, failing_load)
+        for future in (leader, follower):
+            with pytest.raises(ConnectionError):
+                future.result()
+    assert cache.snapshot()["entries"] == 0
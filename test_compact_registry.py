@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compact registry MIME type registration
+Runs without a node: the registry contract and sends are stand-ins
+"""
+
+import sys
+sys.path.append('scripts')
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from blockchain_client import BlockchainClient
+
+class FakeCall:
+    def __init__(self, result):
+        self.result = result
+
+    def call(self, block_identifier="latest"):
+        return self.result(block_identifier)
+
+class FakeRegistry:
+    """mimeCodes as seen by this process; registered_elsewhere is visible from block 5"""
+
+    def __init__(self, registered_elsewhere=False):
+        self.codes = {}
+        self.registered_elsewhere = registered_elsewhere
+        self.functions = SimpleNamespace(mimeCodes=self._mime_codes, registerMimeType=lambda mime: mime)
+
+    def _mime_codes(self, key):
+        def result(block_identifier):
+            if self.registered_elsewhere and block_identifier == 5:
+                return 7
+            return self.codes.get(key, 0)
+        return FakeCall(result)
+
+def make_client(registry):
+    client = object.__new__(BlockchainClient)
+    client.contracts = {"compact_submission_registry": registry}
+    client._mime_codes = {}
+    client._mime_types = {}
+    client._mime_locks = {}
+    client.sent = []
+    return client
+
+def test_concurrent_first_uses_register_once():
+    registry = FakeRegistry()
+    client = make_client(registry)
+
+    def send(mime, gas, idempotent=True):
+        client.sent.append(mime)
+        time.sleep(0.05)
+        return SimpleNamespace(status=1, blockNumber=4, logs=[{"topics": [b"", (3).to_bytes(32, "big")]}])
+
+    client._send_transaction = send
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        codes = list(pool.map(lambda _: client._mime_code("image/png"), range(4)))
+    assert codes == [3] * 4
+    assert client.sent == ["image/png"]
+
+def test_registration_lost_to_another_process_reads_the_code():
+    registry = FakeRegistry(registered_elsewhere=True)
+    client = make_client(registry)
+    client._send_transaction = lambda mime, gas, idempotent=True: SimpleNamespace(status=0, blockNumber=5, logs=[])
+
+    assert client._mime_code("image/png") == 7
+    assert client._mime_types[7] == "image/png"
+
+def test_failed_registration_raises():
+    client = make_client(FakeRegistry())
+    client._send_transaction = lambda mime, gas, idempotent=True: SimpleNamespace(status=0, blockNumber=5, logs=[])
+    with pytest.raises(Exception, match="Failed to register MIME type"):
+        client._mime_code("image/png")
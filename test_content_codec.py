@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the compact registry content hash encoding
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import hashlib
+import pytest
+from content_codec import (FORMAT_CID_V0, FORMAT_CID_V1_RAW, FORMAT_HEX, SHA256_MULTIHASH_PREFIX, base58_decode,
+                           base58_encode, cid_v1_raw, decode_content_hash, encode_content_hash, is_cid_v0,
+                           is_cid_v1_raw, pack_content_hash)
+
+DIGEST = hashlib.sha256(b"hello world").digest()
+CID_V0 = base58_encode(SHA256_MULTIHASH_PREFIX + DIGEST)
+
+def test_base58_round_trip_keeps_leading_zeros():
+    data = b"\x00\x00" + DIGEST
+    encoded = base58_encode(data)
+    assert encoded.startswith("11")
+    assert base58_decode(encoded) == data
+
+def test_base58_rejects_invalid_characters():
+    with pytest.raises(ValueError):
+        base58_decode("0OIl")
+
+def test_cid_v0_round_trip():
+    assert is_cid_v0(CID_V0)
+    assert CID_V0.startswith("Qm") and len(CID_V0) == 46
+    assert pack_content_hash(CID_V0) == (DIGEST, FORMAT_CID_V0)
+    assert decode_content_hash(DIGEST, FORMAT_CID_V0) == CID_V0
+
+def test_cid_v1_round_trip():
+    cid = cid_v1_raw(DIGEST)
+    assert cid.startswith("bafkrei") and len(cid) == 59
+    assert is_cid_v1_raw(cid)
+    assert not is_cid_v0(cid)
+    assert pack_content_hash(cid) == (DIGEST, FORMAT_CID_V1_RAW)
+    assert decode_content_hash(DIGEST, FORMAT_CID_V1_RAW) == cid
+
+def test_hex_digest_round_trip():
+    content_hash = "0x" + DIGEST.hex()
+    assert pack_content_hash(content_hash) == (DIGEST, FORMAT_HEX)
+    assert decode_content_hash(DIGEST, FORMAT_HEX) == content_hash
+
+@pytest.mark.parametrize("content_hash", ["0x" + DIGEST.hex().upper(), cid_v1_raw(DIGEST).upper().replace("B", "b", 1)])
+def test_non_canonical_content_hash_is_rejected(content_hash):
+    # Looked up leniently, but never stored since it would read back differently
+    assert encode_content_hash(content_hash) == DIGEST
+    with pytest.raises(ValueError):
+        pack_content_hash(content_hash)
+
+@pytest.mark.parametrize("content_hash", ["", "0x1234", "Qm" + "x" * 44, "bafy" + "a" * 55, "not-a-hash"])
+def test_unsupported_content_hash_is_rejected(content_hash):
+    with pytest.raises(ValueError):
+        encode_content_hash(content_hash)
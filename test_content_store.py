@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the content-addressed upload store
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import hashlib
+import pytest
+from content_store import ContentStore
+
+def make_store(tmp_path):
+    return ContentStore(str(tmp_path / "files"), str(tmp_path / "index.db"))
+
+def upload(store, data: bytes, mime_type: str = "text/plain"):
+    writer = store.writer()
+    writer.write(data)
+    return writer.commit(mime_type)
+
+def test_commit_stores_without_indexing(tmp_path):
+    store = make_store(tmp_path)
+    record = upload(store, b"hello")
+
+    assert record["sha256"] == hashlib.sha256(b"hello").hexdigest()
+    assert record["deduplicated"] is False
+    assert store.get(bytes.fromhex(record["sha256"])) is None
+    assert upload(store, b"hello")["deduplicated"] is True
+
+def test_claim_indexes_and_claims_in_one_step(tmp_path):
+    store = make_store(tmp_path)
+    record = upload(store, b"hello")
+    digest = bytes.fromhex(record["sha256"])
+
+    state, indexed = store.claim_registration(digest, record["size"], record["mime_type"])
+    assert state == "claimed"
+    assert (indexed["cid"], indexed["size"], indexed["mime_type"]) == (record["cid"], 5, "text/plain")
+
+    # Another process sees the claim as soon as it sees the row
+    other = make_store(tmp_path)
+    assert other.claim_registration(digest, 5, "application/octet-stream")[0] == "in_progress"
+
+    store.registered(digest, 7, "0x" + "ab" * 32)
+    state, indexed = other.claim_registration(digest, 5, "application/octet-stream")
+    assert state == "registered"
+    assert (indexed["submission_id"], indexed["mime_type"]) == (7, "text/plain")
+
+def test_claim_of_unknown_content(tmp_path):
+    with pytest.raises(KeyError):
+        make_store(tmp_path).claim_registration(hashlib.sha256(b"missing").digest())
+
+def test_released_content_is_claimed_again(tmp_path):
+    store = make_store(tmp_path)
+    record = upload(store, b"hello")
+    digest = bytes.fromhex(record["sha256"])
+    store.claim_registration(digest, record["size"], record["mime_type"])
+    store.release(digest)
+
+    assert make_store(tmp_path).claim_registration(digest)[0] == "claimed"
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Idempotency-Key middleware
+Runs without a node against a minimal FastAPI app
+"""
+
+import sys
+sys.path.append('scripts')
+
+import hashlib
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+from idempotency import IdempotencyMiddleware
+from idempotency_store import IdempotencyStore, current_request
+
+@pytest.fixture
+def client(tmp_path):
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        app.state.calls += 1
+        return {"payload": payload, "call": app.state.calls}
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        body = b""
+        async for chunk in request.stream():
+            body += chunk
+        if request.headers["content-type"].startswith("multipart/form-data"):
+            # Single file part: the content sits between the part headers and the closing boundary
+            body = body.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+        digest = hashlib.sha256(body).hexdigest()
+        request_key = current_request.get()
+        if request_key:
+            await run_in_threadpool(request_key.check_content, digest)
+        app.state.calls += 1
+        return {"sha256": digest, "call": app.state.calls}
+
+    store = IdempotencyStore(str(tmp_path / "idempotency.db"), ttl_seconds=3600, lease_seconds=30)
+    app.add_middleware(IdempotencyMiddleware, store=store, streaming_paths=("/upload",))
+    return TestClient(app)
+
+def post(client, path, key, **kwargs):
+    return client.post(path, headers={"Idempotency-Key": key, **kwargs.pop("headers", {})}, **kwargs)
+
+def test_buffered_retry_is_replayed(client):
+    first = post(client, "/echo", "key", json={"a": 1})
+    retry = post(client, "/echo", "key", json={"a": 1})
+    assert retry.json() == first.json() == {"payload": {"a": 1}, "call": 1}
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert post(client, "/echo", "key", json={"a": 2}).status_code == 422
+
+def multipart(boundary, content):
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.txt\"\r\n\r\n"
+            f"{content}\r\n--{boundary}--\r\n")
+    return {"headers": {"content-type": f"multipart/form-data; boundary={boundary}"}, "content": body.encode()}
+
+def test_streamed_retry_with_new_boundary_is_replayed(client):
+    first = post(client, "/upload", "key", **multipart("first", "same file"))
+    retry = post(client, "/upload", "key", **multipart("second-boundary", "same file"))
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert post(client, "/upload", "key", **multipart("third", "other file")).status_code == 422
+
+def test_streamed_body_without_length_is_compared_by_digest(client):
+    headers = {"content-type": "application/octet-stream"}
+    first = post(client, "/upload", "key", headers=headers, content=iter([b"chunk-1", b"chunk-2"]))
+    assert "content-length" not in first.request.headers
+
+    other = post(client, "/upload", "key", headers=headers, content=iter([b"chunk-3", b"chunk-4"]))
+    assert other.status_code == 422
+    same = post(client, "/upload", "key", headers=headers, content=iter([b"chunk-1", b"chunk-2"]))
+    assert same.json() == first.json() == {"sha256": hashlib.sha256(b"chunk-1chunk-2").hexdigest(), "call": 1}
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persisted idempotency key store
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import threading
+import pytest
+from idempotency_store import ContentMismatch, IdempotencyStore, IdempotentRequest, ReplayCompleted
+
+def make_store(tmp_path, lease_seconds=60):
+    return IdempotencyStore(str(tmp_path / "idempotency.db"), ttl_seconds=3600, lease_seconds=lease_seconds)
+
+def test_claim_complete_replays_response(tmp_path):
+    store = make_store(tmp_path)
+    state, record = store.claim("key", "fingerprint")
+    assert state == "claimed"
+
+    store.complete("key", record["owner"], 200, {"success": True})
+    assert store.claim("key", "fingerprint") == ("completed", {"status_code": 200, "response": {"success": True}})
+    assert store.claim("key", "other") == ("mismatch", None)
+
+def test_live_lease_is_busy_until_released(tmp_path):
+    store = make_store(tmp_path)
+    _, record = store.claim("key", "fingerprint")
+    assert store.claim("key", "fingerprint") == ("busy", None)
+    assert store.renew("key", record["owner"])
+
+    store.release("key", record["owner"])
+    state, retry = store.claim("key", "fingerprint")
+    assert state == "claimed"
+    assert retry["owner"] != record["owner"]
+    # The previous owner can no longer renew or complete
+    assert not store.renew("key", record["owner"])
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    store = make_store(tmp_path, lease_seconds=0)
+    store.claim("key", "fingerprint")
+    state, _ = store.claim("key", "fingerprint")
+    assert state == "claimed"
+
+def test_transactions_survive_reopen(tmp_path):
+    store = make_store(tmp_path)
+    store.claim("key", "fingerprint")
+    store.record_transaction("key", 0, b"\x01" * 32, b"raw-1")
+    store.record_transaction("key", 0, b"\x02" * 32, b"raw-2")
+    store.record_transaction("key", 1, b"\x03" * 32, b"raw-3")
+
+    reopened = make_store(tmp_path)
+    assert reopened.get_transactions("key", 0) == [(b"\x01" * 32, b"raw-1"), (b"\x02" * 32, b"raw-2")]
+    assert reopened.get_transactions("key", 1) == [(b"\x03" * 32, b"raw-3")]
+    assert reopened.get_transactions("key", 2) == []
+
+def test_request_steps_are_sequential(tmp_path):
+    request = IdempotentRequest(make_store(tmp_path), "key")
+    assert request.next_step() == 0
+    assert request.reserve_steps(3) == 1
+    assert request.next_step() == 4
+
+def test_concurrent_steps_are_unique(tmp_path):
+    request = IdempotentRequest(make_store(tmp_path), "key")
+    steps = []
+    threads = [threading.Thread(target=lambda: steps.extend(request.next_step() for _ in range(100))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(steps) == list(range(400))
+
+def test_content_digest_is_bound_on_first_use(tmp_path):
+    store = make_store(tmp_path)
+    store.claim("key", "fingerprint")
+    assert store.bind_content("key", "aa")
+    assert store.bind_content("key", "aa")
+    assert not store.bind_content("key", "bb")
+    assert not store.bind_content("unknown", "aa")
+
+def test_check_content_replays_or_rejects(tmp_path):
+    store = make_store(tmp_path)
+    _, record = store.claim("key", "fingerprint")
+    IdempotentRequest(store, "key").check_content("aa")
+    store.complete("key", record["owner"], 200, {"sha256": "aa"})
+
+    _, completed = store.claim("key", "fingerprint")
+    with pytest.raises(ReplayCompleted) as replay:
+        IdempotentRequest(store, "key", completed=completed).check_content("aa")
+    assert replay.value.record["response"] == {"sha256": "aa"}
+    with pytest.raises(ContentMismatch):
+        IdempotentRequest(store, "key", completed=completed).check_content("bb")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Merkle-batched submission anchoring
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import os
+from types import SimpleNamespace
+import pytest
+from merkle_anchor import (AnchorStore, SubmissionAnchorer, build_tree, format_anchor_id, get_proof, hash_leaf,
+                           hash_pair, parse_anchor_id)
+
+SUBMITTER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+def make_record(i):
+    return {"submitter": SUBMITTER, "content_hash": f"Qm{i}", "uri": f"ipfs://Qm{i}", "mime_type": "text/plain",
+            "timestamp": 1700000000 + i}
+
+def make_leaves(count):
+    return [hash_leaf(*make_record(i).values()) for i in range(count)]
+
+class FakeClient:
+    """Registry whose anchorBatch only accepts a batch starting at anchoredCount"""
+
+    def __init__(self):
+        self.batches = []
+
+    def anchored_count(self):
+        return sum(count for _, _, count, _ in self.batches)
+
+    def anchor_batch(self, root, first_index, count):
+        if first_index != self.anchored_count():
+            raise Exception("anchorBatch reverted")
+        self.batches.append((len(self.batches), root, count, bytes([len(self.batches)]) * 32))
+        return len(self.batches) - 1, SimpleNamespace(transactionHash=self.batches[-1][3])
+
+    def get_anchored_batch(self, first_index):
+        start = 0
+        for batch in self.batches:
+            if start == first_index:
+                return batch
+            start += batch[2]
+        return None
+
+def verify(leaf, proof, root):
+    node = leaf
+    for sibling in proof:
+        node = hash_pair(node, sibling)
+    return node == root
+
+def test_root_of_two_leaves():
+    leaves = make_leaves(2)
+    assert build_tree(leaves)[-1] == [hash_pair(leaves[0], leaves[1])]
+
+def test_hash_pair_is_commutative():
+    a, b = make_leaves(2)
+    assert hash_pair(a, b) == hash_pair(b, a)
+
+def test_unpaired_node_is_promoted():
+    leaves = make_leaves(3)
+    levels = build_tree(leaves)
+    assert levels[1] == [hash_pair(leaves[0], leaves[1]), leaves[2]]
+    assert levels[-1] == [hash_pair(levels[1][0], leaves[2])]
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 13])
+def test_every_proof_verifies(count):
+    leaves = make_leaves(count)
+    levels = build_tree(leaves)
+    root = levels[-1][0]
+    for index, leaf in enumerate(leaves):
+        assert verify(leaf, get_proof(levels, index), root)
+
+def test_proof_rejects_other_leaf():
+    leaves = make_leaves(4)
+    levels = build_tree(leaves)
+    assert not verify(leaves[1], get_proof(levels, 0), levels[-1][0])
+
+def test_anchor_id_round_trip():
+    assert parse_anchor_id(format_anchor_id(42)) == 42
+    for invalid in ("42", "anchor-", "anchor--1", "anchor-x"):
+        with pytest.raises(ValueError):
+            parse_anchor_id(invalid)
+
+def test_store_finds_batches_after_reopen(tmp_path):
+    store = AnchorStore(str(tmp_path))
+    leaves = make_leaves(5)
+    assert [store.append(leaf, make_record(i)) for i, leaf in enumerate(leaves)] == [0, 1, 2, 3, 4]
+
+    root = build_tree(leaves[:3])[-1][0]
+    store.append_batch(0, 3, 1, root, b"\x11" * 32)
+
+    reopened = AnchorStore(str(tmp_path))
+    assert reopened.leaf_count == 5
+    assert reopened.anchored_count == 3
+    assert reopened.read_leaves(0, 3) == leaves[:3]
+    assert reopened.find_batch(2) == (0, 3, 1, root, b"\x11" * 32)
+    assert reopened.find_batch(3) is None
+    assert reopened.read_record(4) == make_record(4)
+
+def test_incomplete_add_is_dropped_on_reopen(tmp_path):
+    store = AnchorStore(str(tmp_path))
+    store.append(make_leaves(1)[0], make_record(0))
+    # Crash after the record was written but before its leaf
+    offset = os.path.getsize(tmp_path / "submissions.bin")
+    with open(tmp_path / "submissions.bin", "ab") as f:
+        f.write(b"\x00\x00\x00\x10{partial")
+    with open(tmp_path / "submission_index.bin", "ab") as f:
+        f.write(offset.to_bytes(8, "big"))
+
+    reopened = AnchorStore(str(tmp_path))
+    assert reopened.leaf_count == 1
+    assert os.path.getsize(tmp_path / "submissions.bin") == offset
+    assert reopened.read_record(0) == make_record(0)
+    assert reopened.append(make_leaves(2)[1], make_record(1)) == 1
+    assert reopened.read_record(1) == make_record(1)
+
+def test_leaves_without_records_are_kept(tmp_path):
+    leaves = make_leaves(2)
+    with open(tmp_path / "leaves.bin", "wb") as f:
+        f.write(b"".join(leaves))
+
+    store = AnchorStore(str(tmp_path))
+    assert store.leaf_count == 2
+    assert store.read_record(1) is None
+    assert store.append(make_leaves(3)[2], make_record(2)) == 2
+    assert store.read_record(2) == make_record(2)
+
+def test_anchorer_records_batches_missing_locally(tmp_path):
+    client = FakeClient()
+    anchorer = SubmissionAnchorer(client, AnchorStore(str(tmp_path)), batch_size=2, window_seconds=60)
+    for i in range(5):
+        anchorer.add(*make_record(i).values())
+    assert anchorer.anchor_pending() == 0
+
+    # Crash after the second batch was mined but before it was recorded
+    root = build_tree(make_leaves(4)[2:])[-1][0]
+    client.anchor_batch(root, 2, 2)
+    restarted = SubmissionAnchorer(client, AnchorStore(str(tmp_path)), batch_size=2, window_seconds=60)
+    assert restarted.pending_count == 3
+
+    # The same leaves are not anchored again: the missing batch is recorded, then the rest is anchored
+    assert restarted.anchor_pending() == 2
+    assert [count for _, _, count, _ in client.batches] == [2, 2, 1]
+    assert restarted.get_proof(3)["batch_id"] == 1
+    assert restarted.get_submission(3) == make_record(3)
+    assert restarted.pending_count == 0
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for local nonce allocation
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+from types import SimpleNamespace
+from blockchain_client import BlockchainClient
+from nonce_manager import NonceManager, nonce_taken
+
+class FakeEth:
+    def __init__(self, pending):
+        self.pending = pending
+        self.calls = 0
+
+    def get_transaction_count(self, address, block_identifier):
+        assert block_identifier == "pending"
+        self.calls += 1
+        return self.pending
+
+def make_manager(pending=10):
+    eth = FakeEth(pending)
+    return NonceManager(SimpleNamespace(eth=eth), "0x0000000000000000000000000000000000000001"), eth
+
+def test_reserves_consecutive_nonces_from_one_read():
+    manager, eth = make_manager()
+    assert [manager.reserve() for _ in range(4)] == [10, 11, 12, 13]
+    assert eth.calls == 1
+
+def test_released_last_nonce_is_reused():
+    manager, _ = make_manager()
+    nonce = manager.reserve()
+    manager.release(nonce)
+    assert manager.reserve() == nonce
+
+def test_released_gap_is_filled_before_counter_advances():
+    manager, _ = make_manager()
+    for _ in range(4):
+        manager.reserve()
+    manager.release(11)
+    assert manager.reserve() == 11
+    assert manager.reserve() == 14
+
+def test_trailing_releases_collapse_into_counter():
+    manager, _ = make_manager()
+    for _ in range(4):
+        manager.reserve()
+    manager.release(12)
+    manager.release(13)
+    manager.release(11)
+    assert [manager.reserve() for _ in range(3)] == [11, 12, 13]
+
+def test_resync_rereads_the_node():
+    manager, eth = make_manager()
+    manager.reserve()
+    manager.reserve()
+    manager.release(10)
+    eth.pending = 20
+    manager.resync()
+    assert manager.reserve() == 20
+    assert eth.calls == 2
+
+def test_prune_drops_used_releases():
+    manager, _ = make_manager()
+    for _ in range(4):
+        manager.reserve()
+    manager.release(10)
+    manager.release(12)
+    manager.prune(11)
+    assert manager.reserve() == 12
+    assert manager.reserve() == 14
+
+def test_nonce_taken_errors():
+    assert nonce_taken(ValueError({"code": -32000, "message": "nonce too low: next nonce 12, tx nonce 11"}))
+    assert nonce_taken(ValueError({"code": -32000, "message": "replacement transaction underpriced"}))
+    assert not nonce_taken(ValueError({"code": -32000, "message": "insufficient funds for gas * price + value"}))
+
+class FakeChain:
+    """Account nonce of a node; a broadcast below it is rejected like geth does"""
+
+    def __init__(self, nonce):
+        self.nonce = nonce
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.nonce
+
+    def broadcast(self, pending):
+        if pending.nonce < self.nonce:
+            raise ValueError({"code": -32000, "message": "nonce too low"})
+        self.nonce = pending.nonce + 1
+
+class FakeFunctionCall:
+    fn_name = "registerSubmission"
+    address = "0x0000000000000000000000000000000000000002"
+
+    def _encode_transaction_data(self):
+        return "0x"
+
+    def build_transaction(self, params):
+        return dict(params)
+
+def make_client(chain):
+    client = object.__new__(BlockchainClient)
+    client.account = SimpleNamespace(address="0x0000000000000000000000000000000000000001")
+    client.nonces = NonceManager(SimpleNamespace(eth=chain), client.account.address)
+    client.outbox = SimpleNamespace(enqueue=lambda *args: 1, signed=lambda *args: None, failed=lambda *args: None)
+    client.supervisor = SimpleNamespace(
+        fee_params=lambda: {},
+        sign=lambda transaction: SimpleNamespace(nonce=transaction["nonce"], tx_hash=b"", raw_tx=b""),
+        broadcast=chain.broadcast,
+        watch=lambda pending: None
+    )
+    return client
+
+def test_external_transaction_does_not_stall_the_counter():
+    chain = FakeChain(10)
+    client = make_client(chain)
+    assert client._send_transaction(FakeFunctionCall(), 100000, "mempool").nonce == 10
+
+    # A script or deploy with the same key sends two transactions
+    chain.nonce += 2
+    assert client._send_transaction(FakeFunctionCall(), 100000, "mempool").nonce == 13
+    assert client._send_transaction(FakeFunctionCall(), 100000, "mempool").nonce == 14
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for multi-endpoint RPC routing
+Runs without a node
+"""
+
+import sys
+import time
+sys.path.append('scripts')
+
+from rpc_router import RoutingProvider, pinned_block
+
+class FakeNode:
+    """JSON-RPC node at a fixed head; answers reads at later blocks like geth does"""
+
+    def __init__(self, head):
+        self.head = head
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.head)}
+        block = pinned_block(method, params)
+        if block is not None and block > self.head:
+            return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "header not found"}}
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x01"}
+
+def make_router(*heads):
+    router = RoutingProvider([f"http://node{i}:8545" for i in range(len(heads))], resample_interval=3600)
+    nodes = [FakeNode(head) for head in heads]
+    for endpoint, node in zip(router.endpoints, nodes):
+        endpoint.provider = node
+        endpoint.last_used = float("inf")
+    return router, nodes
+
+def call_at(block):
+    return [{"to": "0x0000000000000000000000000000000000000001", "data": "0x"}, hex(block)]
+
+def test_pinned_block_params():
+    assert pinned_block("eth_call", call_at(12)) == 12
+    assert pinned_block("eth_call", [{}, "latest"]) is None
+    assert pinned_block("eth_getLogs", [{"fromBlock": "0x1", "toBlock": "0x10"}]) == 16
+    assert pinned_block("eth_chainId", []) is None
+
+def test_block_number_comes_from_the_primary():
+    router, (primary, replica) = make_router(100, 90)
+    router.primary.ewma_latency = 1.0
+    router.endpoints[1].ewma_latency = 0.001
+
+    assert int(router.make_request("eth_blockNumber", [])["result"], 16) == 100
+    assert replica.calls == []
+
+def test_read_after_write_skips_a_lagging_replica():
+    router, (primary, replica) = make_router(100, 90)
+    # The replica is faster, so unpinned reads prefer it
+    router.primary.ewma_latency = 1.0
+    router.endpoints[1].ewma_latency = 0.001
+    router.make_request("eth_blockNumber", [])
+    router.refresh_heads()
+    deadline = time.monotonic() + 5
+    while router.endpoints[1].head is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert router.endpoints[1].head == 90
+    assert "result" in router.make_request("eth_call", call_at(100))
+    assert replica.calls == ["eth_blockNumber"]
+    assert primary.calls[-1] == "eth_call"
+
+    router.make_request("eth_call", call_at(90))
+    assert replica.calls[-1] == "eth_call"
+
+def test_unknown_replica_head_goes_to_the_primary():
+    router, (primary, replica) = make_router(100, 100)
+    router.primary.ewma_latency = 1.0
+    router.endpoints[1].ewma_latency = 0.001
+
+    router.make_request("eth_call", call_at(100))
+    assert replica.calls == []
+    assert primary.calls == ["eth_call"]
+
+    # A successful pinned read shows the node has the block
+    router.make_request("eth_call", call_at(50))
+    assert router.make_request("eth_call", [{}, "latest"])
+    assert replica.calls == ["eth_call"]
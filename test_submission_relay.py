@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Unit tests for EIP-712 signed submission relaying
+Runs without a node: the registry and RPC router are stand-ins
+"""
+
+import sys
+sys.path.append('scripts')
+
+import time
+from types import SimpleNamespace
+from eth_account import Account
+from eth_account.messages import encode_structured_data
+from submission_relay import (BATCH_BASE_GAS, SubmissionRelayer, domain_separator, estimate_item_gas,
+                              sign_submission, submission_message)
+
+CHAIN_ID = 31337
+REGISTRY = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+SIGNER = Account.from_key("0x59c6995e998f97a5a0044966f0d0a1b7c6a6d2e1a8c4e1f3b2a1d0c9b8a7f6e5")
+
+class FakeRegistry:
+    address = REGISTRY
+
+    def encodeABI(self, fn_name, args):
+        submitter, word = args
+        return f"{fn_name}:{submitter}:{word}"
+
+class FakeRpc:
+    """Answers nonceBitmap calls from a {(submitter, word): bitmap} dict"""
+
+    def __init__(self, bitmaps):
+        self.bitmaps = bitmaps
+        self.batches = []
+
+    def batch_request(self, calls):
+        self.batches.append(calls)
+        responses = []
+        for _, (call, _) in calls:
+            _, submitter, word = call["data"].split(":")
+            responses.append({"result": hex(self.bitmaps.get((submitter, int(word)), 0))})
+        return responses
+
+def make_relayer(bitmaps=None, max_batch_gas=15000000):
+    client = SimpleNamespace(
+        contracts={"submission_registry": FakeRegistry()},
+        w3=SimpleNamespace(eth=SimpleNamespace(chain_id=CHAIN_ID)),
+        rpc=FakeRpc(bitmaps or {})
+    )
+    return SubmissionRelayer(client, max_batch_gas=max_batch_gas, verify_workers=1)
+
+def make_item(nonce, account=SIGNER, deadline=None, uri_size=20):
+    item = {
+        "submitter": account.address,
+        "content_hash": f"Qm{nonce:044d}",
+        "uri": "ipfs://" + "x" * uri_size,
+        "mime_type": "text/plain",
+        "nonce": nonce,
+        "deadline": deadline if deadline is not None else int(time.time()) + 3600
+    }
+    item["signature"] = sign_submission(account.key, domain_separator(CHAIN_ID, REGISTRY), item)
+    return item
+
+def test_message_matches_eip712_typed_data():
+    relayer = make_relayer()
+    item = make_item(5)
+    typed = dict(relayer.typed_data())
+    typed["message"] = {
+        "submitter": item["submitter"],
+        "contentHash": item["content_hash"],
+        "uri": item["uri"],
+        "mime": item["mime_type"],
+        "nonce": item["nonce"],
+        "deadline": item["deadline"]
+    }
+    expected = encode_structured_data(typed)
+    assert submission_message(relayer.separator, item) == expected
+    # A wallet's eth_signTypedData_v4 signature verifies against our message
+    wallet_signature = Account.sign_message(expected, SIGNER.key).signature
+    assert Account.recover_message(submission_message(relayer.separator, item),
+                                   signature=wallet_signature) == SIGNER.address
+
+def test_signature_is_bound_to_chain_and_registry():
+    item = make_item(1)
+    for separator in (domain_separator(1, REGISTRY),
+                      domain_separator(CHAIN_ID, "0x0000000000000000000000000000000000000001")):
+        assert Account.recover_message(submission_message(separator, item),
+                                       signature=item["signature"]) != SIGNER.address
+
+def test_verify_reports_each_rejection():
+    other = Account.from_key("0x" + "11" * 32)
+    relayer = make_relayer({(SIGNER.address, 0): 1 << 2})
+
+    valid = make_item(1)
+    expired = make_item(3, deadline=int(time.time()) - 1)
+    used = make_item(2)
+    forged = dict(make_item(4, account=other), submitter=SIGNER.address)
+    reasons = relayer.verify([valid, expired, used, forged, valid])
+    assert reasons == [None, "expired", "nonce_used", "bad_signature", "duplicate"]
+    # Nonces read in one batch, one bitmap word per (submitter, word)
+    assert len(relayer.client.rpc.batches) == 1
+
+def test_accepted_nonces_are_held_until_released():
+    relayer = make_relayer()
+    item = make_item(1)
+    assert relayer.verify([item]) == [None]
+    assert relayer.verify([item]) == ["in_flight"]
+    relayer.release([item])
+    assert relayer.verify([item]) == [None]
+
+def test_batches_stay_under_gas_limit():
+    items = [make_item(nonce, uri_size=100) for nonce in range(10)]
+    item_gas = estimate_item_gas(items[0])
+    relayer = make_relayer(max_batch_gas=BATCH_BASE_GAS + 3 * item_gas)
+
+    batches = relayer.batches(items)
+    assert [len(batch) for batch, _ in batches] == [3, 3, 3, 1]
+    assert [item for batch, _ in batches for item in batch] == items
+    for batch, gas in batches:
+        assert gas == BATCH_BASE_GAS + sum(estimate_item_gas(item) for item in batch)
+        assert gas <= relayer.max_batch_gas
+
+def test_oversized_item_goes_alone():
+    small = make_item(1)
+    large = make_item(2, uri_size=5000)
+    relayer = make_relayer(max_batch_gas=BATCH_BASE_GAS + estimate_item_gas(small) * 2)
+
+    batches = relayer.batches([small, large, small])
+    assert [batch for batch, _ in batches] == [[small], [large], [small]]
+    assert batches[1][1] > relayer.max_batch_gas
+
+def test_longer_strings_cost_more_gas():
+    assert estimate_item_gas(make_item(1, uri_size=100)) > estimate_item_gas(make_item(1, uri_size=20))
+
+def test_no_items_no_batches():
+    assert make_relayer().batches([]) == []
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for shared nonce coordination and worker detection
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import subprocess
+from types import SimpleNamespace
+from config.blockchain_config import detect_workers
+from tx_coordination import SharedNonceManager
+
+ADDRESS = "0x0000000000000000000000000000000000000001"
+
+class FakeEth:
+    def __init__(self, pending_count):
+        self.pending_count = pending_count
+
+    def get_transaction_count(self, address, block_identifier):
+        return self.pending_count
+
+def make_manager(tmp_path, eth):
+    return SharedNonceManager(SimpleNamespace(eth=eth), ADDRESS, str(tmp_path / "coordination.db"))
+
+def send(manager, eth):
+    """Reserve, sign and broadcast like BlockchainClient does"""
+    nonce = manager.reserve()
+    manager.signed(nonce, b"raw")
+    eth.pending_count = max(eth.pending_count, nonce + 1)
+    return nonce
+
+def test_counter_is_checked_against_the_node_at_startup(tmp_path):
+    eth = FakeEth(0)
+    manager = make_manager(tmp_path, eth)
+    assert [send(manager, eth), send(manager, eth)] == [0, 1]
+
+    # Restart after a script sent three transactions with the same key
+    eth.pending_count = 5
+    assert make_manager(tmp_path, eth).reserve() == 5
+
+def test_resync_after_an_external_transaction(tmp_path):
+    eth = FakeEth(0)
+    manager = make_manager(tmp_path, eth)
+    assert send(manager, eth) == 0
+    eth.pending_count = 3
+
+    # The stored counter hands out a nonce the node already has
+    rejected = manager.reserve()
+    assert rejected == 1
+    manager.resync()
+    assert manager.reserve() == 3
+    assert manager.reserve() == 4
+
+def test_resync_drops_stale_free_nonces(tmp_path):
+    eth = FakeEth(0)
+    manager = make_manager(tmp_path, eth)
+    first, second = manager.reserve(), manager.reserve()
+    manager.release(first)
+    eth.pending_count = 2
+
+    manager.resync()
+    assert manager.reserve() == 2
+
+def test_resync_keeps_nonces_other_workers_hold(tmp_path):
+    eth = FakeEth(0)
+    manager = make_manager(tmp_path, eth)
+    held = [manager.reserve() for _ in range(3)]
+    eth.pending_count = 1
+
+    manager.resync()
+    assert held == [0, 1, 2]
+    assert manager.reserve() == 3
+
+def test_claim_stale_rebroadcasts_signed_rows_of_dead_workers(tmp_path):
+    eth = FakeEth(0)
+    manager = make_manager(tmp_path, eth)
+    send(manager, eth)
+    manager.reserve()
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    manager._conn.execute("UPDATE nonce_reservations SET owner_pid = ?", (dead.pid,))
+
+    assert manager.claim_stale(gap_seconds=30) == [(0, b"raw"), (1, None)]
+
+def test_detect_workers():
+    assert detect_workers([], {}) == 1
+    assert detect_workers(["/venv/bin/uvicorn", "main:app", "--workers", "4"], {}) == 4
+    assert detect_workers(["/venv/lib/uvicorn/__main__.py", "main:app", "--workers=3"], {"API_WORKERS": "2"}) == 3
+    assert detect_workers(["main.py"], {"WEB_CONCURRENCY": "5"}) == 5
+    assert detect_workers(["/venv/bin/gunicorn", "main:app"], {"GUNICORN_CMD_ARGS": "-w 6 -k uvicorn.workers.UvicornWorker"}) == 6
+    assert detect_workers(["/venv/bin/gunicorn", "-w7", "main:app"], {}) == 7
+    # Backfill threads of the event listener are not API workers
+    assert detect_workers(["scripts/listen_events.py", "--workers", "8"], {}) == 1
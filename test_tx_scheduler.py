@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for transaction admission control
+Runs without a node
+"""
+
+import sys
+sys.path.append('scripts')
+
+import asyncio
+import threading
+import pytest
+from tx_scheduler import SchedulerSaturated, TransactionScheduler, parse_lane_limits
+
+def test_parse_lane_limits():
+    assert parse_lane_limits("claim:4, submission:2,") == {"claim": 4, "submission": 2}
+    assert parse_lane_limits("") == {}
+
+def test_full_queue_rejects_with_retry_after():
+    async def scenario():
+        scheduler = TransactionScheduler(max_concurrency=1, queue_depth=1, lane_limits={})
+        gate = threading.Event()
+        running = asyncio.ensure_future(scheduler.run("claim", gate.wait))
+        queued = asyncio.ensure_future(scheduler.run("claim", lambda: "queued"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(SchedulerSaturated) as rejected:
+            await scheduler.run("submission", lambda: "rejected")
+        assert rejected.value.retry_after >= 1
+
+        gate.set()
+        await asyncio.gather(running, queued)
+        return scheduler.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["lanes"]["submission"]["rejected"] == 1
+    assert snapshot["lanes"]["claim"]["completed"] == 2
+    assert snapshot["queued"] == 0 and snapshot["running"] == 0
+
+def test_saturated_lane_does_not_block_other_lanes():
+    async def scenario():
+        scheduler = TransactionScheduler(max_concurrency=2, queue_depth=10, lane_limits={"submission": 1})
+        gate = threading.Event()
+        order = []
+
+        def blocked():
+            gate.wait()
+            order.append("submission")
+
+        first = asyncio.ensure_future(scheduler.run("submission", blocked))
+        second = asyncio.ensure_future(scheduler.run("submission", lambda: order.append("submission")))
+        await asyncio.sleep(0.05)
+        assert scheduler.lanes["submission"].running == 1
+        assert scheduler.lanes["submission"].queued == 1
+
+        # The free slot goes to another lane instead of the saturated one
+        await scheduler.run("claim", lambda: order.append("claim"))
+        gate.set()
+        await asyncio.gather(first, second)
+        return order
+
+    assert asyncio.run(scenario()) == ["claim", "submission", "submission"]
+
+def test_waiting_requests_start_in_priority_order():
+    async def scenario():
+        scheduler = TransactionScheduler(max_concurrency=1, queue_depth=10, lane_limits={})
+        gate = threading.Event()
+        order = []
+        running = asyncio.ensure_future(scheduler.run("workflow", gate.wait))
+        await asyncio.sleep(0.05)
+
+        waiting = [asyncio.ensure_future(scheduler.run(lane, order.append, lane))
+                   for lane in ("submission", "bounty", "claim")]
+        await asyncio.sleep(0.05)
+        gate.set()
+        await asyncio.gather(running, *waiting)
+        return order
+
+    assert asyncio.run(scenario()) == ["claim", "bounty", "submission"]
+
+def test_failures_are_counted_and_free_the_slot():
+    async def scenario():
+        scheduler = TransactionScheduler(max_concurrency=1, queue_depth=1, lane_limits={})
+
+        def fail():
+            raise RuntimeError("reverted")
+
+        with pytest.raises(RuntimeError):
+            await scheduler.run("bounty", fail)
+        assert await scheduler.run("bounty", lambda: "ok") == "ok"
+        return scheduler.lanes["bounty"]
+
+    stats = asyncio.run(scenario())
+    assert (stats.failed, stats.completed, stats.running) == (1, 1, 0)